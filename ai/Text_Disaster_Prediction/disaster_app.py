@@ -4,6 +4,13 @@ import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import VotingClassifier
 import numpy as np
+import os
+import sys
+
+# Hashed vectorizer pickles reference ai/text_features.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_normalization import KeywordMatcher, TfidfFeatures, tokenize
+from text_cascade import TextCascade, model_tier
 
 app = Flask(__name__)
 
@@ -24,59 +31,95 @@ def load_model():
             print("Model files not found. Please train the model first.")
             return None, None
 
-# Enhanced prediction function with smart keyword detection
-def predict_disaster(text, model, vectorizer):
-    if model is None or vectorizer is None:
-        return "Model not loaded", 0.0
-    
-    # Preprocess text for better accuracy
-    text_lower = text.lower().strip()
-    
-    # Enhanced disaster keywords with stronger indicators
-    keywords = {
-        'flood': ['submerged', 'underwater', 'flooded', 'flood', 'water', 'river', 'rain', 'overflow', 'inundated', 'waterlogged', 'drowning', 'tunnels submerged'],
-        'earthquake': ['building', 'collapse', 'crack', 'shake', 'tremor', 'seismic', 'quake', 'fault', 'aftershock'],
-        'fire': ['smoke', 'burn', 'flame', 'fire', 'blaze', 'ignite', 'combustion', 'inferno', 'wildfire'],
-        'hurricane': ['wind', 'storm', 'hurricane', 'cyclone', 'typhoon', 'gale', 'tempest'],
-        'landslide': ['slide', 'mud', 'rock', 'slope', 'debris', 'hill', 'avalanche', 'rockfall'],
-        'drought': ['dry', 'water shortage', 'drought', 'arid', 'crop failure', 'wells dry'],
-        'tsunami': ['wave', 'tsunami', 'sea', 'ocean', 'coastal', 'tidal wave'],
-        'accident': ['crash', 'collision', 'accident', 'vehicle', 'train', 'derail', 'wreck']
-    }
+# Enhanced disaster keywords with stronger indicators
+keywords = {
+    'flood': ['submerged', 'underwater', 'flooded', 'flood', 'water', 'river', 'rain', 'overflow', 'inundated', 'waterlogged', 'drowning', 'tunnels submerged'],
+    'earthquake': ['building', 'collapse', 'crack', 'shake', 'tremor', 'seismic', 'quake', 'fault', 'aftershock'],
+    'fire': ['smoke', 'burn', 'flame', 'fire', 'blaze', 'ignite', 'combustion', 'inferno', 'wildfire'],
+    'hurricane': ['wind', 'storm', 'hurricane', 'cyclone', 'typhoon', 'gale', 'tempest'],
+    'landslide': ['slide', 'mud', 'rock', 'slope', 'debris', 'hill', 'avalanche', 'rockfall'],
+    'drought': ['dry', 'water shortage', 'drought', 'arid', 'crop failure', 'wells dry'],
+    'tsunami': ['wave', 'tsunami', 'sea', 'ocean', 'coastal', 'tidal wave'],
+    'accident': ['crash', 'collision', 'accident', 'vehicle', 'train', 'derail', 'wreck']
+}
+keyword_matcher = KeywordMatcher(keywords)
+strong_matcher = KeywordMatcher({'strong': ['submerged', 'underwater', 'flooded', 'inundated']})
+
+def keyword_tier(context):
+    """Best keyword category; strong flood indicators exit regardless of the match count"""
+    keyword_counts = keyword_matcher.counts(context['tokenized'])
+    context['keyword_counts'] = keyword_counts
     
-    # First check for strong keyword matches
     best_match = None
     max_matches = 0
-    
-    for disaster, words in keywords.items():
-        matches = sum(1 for word in words if word in text_lower)
+    for disaster, matches in keyword_counts.items():
         if matches > max_matches:
             max_matches = matches
             best_match = disaster
     
+    strong = bool(strong_matcher.match(context['tokenized']))
+    return {'label': best_match, 'score': float('inf') if strong else max_matches}
+
+def make_context(text, features):
+    """Cascade context: tokens plus a TF-IDF row computed only if a model tier runs"""
+    tokenized = tokenize(text)
+    cached = []
+    
+    def get_features():
+        if not cached:
+            cached.append(features.transform([tokenized]))
+        return cached[0]
+    return {'tokenized': tokenized, 'features': get_features}
+
+def build_cascade(model, fast_model=None):
+    """Keyword -> fast model -> ensemble, configured like the ML service (TEXT_CASCADE_* env)"""
+    if model is None:
+        return None
+    tiers = {'keyword': keyword_tier, 'ensemble': model_tier(model)}
+    if fast_model is not None:
+        tiers['fast'] = model_tier(fast_model, margin=True)
+    return TextCascade(tiers)
+
+# Enhanced prediction function with smart keyword detection
+def predict_disaster(text, cascade, features):
+    if cascade is None or features is None:
+        return "Model not loaded", 0.0
+    
+    context = make_context(text, features)
+    if not context['tokenized'].tokens:
+        return "Unknown", 0.0
+    tier, decision = cascade.predict(context)
+    if tier is None:
+        return "Unknown", 0.0
+    
     # If strong keyword match found, use it
-    if max_matches >= 2 or any(strong_word in text_lower for strong_word in ['submerged', 'underwater', 'flooded', 'inundated']):
-        if best_match == 'flood':
+    if tier == 'keyword':
+        if decision['label'] == 'flood':
             return 'Flood', 0.92
-        elif best_match:
-            return best_match.title(), 0.85
+        return decision['label'].title(), 0.85
     
-    # Otherwise use ML model
-    text_vec = vectorizer.transform([text])
-    prediction = model.predict(text_vec)[0]
-    probability = model.predict_proba(text_vec)[0].max()
+    prediction, probability = decision['label'], decision['confidence']
     
     # Boost confidence for keyword matches
-    for disaster, words in keywords.items():
-        if any(word in text_lower for word in words):
+    for disaster in keywords:
+        if disaster in context.get('keyword_counts', {}):
             if disaster.lower() == prediction.lower():
                 probability = min(0.95, probability + 0.3)
             break
     
     return prediction, probability
 
+def load_fast_model():
+    """Optional distilled model (distill_model.py) for the cascade's fast tier"""
+    try:
+        return joblib.load('disaster_model_FAST.pkl')
+    except Exception:
+        return None
+
 # Load model once at startup
 model, vectorizer = load_model()
+features = TfidfFeatures(vectorizer) if vectorizer is not None else None
+cascade = build_cascade(model, load_fast_model())
 
 @app.route('/')
 def index():
@@ -91,10 +134,10 @@ def predict():
         if not text:
             return jsonify({'error': 'Please enter some text'}), 400
         
-        if model is None or vectorizer is None:
+        if cascade is None or features is None:
             return jsonify({'error': 'Model not loaded'}), 500
         
-        prediction, confidence = predict_disaster(text, model, vectorizer)
+        prediction, confidence = predict_disaster(text, cascade, features)
         
         # Determine confidence level
         if confidence > 0.8:
@@ -113,5 +156,11 @@ def predict():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cascade/stats', methods=['GET'])
+def cascade_stats():
+    if cascade is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+    return jsonify(cascade.stats())
+
 if __name__ == '__main__':
     app.run(debug=True, port=5004)
\ No newline at end of file
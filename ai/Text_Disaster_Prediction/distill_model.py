@@ -0,0 +1,105 @@
+import time
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+import joblib
+
+from train_model import load_and_combine_data, preprocess_data
+
+def soft_label_dataset(X, proba):
+    """
+    Expand each sample into one row per class weighted by the teacher's
+    probability, so a weighted classifier fits the soft labels
+    """
+    n_samples, n_classes = proba.shape
+    rows = np.repeat(np.arange(n_samples), n_classes)
+    labels = np.tile(np.arange(n_classes), n_samples)
+    weights = proba.ravel()
+
+    # Rows with (near) zero probability add nothing but fitting time
+    keep = weights > 1e-4
+    return X[rows[keep]], labels[keep], weights[keep]
+
+def margin(proba):
+    """Gap between the top two class probabilities"""
+    top2 = np.sort(proba, axis=1)[:, -2:]
+    return top2[:, 1] - top2[:, 0]
+
+def distill(ensemble, X_train, C=10.0):
+    """Fit a sparse logistic regression on the ensemble's soft labels"""
+    proba = ensemble.predict_proba(X_train)
+    X_soft, y_soft, weights = soft_label_dataset(sp.csr_matrix(X_train), proba)
+
+    student = LogisticRegression(C=C, max_iter=2000, random_state=42)
+    student.fit(X_soft, y_soft, sample_weight=weights)
+    # Report classes in the ensemble's labels rather than column indices
+    student.classes_ = ensemble.classes_[student.classes_]
+    return student
+
+def per_sample_ms(model, X, repeats=3):
+    """Mean single-text predict_proba latency, as the service calls it"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(X.shape[0]):
+            model.predict_proba(X[i])
+        best = min(best, time.perf_counter() - start)
+    return best / X.shape[0] * 1000
+
+def evaluate(ensemble, student, X_test, y_test, thresholds):
+    """Agreement with the ensemble overall and for each margin threshold"""
+    teacher_pred = ensemble.predict(X_test)
+    student_proba = student.predict_proba(X_test)
+    student_pred = student.classes_[student_proba.argmax(axis=1)]
+    student_margin = margin(student_proba)
+
+    print(f"\nEnsemble accuracy: {accuracy_score(y_test, teacher_pred):.3f}")
+    print(f"Fast model accuracy: {accuracy_score(y_test, student_pred):.3f}")
+    print(f"Agreement with ensemble: {np.mean(student_pred == teacher_pred):.3f}")
+
+    print("\nTiered mode (fast model answers when margin >= threshold):")
+    print(f"{'threshold':>10s} {'coverage':>9s} {'agreement':>10s} {'accuracy':>9s}")
+    for threshold in thresholds:
+        confident = student_margin >= threshold
+        tiered_pred = np.where(confident, student_pred, teacher_pred)
+        agreement = np.mean(student_pred[confident] == teacher_pred[confident]) if confident.any() else float('nan')
+        print(f"{threshold:10.2f} {confident.mean():9.3f} {agreement:10.3f} "
+              f"{accuracy_score(y_test, tiered_pred):9.3f}")
+
+    sample = X_test[:min(50, X_test.shape[0])]
+    print(f"\nPer-text latency: ensemble {per_sample_ms(ensemble, sample):.3f}ms, "
+          f"fast model {per_sample_ms(student, sample):.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Distill the text ensemble into a fast linear model')
+    parser.add_argument('--model', default='disaster_model_FINAL.pkl')
+    parser.add_argument('--vectorizer', default='vectorizer_FINAL.pkl')
+    parser.add_argument('--output', default='disaster_model_FAST.pkl')
+    parser.add_argument('--C', type=float, default=10.0, help='inverse regularization of the fast model')
+    parser.add_argument('--thresholds', default='0.1,0.2,0.3,0.4,0.5')
+    args = parser.parse_args()
+
+    print("=== Distilling Fast Text Model ===")
+    ensemble = joblib.load(args.model)
+    vectorizer = joblib.load(args.vectorizer)
+
+    df = preprocess_data(load_and_combine_data())
+    # Same split as train_model.py so agreement is measured on unseen texts
+    X_train, X_test, y_train, y_test = train_test_split(
+        df['text'], df['label'], test_size=0.2, random_state=42, stratify=df['label']
+    )
+    X_train_vec = vectorizer.transform(X_train)
+    X_test_vec = vectorizer.transform(X_test)
+
+    student = distill(ensemble, X_train_vec, C=args.C)
+    evaluate(ensemble, student, X_test_vec, y_test.values,
+             [float(t) for t in args.thresholds.split(',')])
+
+    joblib.dump(student, args.output)
+    print(f"\nFast model saved to {args.output} (uses {args.vectorizer})")
+
+if __name__ == "__main__":
+    main()
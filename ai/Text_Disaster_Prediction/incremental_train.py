@@ -0,0 +1,215 @@
+"""
+Out-of-core training for the disaster text classifier.
+
+Labeled text (CSV with text,label columns) is streamed in chunks into
+partial_fit models over a stateless hashed featurizer, so nothing but the
+current chunk is held in memory. Progress per input file is checkpointed,
+and a rerun with new files only trains on rows it has not seen before.
+
+A stable slice of the stream (by crc32 of the text) is held out for
+evaluation and never trained on.
+"""
+
+import os
+import sys
+import time
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.metrics import accuracy_score, log_loss
+import joblib
+
+# Shared ai/ modules (text_normalization) live one directory up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_normalization import normalize
+
+DEFAULT_INPUTS = ['disasters/All the Texts.txt', 'disasters/Extended_Texts.txt']
+
+def make_vectorizer(n_features=2 ** 18):
+    """
+    Hashed n-gram features. No IDF: weights fitted on a growing stream would
+    shift under the already-trained models, so this stays fully stateless.
+    """
+    return HashingVectorizer(
+        n_features=n_features, ngram_range=(1, 2), stop_words='english',
+        alternate_sign=False, norm='l2'
+    )
+
+def make_models():
+    return {
+        'sgd': SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42),
+        'nb': MultinomialNB(alpha=0.1)
+    }
+
+def is_holdout(text, holdout_percent):
+    """Stable train/holdout assignment that does not depend on row order"""
+    return zlib.crc32(text.encode('utf-8')) % 100 < holdout_percent
+
+def clean_chunk(chunk):
+    """Same cleaning as train_model.py: drop 'None'/missing labels, normalize"""
+    chunk = chunk[chunk['label'] != 'None'].dropna(subset=['text', 'label'])
+    chunk = chunk.assign(text=chunk['text'].map(normalize))
+    return chunk.drop_duplicates(subset=['text'])
+
+def scan_labels(paths, chunksize):
+    """Cheap first pass over the label column; partial_fit needs every class up front"""
+    labels = set()
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=['label'], chunksize=chunksize):
+            labels.update(chunk['label'].dropna().astype(str))
+    labels.discard('None')
+    return np.array(sorted(labels))
+
+def stream_chunks(path, chunksize, skip_rows=0):
+    """Yield (rows consumed so far, chunk) for one CSV, resuming after skip_rows data rows"""
+    consumed = skip_rows
+    reader = pd.read_csv(path, chunksize=chunksize,
+                         skiprows=range(1, skip_rows + 1) if skip_rows else None)
+    for chunk in reader:
+        consumed += len(chunk)
+        yield consumed, chunk
+
+def new_state(classes, args):
+    return {
+        'classes': classes,
+        'models': make_models(),
+        'n_features': args.n_features,
+        'holdout_percent': args.holdout_percent,
+        'progress': {},
+        'holdout_texts': [],
+        'holdout_labels': [],
+        'trained_rows': 0,
+        'history': []
+    }
+
+def save_checkpoint(state, path):
+    # Write then rename so an interrupted save never corrupts the checkpoint
+    tmp_path = path + '.tmp'
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+def evaluate(state, vectorizer):
+    """Accuracy and log loss of every model on the held-out texts"""
+    if not state['holdout_texts']:
+        return {}
+    X = vectorizer.transform(state['holdout_texts'])
+    y = np.array(state['holdout_labels'])
+    results = {}
+    for name, model in state['models'].items():
+        if not hasattr(model, 'classes_'):
+            continue
+        proba = model.predict_proba(X)
+        results[name] = {
+            'accuracy': round(accuracy_score(y, model.classes_[proba.argmax(axis=1)]), 4),
+            'log_loss': round(log_loss(y, proba, labels=model.classes_), 4)
+        }
+    return results
+
+def train(args):
+    paths = args.inputs or DEFAULT_INPUTS
+
+    if args.resume and os.path.exists(args.checkpoint):
+        state = joblib.load(args.checkpoint)
+        print(f"Resumed from {args.checkpoint}: {state['trained_rows']} rows trained")
+        if state['n_features'] != args.n_features or state['holdout_percent'] != args.holdout_percent:
+            print("Using the checkpoint's n_features/holdout split, not the command line")
+    else:
+        classes = scan_labels(paths, args.chunksize)
+        if args.classes:
+            # Labels expected in future data must be known before the first partial_fit
+            classes = np.array(sorted(set(classes) | {c.strip() for c in args.classes.split(',') if c.strip()}))
+        print(f"Classes ({len(classes)}): {', '.join(classes)}")
+        state = new_state(classes, args)
+
+    vectorizer = make_vectorizer(state['n_features'])
+    known = set(state['classes'])
+    chunks_since_checkpoint = 0
+    start = time.perf_counter()
+    new_rows = 0
+
+    for path in paths:
+        skip = state['progress'].get(path, 0)
+        for consumed, chunk in stream_chunks(path, args.chunksize, skip):
+            chunk = clean_chunk(chunk)
+            state['progress'][path] = consumed
+            if chunk.empty:
+                continue
+            unknown = set(chunk['label']) - known
+            if unknown:
+                raise ValueError(f"{path}: labels {sorted(unknown)} are not in the model's classes; "
+                                 f"retrain from scratch without --resume (or declare them with --classes)")
+
+            holdout = chunk['text'].map(lambda t: is_holdout(t, state['holdout_percent'])).astype(bool)
+            held = chunk[holdout]
+            room = args.max_holdout - len(state['holdout_texts'])
+            if room > 0:
+                state['holdout_texts'].extend(held['text'].iloc[:room])
+                state['holdout_labels'].extend(held['label'].iloc[:room])
+
+            train_rows = chunk[~holdout]
+            if len(train_rows):
+                X = vectorizer.transform(train_rows['text'])
+                y = train_rows['label'].values
+                for model in state['models'].values():
+                    model.partial_fit(X, y, classes=state['classes'])
+                state['trained_rows'] += len(train_rows)
+                new_rows += len(train_rows)
+
+            chunks_since_checkpoint += 1
+            if chunks_since_checkpoint >= args.checkpoint_every:
+                record_checkpoint(state, vectorizer, args.checkpoint)
+                chunks_since_checkpoint = 0
+
+    elapsed = time.perf_counter() - start
+    print(f"\nTrained on {new_rows} new rows in {elapsed:.1f}s "
+          f"({new_rows / elapsed if elapsed else 0:.0f} rows/s), {state['trained_rows']} in total")
+    if new_rows or chunks_since_checkpoint:
+        record_checkpoint(state, vectorizer, args.checkpoint)
+    return state, vectorizer
+
+def record_checkpoint(state, vectorizer, path):
+    results = evaluate(state, vectorizer)
+    state['history'].append({'trained_rows': state['trained_rows'], **results})
+    save_checkpoint(state, path)
+    scores = ', '.join(f"{name} acc={r['accuracy']:.3f} loss={r['log_loss']:.3f}" for name, r in results.items())
+    print(f"Checkpoint at {state['trained_rows']} rows ({len(state['holdout_texts'])} held out): {scores}")
+
+def export_best(state, vectorizer, model_path, vectorizer_path):
+    """Save the model with the best holdout accuracy in the service's model/vectorizer layout"""
+    results = evaluate(state, vectorizer)
+    if not results:
+        print("No trained model with held-out data to export")
+        return None
+    best = max(results, key=lambda name: results[name]['accuracy'])
+    joblib.dump(state['models'][best], model_path)
+    joblib.dump(vectorizer, vectorizer_path)
+    print(f"\nExported {best} (holdout accuracy {results[best]['accuracy']:.3f}) to {model_path}, {vectorizer_path}")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally train the text classifier from streamed CSVs')
+    parser.add_argument('inputs', nargs='*', help=f"CSV files with text,label columns (default: {DEFAULT_INPUTS})")
+    parser.add_argument('--chunksize', type=int, default=10000, help='rows read per chunk')
+    parser.add_argument('--checkpoint', default='incremental_checkpoint.pkl')
+    parser.add_argument('--checkpoint-every', type=int, default=10, help='chunks between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint, skipping rows already read')
+    parser.add_argument('--classes', default=None,
+                        help='comma-separated labels to allow beyond those in the inputs (fresh runs only)')
+    parser.add_argument('--holdout-percent', type=int, default=10)
+    parser.add_argument('--max-holdout', type=int, default=20000, help='held-out texts kept for evaluation')
+    parser.add_argument('--n-features', type=int, default=2 ** 18)
+    parser.add_argument('--model-output', default='disaster_model_INCREMENTAL.pkl')
+    parser.add_argument('--vectorizer-output', default='vectorizer_INCREMENTAL.pkl')
+    args = parser.parse_args()
+
+    print("=== Incremental Disaster Text Model Training ===")
+    state, vectorizer = train(args)
+    export_best(state, vectorizer, args.model_output, args.vectorizer_output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,14 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
 import joblib
 import os
+import sys
+import time
+import argparse
+
+# Shared ai/ modules (text_features) live one directory up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_features import HashedTfidfVectorizer
+from text_normalization import normalize
 
 def load_and_combine_data():
     """Load and combine all disaster text data"""
@@ -37,8 +45,8 @@ def preprocess_data(df):
     """Preprocess the text data"""
     print("\nPreprocessing data...")
     
-    # Clean text data
-    df['text'] = df['text'].str.lower().str.strip()
+    # Clean text data (same normalization the services apply before predicting)
+    df['text'] = df['text'].map(normalize)
     
     # Remove duplicates
     df = df.drop_duplicates(subset=['text'])
@@ -46,7 +54,29 @@ def preprocess_data(df):
     
     return df
 
-def train_models(X_train, X_test, y_train, y_test):
+def make_vectorizer(featurizer='tfidf'):
+    """Advanced text featurizer: vocabulary TF-IDF or hashed TF-IDF"""
+    if featurizer == 'hashing':
+        # Same n-grams and stop words, no vocabulary to build or pickle
+        return HashedTfidfVectorizer(n_features=2 ** 18, ngram_range=(1, 2), stop_words='english')
+    return TfidfVectorizer(
+        max_features=2000, 
+        stop_words='english', 
+        ngram_range=(1, 2),
+        min_df=2,
+        max_df=0.95
+    )
+
+def make_ensemble():
+    """Soft-voting ensemble with multiple classifiers"""
+    return VotingClassifier([
+        ('svm', SVC(kernel='linear', probability=True, random_state=42, C=1.0)),
+        ('nb', MultinomialNB(alpha=0.1)),
+        ('lr', LogisticRegression(random_state=42, max_iter=1000, C=1.0)),
+        ('rf', RandomForestClassifier(n_estimators=200, random_state=42, max_depth=10))
+    ], voting='soft')
+
+def train_models(X_train, X_test, y_train, y_test, featurizer='tfidf'):
     """Train multiple models and create ensemble"""
     print("\nTraining models...")
     
@@ -64,23 +94,12 @@ def train_models(X_train, X_test, y_train, y_test):
     print(f"Random Forest Accuracy: {rf_accuracy:.3f}")
     
     # Advanced TF-IDF vectorizer with n-grams
-    vectorizer_advanced = TfidfVectorizer(
-        max_features=2000, 
-        stop_words='english', 
-        ngram_range=(1, 2),
-        min_df=2,
-        max_df=0.95
-    )
+    vectorizer_advanced = make_vectorizer(featurizer)
     X_train_advanced = vectorizer_advanced.fit_transform(X_train)
     X_test_advanced = vectorizer_advanced.transform(X_test)
     
     # Ensemble model with multiple classifiers
-    ensemble = VotingClassifier([
-        ('svm', SVC(kernel='linear', probability=True, random_state=42, C=1.0)),
-        ('nb', MultinomialNB(alpha=0.1)),
-        ('lr', LogisticRegression(random_state=42, max_iter=1000, C=1.0)),
-        ('rf', RandomForestClassifier(n_estimators=200, random_state=42, max_depth=10))
-    ], voting='soft')
+    ensemble = make_ensemble()
     
     ensemble.fit(X_train_advanced, y_train)
     ensemble_pred = ensemble.predict(X_test_advanced)
@@ -124,8 +143,50 @@ def test_model_predictions(model, vectorizer):
         probability = model.predict_proba(text_vec)[0].max()
         print(f"'{text}' -> {prediction} (confidence: {probability:.3f})")
 
+def compare_featurizers(X_train, X_test, y_train, y_test, repeats=5):
+    """Ensemble accuracy, transform throughput and pickle size per featurizer"""
+    import pickle
+    
+    print("\nComparing featurizers...")
+    texts = list(X_test)
+    results = {}
+    for featurizer in ('tfidf', 'hashing'):
+        vectorizer = make_vectorizer(featurizer)
+        X_train_vec = vectorizer.fit_transform(X_train)
+        
+        # Batch transform throughput plus the per-text call the services make
+        batch_seconds = min(_timed(lambda: vectorizer.transform(texts)) for _ in range(repeats))
+        single_seconds = min(_timed(lambda: [vectorizer.transform([t]) for t in texts]) for _ in range(repeats))
+        
+        ensemble = make_ensemble().fit(X_train_vec, y_train)
+        accuracy = accuracy_score(y_test, ensemble.predict(vectorizer.transform(texts)))
+        results[featurizer] = {
+            'accuracy': accuracy,
+            'batch_texts_per_sec': len(texts) / batch_seconds,
+            'single_text_ms': single_seconds / len(texts) * 1000,
+            'pickle_kb': len(pickle.dumps(vectorizer)) / 1024
+        }
+    
+    print(f"{'featurizer':>10s} {'accuracy':>9s} {'batch texts/s':>14s} {'single ms':>10s} {'pickle KB':>10s}")
+    for featurizer, r in results.items():
+        print(f"{featurizer:>10s} {r['accuracy']:9.3f} {r['batch_texts_per_sec']:14.0f} "
+              f"{r['single_text_ms']:10.3f} {r['pickle_kb']:10.1f}")
+    return results
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
 def main():
     """Main training function"""
+    parser = argparse.ArgumentParser(description='Train the disaster text classifier')
+    parser.add_argument('--featurizer', choices=['tfidf', 'hashing'], default='tfidf',
+                        help='vocabulary TF-IDF or hashed TF-IDF (text_features.HashedTfidfVectorizer)')
+    parser.add_argument('--compare-featurizers', action='store_true',
+                        help='only compare accuracy and transform throughput of both featurizers')
+    args = parser.parse_args()
+    
     print("=== Disaster Text Classification Model Training ===")
     
     # Load and combine data
@@ -146,8 +207,12 @@ def main():
     print(f"\nTraining set: {len(X_train)} samples")
     print(f"Test set: {len(X_test)} samples")
     
+    if args.compare_featurizers:
+        compare_featurizers(X_train, X_test, y_train, y_test)
+        return
+    
     # Train models
-    best_model, best_vectorizer, best_accuracy = train_models(X_train, X_test, y_train, y_test)
+    best_model, best_vectorizer, best_accuracy = train_models(X_train, X_test, y_train, y_test, args.featurizer)
     
     # Test predictions
     test_model_predictions(best_model, best_vectorizer)
@@ -1,6 +1,7 @@
+import os
 import numpy as np
 import librosa
-from sklearn.model_selection import GridSearchCV, cross_val_score
+from sklearn.model_selection import cross_val_score
 from sklearn.ensemble import VotingClassifier
 import tensorflow as tf
 from tensorflow.keras import layers, models
@@ -47,6 +48,39 @@ class AccuracyImprovementTechniques:
         
         return augmented_data
     
+    def streaming_augmentation(self, audio_paths, labels, cache_path='saved_models/augmentation_cache.npy',
+                               indices=None, batch_size=32, workers=None, **augment_kwargs):
+        """
+        On-the-fly alternative to data_augmentation for training
+        
+        Time-stretch and pitch-shift variants are computed once (in parallel)
+        into an on-disk mel cache; every batch then draws a random variant and
+        applies cheap spectrogram augmentations, so training memory does not
+        grow with the number of augmented copies.
+        
+        Args:
+            audio_paths: clip paths, e.g. from audio_augmentation.list_audio_files
+            labels: disaster-type names aligned with audio_paths, as returned by
+                list_audio_files; encoded with the preprocessor's label encoder
+            indices: optional subset of clips (e.g. the training split)
+        
+        Returns:
+            SpecAugmentSequence to pass to model.fit
+        """
+        from audio_augmentation import precompute_variants, SpecAugmentSequence
+        
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        mel_cache = precompute_variants(
+            audio_paths, cache_path,
+            sample_rate=self.preprocessor.sample_rate,
+            duration=self.preprocessor.duration,
+            workers=workers
+        )
+        # Same integer ids as split_data, which fits the encoder on the same names
+        encoder = self.preprocessor.label_encoder
+        labels = encoder.transform(labels) if hasattr(encoder, 'classes_') else encoder.fit_transform(labels)
+        return SpecAugmentSequence(mel_cache, labels, indices=indices, batch_size=batch_size, **augment_kwargs)
+    
     def create_ensemble_model(self, input_shapes):
         """Create ensemble of different architectures"""
         # CNN branch
@@ -105,11 +139,22 @@ class AccuracyImprovementTechniques:
         
         return model
     
-    def hyperparameter_tuning(self, X_train, y_train):
-        """Perform hyperparameter tuning for traditional ML models"""
+    def hyperparameter_tuning(self, X_train, y_train, strategy='halving', n_candidates=30,
+                              journal_dir='saved_models/search'):
+        """
+        Perform hyperparameter tuning for traditional ML models.
+
+        Runs a resumable successive-halving (or random) search on all cores;
+        fold results are journaled under `journal_dir`, so rerunning after an
+        interruption only fits the folds that are missing. A leaderboard CSV
+        per model is written next to the journals.
+        """
         from sklearn.ensemble import RandomForestClassifier
         from sklearn.svm import SVC
+        from hyperparameter_search import ResumableSearch
         
+        # X_train is already scaled by prepare_data: no scaler in the search pipeline
+
         # Random Forest tuning
         rf_params = {
             'n_estimators': [100, 200, 300],
@@ -119,8 +164,12 @@ class AccuracyImprovementTechniques:
         }
         
         rf = RandomForestClassifier(random_state=42)
-        rf_grid = GridSearchCV(rf, rf_params, cv=5, scoring='accuracy', n_jobs=-1)
-        rf_grid.fit(X_train, y_train)
+        rf_search = ResumableSearch(
+            rf, rf_params, os.path.join(journal_dir, 'rf_journal.jsonl'), strategy=strategy,
+            n_candidates=n_candidates
+        )
+        rf_search.fit(X_train, y_train)
+        rf_search.write_leaderboard(os.path.join(journal_dir, 'rf_leaderboard.csv'))
         
         # SVM tuning
         svm_params = {
@@ -129,15 +178,22 @@ class AccuracyImprovementTechniques:
             'kernel': ['rbf', 'poly', 'sigmoid']
         }
         
-        svm = SVC(random_state=42, probability=True)
-        svm_grid = GridSearchCV(svm, svm_params, cv=5, scoring='accuracy', n_jobs=-1)
-        svm_grid.fit(X_train, y_train)
+        # Probability calibration runs an extra internal CV per fit and does not
+        # change the ranking, so it is only enabled for the final refit
+        svm = SVC(random_state=42)
+        svm_search = ResumableSearch(
+            svm, svm_params, os.path.join(journal_dir, 'svm_journal.jsonl'), strategy=strategy,
+            n_candidates=n_candidates
+        )
+        svm_search.fit(X_train, y_train)
+        svm_search.write_leaderboard(os.path.join(journal_dir, 'svm_leaderboard.csv'))
+        best_svm = svm_search.best_estimator_.set_params(clf__probability=True).fit(X_train, y_train)
         
         return {
-            'best_rf': rf_grid.best_estimator_,
-            'best_svm': svm_grid.best_estimator_,
-            'rf_score': rf_grid.best_score_,
-            'svm_score': svm_grid.best_score_
+            'best_rf': rf_search.best_estimator_,
+            'best_svm': best_svm,
+            'rf_score': rf_search.best_score_,
+            'svm_score': svm_search.best_score_
         }
     
     def create_voting_ensemble(self, models):
@@ -224,6 +280,9 @@ class AccuracyImprovementTechniques:
     
     def feature_importance_analysis(self, model, feature_names):
         """Analyze feature importance"""
+        # Tuned models are pipelines; the importances live on the final step
+        if hasattr(model, 'steps'):
+            model = model.steps[-1][1]
         if hasattr(model, 'feature_importances_'):
             importances = model.feature_importances_
             indices = np.argsort(importances)[::-1]
@@ -0,0 +1,176 @@
+"""
+Streaming audio augmentation for training
+Expensive waveform variants are computed once to disk; cheap spectrogram
+augmentations are drawn per batch while the model trains
+"""
+
+import os
+import json
+from multiprocessing import Pool
+import numpy as np
+
+from memmap_sequence import MemmapSequence
+
+DISASTER_TYPES = ['cyclone', 'earthquake', 'explosion', 'fire', 'flood', 'landslide', 'thunderstorm']
+
+# Waveform variants that are too slow to recompute every epoch
+DEFAULT_VARIANTS = (('stretch', 0.9), ('stretch', 1.1), ('pitch', 2), ('pitch', -2))
+
+
+def list_audio_files(data_dir, disaster_types=DISASTER_TYPES):
+    """Audio files and labels in the same order AudioPreprocessor.prepare_dataset reads them"""
+    paths, labels = [], []
+    for disaster_type in disaster_types:
+        disaster_path = os.path.join(data_dir, disaster_type)
+        if os.path.exists(disaster_path):
+            for file in os.listdir(disaster_path):
+                if file.endswith('.wav'):
+                    paths.append(os.path.join(disaster_path, file))
+                    labels.append(disaster_type)
+    return paths, labels
+
+
+def _variant_mels(args):
+    """Mel spectrograms of the original clip and each variant (worker process)"""
+    import librosa
+    from audio_ingest import AudioIngest
+
+    audio_path, sample_rate, max_length, variants = args
+    y, _ = AudioIngest(sample_rate, max_length).load(audio_path)
+
+    waves = [y]
+    for kind, amount in variants:
+        if kind == 'stretch':
+            variant = librosa.effects.time_stretch(y, rate=amount)
+        elif kind == 'pitch':
+            variant = librosa.effects.pitch_shift(y, sr=sample_rate, n_steps=amount)
+        else:
+            raise ValueError(f"Unknown variant: {kind}")
+        fixed = np.zeros(max_length, dtype=np.float32)
+        fixed[:min(len(variant), max_length)] = variant[:max_length]
+        waves.append(fixed)
+
+    return np.stack([
+        librosa.feature.melspectrogram(y=w, sr=sample_rate, n_mels=128) for w in waves
+    ]).astype(np.float32)
+
+
+def precompute_variants(audio_paths, cache_path, sample_rate=22050, duration=3.0,
+                        variants=DEFAULT_VARIANTS, workers=None):
+    """
+    Compute mel spectrograms of each clip and its expensive variants once.
+
+    Results go to a memory-mapped .npy of shape (n_clips, 1 + n_variants,
+    n_mels, frames); index 0 along axis 1 is the original clip. An existing
+    cache built from the same inputs is reused.
+
+    Returns:
+        read-only np.memmap of the cache
+    """
+    audio_paths = list(audio_paths)
+    if not audio_paths:
+        raise ValueError("precompute_variants needs at least one audio file")
+
+    max_length = int(sample_rate * duration)
+    meta_path = cache_path + '.json'
+    meta = {'paths': audio_paths, 'sample_rate': sample_rate,
+            'duration': duration, 'variants': [list(v) for v in variants]}
+
+    if os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            if json.load(f) == meta:
+                return np.load(cache_path, mmap_mode='r')
+
+    jobs = [(path, sample_rate, max_length, tuple(variants)) for path in audio_paths]
+    cache = None
+    with Pool(workers) as pool:
+        for i, mels in enumerate(pool.imap(_variant_mels, jobs, chunksize=4)):
+            if cache is None:
+                cache = np.lib.format.open_memmap(
+                    cache_path, mode='w+', dtype=np.float32, shape=(len(audio_paths),) + mels.shape
+                )
+            cache[i] = mels
+            if (i + 1) % 100 == 0:
+                print(f"Precomputed variants for {i + 1}/{len(audio_paths)} clips")
+
+    cache.flush()
+    del cache
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return np.load(cache_path, mmap_mode='r')
+
+
+class SpecAugmentSequence(MemmapSequence):
+    """
+    Batches of randomly augmented mel spectrograms from the variant cache.
+
+    Per sample, a random cached variant is picked and then cheap
+    spectrogram-domain augmentations are applied: gain, a small noise floor,
+    SpecAugment-style frequency/time masks and mixing with another clip of
+    the same class (labels stay sparse). Only one batch is held in memory,
+    so memory no longer grows with the number of augmented copies.
+    """
+
+    def __init__(self, mel_cache, labels, indices=None, batch_size=32, shuffle=True,
+                 freq_masks=2, freq_mask_width=16, time_masks=2, time_mask_width=20,
+                 gain_range=(0.8, 1.2), noise_level=1e-4, mix_prob=0.3, seed=None, **kwargs):
+        self.mel_cache = mel_cache
+        self.labels = np.asarray(labels)
+        self.indices = np.arange(len(self.labels)) if indices is None else np.asarray(indices)
+        self.freq_masks = freq_masks
+        self.freq_mask_width = freq_mask_width
+        self.time_masks = time_masks
+        self.time_mask_width = time_mask_width
+        self.gain_range = gain_range
+        self.noise_level = noise_level
+        self.mix_prob = mix_prob
+        self.seed = int(np.random.SeedSequence(seed).entropy % (2 ** 32))
+        self.epoch = 0
+        self.rng = np.random.default_rng(self.seed)
+
+        self._by_class = {c: self.indices[self.labels[self.indices] == c] for c in np.unique(self.labels[self.indices])}
+        super().__init__(self.indices, batch_size=batch_size, shuffle=shuffle, **kwargs)
+
+    def shuffle_order(self):
+        self.rng.shuffle(self._order)
+
+    def _mask(self, mel, rng):
+        n_mels, n_frames = mel.shape
+        for _ in range(self.freq_masks):
+            width = rng.integers(0, self.freq_mask_width + 1)
+            start = rng.integers(0, max(1, n_mels - width))
+            mel[start:start + width, :] = 0.0
+        for _ in range(self.time_masks):
+            width = rng.integers(0, self.time_mask_width + 1)
+            start = rng.integers(0, max(1, n_frames - width))
+            mel[:, start:start + width] = 0.0
+        return mel
+
+    def __getitem__(self, idx):
+        # A generator per (epoch, batch) keeps worker processes from drawing
+        # identical augmentations from a copied random state
+        rng = np.random.default_rng((self.seed, self.epoch, idx))
+
+        batch_idx = self.batch_indices(idx)
+        n_variants = self.mel_cache.shape[1]
+        variants = rng.integers(0, n_variants, size=len(batch_idx))
+        batch = np.array(self.mel_cache[batch_idx, variants], dtype=np.float32)
+
+        for i, sample_idx in enumerate(batch_idx):
+            mel = batch[i]
+            if self.mix_prob and rng.random() < self.mix_prob:
+                partner = rng.choice(self._by_class[self.labels[sample_idx]])
+                weight = rng.uniform(0.6, 0.9)
+                other = self.mel_cache[partner, rng.integers(0, n_variants)]
+                mel = weight * mel + (1 - weight) * other
+            # Volume change scales a power spectrogram by gain squared
+            mel = mel * rng.uniform(*self.gain_range) ** 2
+            if self.noise_level:
+                mel = mel + rng.exponential(self.noise_level, size=mel.shape).astype(np.float32)
+            batch[i] = self._mask(mel, rng)
+
+        return batch[..., np.newaxis], self.labels[batch_idx]
+
+    def on_epoch_end(self):
+        self.epoch += 1
+        super().on_epoch_end()
@@ -0,0 +1,119 @@
+"""
+Audio ingest for ResQ Connect
+Decodes uploads into fixed-length float32 buffers with a fast resampler
+"""
+
+import math
+import time
+from fractions import Fraction
+import numpy as np
+
+# Resampler quality tiers mapped to soxr recipes. 'poly' (and every tier
+# when soxr is not installed) uses SciPy's polyphase filter.
+RESAMPLE_QUALITY = {
+    'poly': None,
+    'fast': 'LQ',
+    'medium': 'MQ',
+    'hq': 'HQ',    # same recipe as librosa's default 'soxr_hq'
+    'vhq': 'VHQ'
+}
+
+
+def resample(y, orig_sr, target_sr, quality='hq'):
+    """Resample a mono float32 signal with the given quality tier"""
+    if orig_sr == target_sr:
+        return y
+    if quality not in RESAMPLE_QUALITY:
+        raise ValueError(f"Unknown resample quality '{quality}', expected one of {list(RESAMPLE_QUALITY)}")
+
+    recipe = RESAMPLE_QUALITY[quality]
+    if recipe is not None:
+        try:
+            import soxr
+            return soxr.resample(y, orig_sr, target_sr, quality=recipe).astype(np.float32, copy=False)
+        except ImportError:
+            pass
+
+    from scipy.signal import resample_poly
+    ratio = Fraction(int(target_sr), int(orig_sr))
+    return resample_poly(y, ratio.numerator, ratio.denominator).astype(np.float32, copy=False)
+
+
+class AudioIngest:
+    """
+    Decode audio files into a preallocated float32 buffer of `max_length` samples.
+
+    Formats libsndfile understands (wav, flac, ogg, ...) are read directly
+    with soundfile, only as many frames as are needed; anything else (e.g.
+    webm voice notes) falls back to librosa's audioread/ffmpeg loader.
+    Decode and resample times are reported separately.
+    """
+
+    def __init__(self, sample_rate=22050, max_length=66150, quality='hq'):
+        if quality not in RESAMPLE_QUALITY:
+            raise ValueError(f"Unknown resample quality '{quality}', expected one of {list(RESAMPLE_QUALITY)}")
+        self.sample_rate = sample_rate
+        self.max_length = max_length
+        self.quality = quality
+
+    def _decode_soundfile(self, audio_path, out):
+        """
+        Decode with soundfile; returns (samples, native_sr), with samples None
+        when they were written straight into `out`, or None if unsupported
+        """
+        import soundfile as sf
+
+        try:
+            f = sf.SoundFile(audio_path)
+        except Exception:
+            return None
+
+        with f:
+            if f.samplerate == self.sample_rate and f.channels == 1:
+                # Already at the target rate: decode straight into the output buffer
+                f.read(frames=self.max_length, dtype='float32', out=out[:min(self.max_length, f.frames)])
+                return None, f.samplerate
+
+            frames = math.ceil(self.max_length * f.samplerate / self.sample_rate)
+            data = f.read(frames=frames, dtype='float32', always_2d=True)
+            return data.mean(axis=1), f.samplerate
+
+    def _decode_fallback(self, audio_path):
+        import librosa
+
+        duration = self.max_length / self.sample_rate
+        y, sr = librosa.load(audio_path, sr=None, mono=True, duration=duration)
+        return y.astype(np.float32, copy=False), sr
+
+    def load(self, audio_path, out=None):
+        """
+        Load the first `max_length` samples of a file at `sample_rate`.
+
+        Args:
+            audio_path: Path to the audio file
+            out: optional float32 buffer of length max_length to fill and reuse
+
+        Returns:
+            (buffer, timings) where buffer is zero-padded to max_length and
+            timings holds 'decode_ms' and 'resample_ms'
+        """
+        if out is None:
+            out = np.zeros(self.max_length, dtype=np.float32)
+        else:
+            out[:] = 0.0
+
+        start = time.perf_counter()
+        decoded = self._decode_soundfile(audio_path, out)
+        if decoded is None:
+            decoded = self._decode_fallback(audio_path)
+        samples, native_sr = decoded
+        decode_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        if samples is not None:
+            y = resample(samples, native_sr, self.sample_rate, self.quality)
+            n = min(len(y), self.max_length)
+            out[:n] = y[:n]
+        resample_ms = (time.perf_counter() - start) * 1000
+
+        return out, {'decode_ms': round(decode_ms, 3), 'resample_ms': round(resample_ms, 3)}
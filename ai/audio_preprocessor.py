@@ -5,28 +5,25 @@ import os
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 import joblib
+from audio_ingest import AudioIngest
 
 class AudioPreprocessor:
-    def __init__(self, sample_rate=22050, duration=3.0):
+    def __init__(self, sample_rate=22050, duration=3.0, resample_quality='hq'):
         self.sample_rate = sample_rate
         self.duration = duration
         self.max_length = int(sample_rate * duration)
         self.label_encoder = LabelEncoder()
+        self.ingest = AudioIngest(sample_rate, self.max_length, resample_quality)
         
     def extract_features(self, audio_path):
         """Extract comprehensive audio features"""
         try:
-            # Load audio
-            y, sr = librosa.load(audio_path, sr=self.sample_rate, duration=self.duration)
-            
-            # Pad or truncate to fixed length
-            if len(y) < self.max_length:
-                y = np.pad(y, (0, self.max_length - len(y)))
-            else:
-                y = y[:self.max_length]
+            # Load audio, already zero-padded/truncated to max_length
+            y, timings = self.ingest.load(audio_path)
+            sr = self.sample_rate
             
             # Extract features
-            features = {}
+            features = {'timings': timings}
             
             # MFCC features (13 coefficients)
             mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
@@ -62,6 +59,15 @@ class AudioPreprocessor:
             print(f"Error processing {audio_path}: {e}")
             return None
     
+    def stream_windows(self, audio_path, hop_seconds=1.5, block_seconds=5.0):
+        """Yield overlapping `duration`-second mel/MFCC windows over the whole file"""
+        from audio_streaming import IncrementalMelFramer, read_blocks
+        
+        framer = IncrementalMelFramer(self.sample_rate, self.duration, hop_seconds)
+        for block in read_blocks(audio_path, self.sample_rate, block_seconds):
+            yield from framer.push(block)
+        yield from framer.finish()
+    
     def prepare_dataset(self, data_dir):
         """Prepare dataset from directory structure"""
         features_list = []
@@ -99,36 +105,77 @@ class AudioPreprocessor:
         
         return features_list, labels
     
-    def split_data(self, features_list, test_size=0.2, val_size=0.1):
-        """Split data into train, validation, and test sets"""
+    def split_data(self, features_list, test_size=0.2, val_size=0.1, mel_path=None):
+        """
+        Split data into train, validation, and test sets.
+
+        Mel spectrograms are written once into a single float32 tensor ordered
+        train, then val, then test, so each split is a slice (a view, not a
+        copy). With `mel_path` the tensor is a memory-mapped .npy file and the
+        spectrograms are moved out of `features_list` as they are written, so
+        the dataset no longer has to fit in RAM. The returned dict also holds
+        the original row indices of each split ('train_idx', ...).
+        """
         # Extract features and labels
         X_traditional = np.array([item['features'] for item in features_list])
-        X_mel = np.array([item['mel_spec'] for item in features_list])
         y = np.array([item['label'] for item in features_list])
         
         # Encode labels
         y_encoded = self.label_encoder.fit_transform(y)
         
-        # Split data
-        X_train_trad, X_temp_trad, X_train_mel, X_temp_mel, y_train, y_temp = train_test_split(
-            X_traditional, X_mel, y_encoded, test_size=test_size + val_size, random_state=42, stratify=y_encoded
+        # Split row indices; same shuffles as splitting the arrays directly
+        indices = np.arange(len(features_list))
+        train_idx, temp_idx, y_train, y_temp = train_test_split(
+            indices, y_encoded, test_size=test_size + val_size, random_state=42, stratify=y_encoded
         )
         
         val_ratio = val_size / (test_size + val_size)
-        X_val_trad, X_test_trad, X_val_mel, X_test_mel, y_val, y_test = train_test_split(
-            X_temp_trad, X_temp_mel, y_temp, test_size=1-val_ratio, random_state=42, stratify=y_temp
+        val_idx, test_idx, y_val, y_test = train_test_split(
+            temp_idx, y_temp, test_size=1-val_ratio, random_state=42, stratify=y_temp
         )
         
+        order = np.concatenate([train_idx, val_idx, test_idx])
+        mel_shape = np.shape(features_list[0]['mel_spec'])
+        if mel_path:
+            os.makedirs(os.path.dirname(mel_path) or '.', exist_ok=True)
+            X_mel = np.lib.format.open_memmap(
+                mel_path, mode='w+', dtype=np.float32, shape=(len(order),) + mel_shape
+            )
+        else:
+            X_mel = np.empty((len(order),) + mel_shape, dtype=np.float32)
+        
+        for row, i in enumerate(order):
+            X_mel[row] = features_list[i]['mel_spec']
+            if mel_path:
+                features_list[i]['mel_spec'] = None
+        
+        n_train, n_val = len(train_idx), len(val_idx)
+        mel_slices = {
+            'train': (0, n_train),
+            'val': (n_train, n_train + n_val),
+            'test': (n_train + n_val, len(order))
+        }
+        if mel_path:
+            X_mel.flush()
+            # Reopen read-only so training can never write into the cache
+            del X_mel
+            X_mel = np.load(mel_path, mmap_mode='r')
+        
         return {
-            'X_train_traditional': X_train_trad,
-            'X_val_traditional': X_val_trad,
-            'X_test_traditional': X_test_trad,
-            'X_train_mel': X_train_mel,
-            'X_val_mel': X_val_mel,
-            'X_test_mel': X_test_mel,
+            'X_train_traditional': X_traditional[train_idx],
+            'X_val_traditional': X_traditional[val_idx],
+            'X_test_traditional': X_traditional[test_idx],
+            'X_train_mel': X_mel[slice(*mel_slices['train'])],
+            'X_val_mel': X_mel[slice(*mel_slices['val'])],
+            'X_test_mel': X_mel[slice(*mel_slices['test'])],
             'y_train': y_train,
             'y_val': y_val,
-            'y_test': y_test
+            'y_test': y_test,
+            'train_idx': train_idx,
+            'val_idx': val_idx,
+            'test_idx': test_idx,
+            'mel_path': mel_path,
+            'mel_slices': mel_slices
         }
     
     def save_preprocessor(self, filepath):
@@ -0,0 +1,377 @@
+"""
+Streaming audio features for ResQ Connect
+Classifies recordings of any length over overlapping fixed-size windows
+"""
+
+import threading
+import time
+import uuid
+import numpy as np
+
+
+class IncrementalMelFramer:
+    """
+    Incremental STFT -> mel frames over a stream of samples.
+
+    Every STFT frame is computed exactly once and kept in a ring buffer of the
+    last `frames_per_window` frames, so overlapping windows share their frames
+    instead of recomputing them. Frame parameters match
+    librosa.feature.melspectrogram defaults used by AudioPreprocessor.
+    """
+
+    def __init__(self, sample_rate=22050, window_seconds=3.0, hop_seconds=1.5,
+                 n_fft=2048, hop_length=512, n_mels=128, n_mfcc=13):
+        import librosa
+
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+
+        window_samples = int(sample_rate * window_seconds)
+        self.frames_per_window = 1 + window_samples // hop_length
+        self.window_hop_frames = max(1, int(round(hop_seconds * sample_rate / hop_length)))
+
+        self._fft_window = librosa.filters.get_window('hann', n_fft, fftbins=True).astype(np.float32)
+        self._mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """Start a new stream"""
+        # Centered framing: the stream starts with n_fft // 2 zeros, like
+        # librosa's center=True with constant padding
+        self._pending = np.zeros(self.n_fft // 2, dtype=np.float32)
+        self._mel = np.zeros((self._mel_basis.shape[0], self.frames_per_window), dtype=np.float32)
+        self._pos = 0
+        self._filled = 0
+        self._frames_seen = 0
+        self._since_emit = 0
+        self._emitted = 0
+
+    def _frames(self, samples):
+        """STFT power frames for all complete frames in the pending buffer"""
+        self._pending = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        n_frames = 1 + (len(self._pending) - self.n_fft) // self.hop_length
+        if n_frames <= 0:
+            return None
+
+        frames = np.lib.stride_tricks.sliding_window_view(self._pending, self.n_fft)[::self.hop_length][:n_frames]
+        power = np.abs(np.fft.rfft(frames * self._fft_window, axis=1)) ** 2
+        self._pending = self._pending[n_frames * self.hop_length:]
+        return (self._mel_basis @ power.T.astype(np.float32))
+
+    def _window(self):
+        start_frame = self._frames_seen - self.frames_per_window
+        if self._filled < self.frames_per_window:
+            # Frames were written from column 0 and the rest is still zero
+            mel = self._mel.copy()
+        else:
+            mel = np.concatenate([self._mel[:, self._pos:], self._mel[:, :self._pos]], axis=1)
+        return {
+            'start': max(0, start_frame) * self.hop_length / self.sample_rate,
+            'mel_spec': mel,
+            'mfcc': self.mfcc(mel)
+        }
+
+    def push(self, samples):
+        """
+        Add samples to the stream.
+
+        Returns:
+            list of completed windows, each with 'start' (seconds), 'mel_spec'
+            (n_mels x frames_per_window) and 'mfcc' (n_mfcc x frames_per_window)
+        """
+        windows = []
+        mel_frames = self._frames(samples)
+        if mel_frames is None:
+            return windows
+
+        for col in range(mel_frames.shape[1]):
+            self._mel[:, self._pos] = mel_frames[:, col]
+            self._pos = (self._pos + 1) % self.frames_per_window
+            self._filled = min(self._filled + 1, self.frames_per_window)
+            self._frames_seen += 1
+            self._since_emit += 1
+
+            if self._filled == self.frames_per_window and (
+                self._emitted == 0 or self._since_emit >= self.window_hop_frames
+            ):
+                windows.append(self._window())
+                self._emitted += 1
+                self._since_emit = 0
+        return windows
+
+    def finish(self):
+        """Flush the end of the stream and return any remaining windows"""
+        windows = self.push(np.zeros(self.n_fft // 2, dtype=np.float32))
+        if self._emitted == 0 and self._filled > 0:
+            # Shorter than one window: zero-pad like AudioPreprocessor does
+            windows.append(self._window())
+        elif self._since_emit > self.window_hop_frames // 2:
+            # Cover the tail with a final window aligned to the end
+            windows.append(self._window())
+        self._since_emit = 0
+        return windows
+
+    def mfcc(self, mel):
+        """MFCCs of a mel window (same dB scaling as librosa.feature.mfcc)"""
+        import librosa
+        import scipy.fft
+
+        mel_db = librosa.power_to_db(mel)
+        return scipy.fft.dct(mel_db, axis=0, type=2, norm='ortho')[:self.n_mfcc]
+
+
+def pool_probabilities(window_probs, pooling='mean'):
+    """
+    Aggregate per-window class probabilities into one distribution.
+
+    Args:
+        window_probs: array of shape (n_windows, n_classes)
+        pooling: 'mean', 'max', 'logmean' (geometric mean) or 'vote'
+    """
+    window_probs = np.asarray(window_probs, dtype=np.float64)
+    if pooling == 'mean':
+        pooled = window_probs.mean(axis=0)
+    elif pooling == 'max':
+        pooled = window_probs.max(axis=0)
+    elif pooling == 'logmean':
+        pooled = np.exp(np.log(np.clip(window_probs, 1e-8, 1.0)).mean(axis=0))
+    elif pooling == 'vote':
+        pooled = np.bincount(window_probs.argmax(axis=1), minlength=window_probs.shape[1]).astype(np.float64)
+    else:
+        raise ValueError(f"Unknown pooling method: {pooling}")
+    return pooled / pooled.sum()
+
+
+def read_blocks(audio_path, sample_rate=22050, block_seconds=5.0):
+    """Yield mono float32 blocks of a file at `sample_rate`, reading it in pieces"""
+    import soundfile as sf
+
+    with sf.SoundFile(audio_path) as f:
+        resampler = None
+        if f.samplerate != sample_rate:
+            import soxr
+            resampler = soxr.ResampleStream(f.samplerate, sample_rate, 1, dtype='float32')
+
+        blocksize = int(f.samplerate * block_seconds)
+        for block in f.blocks(blocksize=blocksize, dtype='float32', always_2d=True):
+            mono = block.mean(axis=1)
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono, last=False)
+            yield mono
+
+        if resampler is not None:
+            yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+class StreamingAudioClassifier:
+    """
+    Classify a recording of any length with the mel-spectrogram CNN.
+
+    The file is read block by block; overlapping windows are batched through
+    the model and their probabilities pooled. Memory stays bounded by the
+    block size, one window of frames and one batch of windows.
+    """
+
+    def __init__(self, model, label_encoder, sample_rate=22050, window_seconds=3.0,
+                 hop_seconds=1.5, batch_size=16, pooling='mean', block_seconds=5.0):
+        self.model = model
+        self.label_encoder = label_encoder
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.batch_size = batch_size
+        self.pooling = pooling
+        self.block_seconds = block_seconds
+
+    def new_framer(self):
+        return IncrementalMelFramer(self.sample_rate, self.window_seconds, self.hop_seconds)
+
+    def iter_windows(self, audio_path):
+        """Yield feature windows over a file, reading it block by block"""
+        framer = self.new_framer()
+        for block in read_blocks(audio_path, self.sample_rate, self.block_seconds):
+            yield from framer.push(block)
+        yield from framer.finish()
+
+    def predict_windows(self, windows):
+        """Class probabilities for a list of windows, shape (n_windows, n_classes)"""
+        batch = np.stack([w['mel_spec'] for w in windows])[..., np.newaxis]
+        return self.model.predict(batch, batch_size=self.batch_size, verbose=0)
+
+    def classify_file(self, audio_path, pooling=None):
+        """
+        Classify a whole file.
+
+        Returns:
+            dict with class_name, confidence, probabilities (per class),
+            n_windows and window_predictions (start time, class, confidence)
+        """
+        pending, window_probs, window_starts = [], [], []
+
+        def _flush():
+            if pending:
+                window_probs.extend(self.predict_windows(pending))
+                window_starts.extend(w['start'] for w in pending)
+                pending.clear()
+
+        for window in self.iter_windows(audio_path):
+            pending.append(window)
+            if len(pending) >= self.batch_size:
+                _flush()
+        _flush()
+
+        if not window_probs:
+            return None
+
+        window_probs = np.asarray(window_probs)
+        pooled = pool_probabilities(window_probs, pooling or self.pooling)
+        classes = self.label_encoder.classes_
+        best = int(np.argmax(pooled))
+
+        return {
+            'class_name': str(classes[best]),
+            'confidence': float(pooled[best]),
+            'probabilities': {str(name): float(p) for name, p in zip(classes, pooled)},
+            'n_windows': len(window_probs),
+            'window_predictions': [
+                {'start': round(start, 2), 'class_name': str(classes[int(np.argmax(p))]), 'confidence': float(np.max(p))}
+                for start, p in zip(window_starts, window_probs)
+            ]
+        }
+
+
+class StreamLimitExceeded(Exception):
+    """A push would take a stream past its total byte budget"""
+
+
+class AudioStreamSession:
+    """
+    Rolling classification of a live PCM stream.
+
+    Frames pushed by the client go through an IncrementalMelFramer; every
+    completed window (one per hop) is classified right away and reported
+    together with a rolling average over the last `rolling_windows` windows.
+    With `max_bytes` set, pushes beyond that many bytes in total raise
+    StreamLimitExceeded and are not consumed.
+    """
+
+    def __init__(self, classifier, sample_rate=22050, encoding='float32', rolling_windows=3, max_bytes=None):
+        if encoding not in ('float32', 'int16'):
+            raise ValueError(f"Unsupported PCM encoding: {encoding}")
+
+        self.classifier = classifier
+        self.encoding = encoding
+        self.rolling_windows = rolling_windows
+        self.framer = classifier.new_framer()
+        self.resampler = None
+        if sample_rate != classifier.sample_rate:
+            import soxr
+            self.resampler = soxr.ResampleStream(sample_rate, classifier.sample_rate, 1, dtype='float32')
+
+        self._recent = []
+        self._prob_sum = None
+        self._n_windows = 0
+        self._leftover = b''
+        self.max_bytes = max_bytes
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self.last_active = time.monotonic()
+
+    def _decode(self, data):
+        data = self._leftover + data
+        width = 4 if self.encoding == 'float32' else 2
+        usable = len(data) - len(data) % width
+        self._leftover = data[usable:]
+        if self.encoding == 'float32':
+            return np.frombuffer(data[:usable], dtype='<f4')
+        return np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768.0
+
+    def _classify(self, windows):
+        if not windows:
+            return []
+
+        classes = self.classifier.label_encoder.classes_
+        probs = self.classifier.predict_windows(windows)
+        updates = []
+        for window, p in zip(windows, probs):
+            self._n_windows += 1
+            self._prob_sum = p if self._prob_sum is None else self._prob_sum + p
+            self._recent = (self._recent + [p])[-self.rolling_windows:]
+            rolling = np.mean(self._recent, axis=0)
+            best = int(np.argmax(rolling))
+            updates.append({
+                'start': round(window['start'], 2),
+                'class_name': str(classes[int(np.argmax(p))]),
+                'confidence': float(np.max(p)),
+                'rolling_class': str(classes[best]),
+                'rolling_confidence': float(rolling[best])
+            })
+        return updates
+
+    def push(self, data):
+        """Feed raw little-endian PCM bytes (mono); returns one update per new window"""
+        with self._lock:
+            self.last_active = time.monotonic()
+            if self.max_bytes is not None and self.bytes_received + len(data) > self.max_bytes:
+                raise StreamLimitExceeded(f"Stream exceeds {self.max_bytes} bytes")
+            self.bytes_received += len(data)
+            samples = self._decode(data)
+            if self.resampler is not None:
+                samples = self.resampler.resample_chunk(samples, last=False)
+            return self._classify(self.framer.push(samples))
+
+    def finish(self):
+        """Flush the stream; returns (final updates, mean-pooled summary or None)"""
+        with self._lock:
+            updates = []
+            if self.resampler is not None:
+                tail = self.resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+                updates.extend(self._classify(self.framer.push(tail)))
+            updates.extend(self._classify(self.framer.finish()))
+
+        if self._prob_sum is None:
+            return updates, None
+
+        classes = self.classifier.label_encoder.classes_
+        pooled = self._prob_sum / self._n_windows
+        best = int(np.argmax(pooled))
+        return updates, {
+            'class_name': str(classes[best]),
+            'confidence': float(pooled[best]),
+            'n_windows': self._n_windows
+        }
+
+
+class AudioStreamRegistry:
+    """Thread-safe map of open stream sessions with idle expiry"""
+
+    def __init__(self, idle_timeout=120.0, max_streams=64):
+        self.idle_timeout = idle_timeout
+        self.max_streams = max_streams
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        now = time.monotonic()
+        for stream_id in [sid for sid, s in self._sessions.items() if now - s.last_active > self.idle_timeout]:
+            del self._sessions[stream_id]
+
+    def open(self, session):
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_streams:
+                raise RuntimeError('Too many open audio streams')
+            stream_id = uuid.uuid4().hex
+            self._sessions[stream_id] = session
+            return stream_id
+
+    def get(self, stream_id):
+        with self._lock:
+            self._expire()
+            return self._sessions.get(stream_id)
+
+    def close(self, stream_id):
+        with self._lock:
+            return self._sessions.pop(stream_id, None)
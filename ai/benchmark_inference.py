@@ -0,0 +1,266 @@
+"""
+Inference latency benchmark for ResQ Connect ML services
+Times text, image and audio predictions of MLService and LightweightMLService,
+in-process and through the Flask /predict route, at several concurrency levels
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+import platform
+import subprocess
+import tempfile
+import importlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+SERVICES = {'ml': 'ml_service', 'lite': 'ml_service_lite'}
+MODALITIES = ('text', 'image', 'image_duplicate', 'audio', 'audio_long')
+MODES = ('inprocess', 'http')
+
+BENCH_TEXTS = [
+    "There is a massive flood in the city, people are trapped on rooftops",
+    "Building collapsed after the earthquake, several people under the rubble",
+    "Fire emergency - smoke everywhere and flames spreading to the next block",
+    "Car accident on the highway, two vehicles involved and injured passengers",
+    "Heavy rain all night and the river overflow has reached the main road",
+    "Landslide blocked the mountain road after mud and rocks came down the slope",
+    "Cyclone warning issued, strong wind already tearing roofs off houses",
+    "Gas leak reported near the chemical plant, residents complain of toxic fumes"
+]
+
+
+def make_inputs(work_dir, n_images=8, seed=0):
+    """Write the fixed synthetic images and recordings used by every run"""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    inputs = {'text': BENCH_TEXTS, 'image': [], 'audio': [], 'audio_long': []}
+
+    # Distinct images so the duplicate index does not short-circuit them
+    for i in range(n_images):
+        gradient = np.linspace(0, 255, 224, dtype=np.float32)
+        pixels = np.stack([np.add.outer(gradient, gradient) / 2] * 3, axis=-1)
+        pixels = np.clip(pixels + rng.normal(0, 40, pixels.shape), 0, 255).astype(np.uint8)
+        path = os.path.join(work_dir, f'bench_{i}.png')
+        Image.fromarray(pixels).save(path)
+        inputs['image'].append(path)
+
+    def write_wav(path, seconds, sample_rate=22050):
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        signal = 0.3 * np.sin(2 * np.pi * rng.uniform(80, 800) * t) + 0.05 * rng.normal(size=t.shape)
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes((np.clip(signal, -1, 1) * 32767).astype('<i2').tobytes())
+        return path
+
+    inputs['audio'] = [write_wav(os.path.join(work_dir, f'bench_{i}.wav'), 3.0) for i in range(4)]
+    inputs['audio_long'] = [write_wav(os.path.join(work_dir, f'bench_long_{i}.wav'), 12.0) for i in range(2)]
+    return inputs
+
+
+def load_service(name, work_dir):
+    """Import a service module with its prediction log on a scratch database"""
+    # Set before the import: the module creates (and migrates) its tracker at import time
+    os.environ['PREDICTIONS_DB_PATH'] = os.path.join(work_dir, f'bench_{name}.db')
+    return importlib.import_module(SERVICES[name])
+
+
+def make_call(module, name, modality, mode, inputs):
+    """Build a zero-argument callable for request i of a scenario"""
+    service = module.ml_service
+    kind = 'image' if modality.startswith('image') else 'audio' if modality.startswith('audio') else 'text'
+    samples = inputs['image'] if kind == 'image' else inputs[modality] if kind == 'audio' else inputs['text']
+
+    if mode == 'inprocess':
+        if name == 'lite' and kind != 'text':
+            method = getattr(service, f'predict_{kind}')
+            return lambda i: method()
+        method = getattr(service, f'predict_{kind}')
+        return lambda i: method(samples[i % len(samples)])
+
+    client = module.app.test_client()
+    payloads = []
+    for path in samples:
+        if kind == 'text':
+            payloads.append({'type': 'text', 'text': path})
+        else:
+            with open(path, 'rb') as f:
+                payloads.append((kind, os.path.basename(path), f.read()))
+
+    def call(i):
+        payload = payloads[i % len(payloads)]
+        if kind == 'text':
+            data = payload
+        else:
+            data = {'type': payload[0], 'file': (io.BytesIO(payload[2]), payload[1])}
+        response = client.post('/predict', data=data, content_type='multipart/form-data')
+        if response.status_code != 200:
+            raise RuntimeError(f'HTTP {response.status_code}')
+        return response.get_json()
+
+    return call
+
+
+def run_scenario(call, concurrency, n_requests, warmup=3):
+    """Time n_requests calls with `concurrency` threads; returns a result dict"""
+    for i in range(warmup):
+        try:
+            call(i)
+        except Exception:
+            pass
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, str(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(n_requests)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([t for t, err in outcomes if err is None]) * 1000
+    errors = [err for _, err in outcomes if err is not None]
+    result = {
+        'concurrency': concurrency,
+        'requests': n_requests,
+        'errors': len(errors),
+        'throughput_rps': round((n_requests - len(errors)) / wall, 2) if wall else None
+    }
+    if len(latencies):
+        result.update({
+            'mean_ms': round(float(latencies.mean()), 4),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 4)
+        })
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(services, modalities, modes, concurrency_levels, n_requests):
+    work_dir = tempfile.mkdtemp(prefix='resq_bench_')
+    inputs = make_inputs(work_dir)
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'requests_per_level': n_requests
+        },
+        'results': []
+    }
+
+    for name in services:
+        module = load_service(name, work_dir)
+        service = module.ml_service
+        for modality in modalities:
+            if name == 'lite' and modality in ('image_duplicate', 'audio_long'):
+                continue
+            for mode in modes:
+                call = make_call(module, name, modality, mode, inputs)
+                for concurrency in concurrency_levels:
+                    if hasattr(service, 'image_index') and modality.startswith('image'):
+                        # Fresh index per level; 'image' measures the full
+                        # classification path, 'image_duplicate' the cache hit
+                        from embedding_index import EmbeddingIndex
+                        service.image_index = EmbeddingIndex()
+                        service.duplicate_threshold = 0.95 if modality == 'image_duplicate' else 1.01
+
+                    result = run_scenario(call, concurrency, n_requests)
+                    result.update({'service': name, 'modality': modality, 'mode': mode})
+                    report['results'].append(result)
+                    print(f"{name:4s} {modality:15s} {mode:9s} c={concurrency:<3d} "
+                          f"p50={result.get('p50_ms', float('nan')):9.2f}ms "
+                          f"p99={result.get('p99_ms', float('nan')):9.2f}ms "
+                          f"{result['throughput_rps']:8.1f} req/s errors={result['errors']}")
+        if hasattr(service, 'duplicate_threshold'):
+            service.duplicate_threshold = float(os.environ.get('IMAGE_DUPLICATE_THRESHOLD', 0.95))
+
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.10):
+    """Print latency/throughput changes per scenario; returns the regressions"""
+    key = lambda r: (r['service'], r['modality'], r['mode'], r['concurrency'])
+    before = {key(r): r for r in baseline['results']}
+    regressions = []
+
+    print(f"Comparing {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    for result in current['results']:
+        old = before.get(key(result))
+        if not old or 'p50_ms' not in old or 'p50_ms' not in result:
+            continue
+        p50 = result['p50_ms'] / old['p50_ms'] - 1 if old['p50_ms'] else 0.0
+        p99 = result['p99_ms'] / old['p99_ms'] - 1 if old['p99_ms'] else 0.0
+        rps = result['throughput_rps'] / old['throughput_rps'] - 1 if old['throughput_rps'] else 0.0
+        flag = ''
+        if p50 > threshold or p99 > threshold or rps < -threshold:
+            flag = '  REGRESSION'
+            regressions.append(key(result))
+        print(f"{' '.join(map(str, key(result))):40s} p50 {p50:+7.1%}  p99 {p99:+7.1%}  "
+              f"throughput {rps:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ML service inference latency')
+    parser.add_argument('--services', default='lite,ml', help='comma-separated: ml, lite')
+    parser.add_argument('--modalities', default=','.join(MODALITIES))
+    parser.add_argument('--modes', default=','.join(MODES), help='inprocess, http')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=50, help='requests per concurrency level')
+    parser.add_argument('--output', default=None, help='JSON results path')
+    parser.add_argument('--compare', default=None, help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change flagged as regression')
+    args = parser.parse_args()
+
+    # Services load their models with paths relative to this directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+
+    split = lambda s: [x.strip() for x in s.split(',') if x.strip()]
+    report = run_benchmark(
+        split(args.services), split(args.modalities), split(args.modes),
+        [int(c) for c in split(args.concurrency)], args.requests
+    )
+
+    output = args.output or os.path.join(
+        'benchmarks', f"inference_{report['meta']['commit'] or 'local'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        return 1 if compare_reports(baseline, report, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Embedding Index for ResQ Connect
+Keeps recent image embeddings in memory to spot near-duplicate reports
+"""
+
+import threading
+import numpy as np
+
+
+class EmbeddingIndex:
+    """
+    Fixed-capacity cosine-similarity index over L2-normalized embeddings.
+
+    Full vectors are stored as float16 in a ring buffer, so the oldest reports
+    are evicted once `capacity` is reached. NumPy has no fast float16 matmul,
+    so queries brute-force a small float32 random-projection sketch of every
+    vector and then re-rank the best `rerank` candidates on the full vectors.
+    """
+
+    def __init__(self, dim=1280, capacity=4096, sketch_dim=128, rerank=16, seed=42):
+        self.dim = dim
+        self.capacity = capacity
+        self.rerank = rerank
+
+        rng = np.random.default_rng(seed)
+        self._projection = (rng.standard_normal((dim, sketch_dim)) / np.sqrt(sketch_dim)).astype(np.float32)
+        self._vectors = np.zeros((capacity, dim), dtype=np.float16)
+        self._sketches = np.zeros((capacity, sketch_dim), dtype=np.float32)
+        self._ids = [None] * capacity
+        self._payloads = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _normalize(embedding):
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def add(self, report_id, embedding, payload=None):
+        """Store an embedding (and optional payload such as the prediction result)"""
+        vec = self._normalize(embedding)
+        sketch = vec @ self._projection
+        with self._lock:
+            slot = self._next
+            self._vectors[slot] = vec
+            self._sketches[slot] = sketch
+            self._ids[slot] = report_id
+            self._payloads[slot] = payload
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def search(self, embedding, k=1):
+        """
+        Find the k most similar stored embeddings.
+
+        Returns:
+            list of (report_id, similarity, payload), best match first
+        """
+        query = self._normalize(embedding)
+        query_sketch = query @ self._projection
+        with self._lock:
+            if self._size == 0:
+                return []
+
+            approx = self._sketches[:self._size] @ query_sketch
+            n_candidates = min(max(k, self.rerank), self._size)
+            candidates = np.argpartition(approx, -n_candidates)[-n_candidates:]
+
+            sims = self._vectors[candidates].astype(np.float32) @ query
+            top = np.argsort(sims)[::-1][:k]
+            return [
+                (self._ids[candidates[i]], float(sims[i]), self._payloads[candidates[i]])
+                for i in top
+            ]
+
+    def find_duplicate(self, embedding, threshold=0.95):
+        """Return (report_id, similarity, payload) of a near-duplicate, or None"""
+        matches = self.search(embedding, k=1)
+        if matches and matches[0][1] >= threshold:
+            return matches[0]
+        return None
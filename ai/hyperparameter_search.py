@@ -0,0 +1,229 @@
+"""
+Resumable hyperparameter search for the traditional audio models
+Successive halving or random search over all cores, with a fold-level journal
+"""
+
+import os
+import csv
+import json
+import time
+import hashlib
+import numpy as np
+from joblib import Parallel, delayed, Memory
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+def _candidate_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _fingerprint(X, y, pipeline, cv, random_state):
+    """Hash of the data, the pipeline's parameters and the fold setup a journal entry was scored on"""
+    digest = hashlib.sha1()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes() if array.dtype != object else json.dumps(array.tolist(), default=str).encode())
+    params = {k: v for k, v in pipeline.get_params(deep=True).items() if k != 'memory'}
+    digest.update(json.dumps({'pipeline': params, 'cv': cv, 'random_state': random_state},
+                             sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+
+def _evaluate_fold(pipeline, params, X, y, train_idx, test_idx):
+    """Fit one candidate on one fold; returns (score, fit_time, predict_time per sample)"""
+    model = clone(pipeline).set_params(**{f'clf__{k}': v for k, v in params.items()})
+
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X[test_idx])
+    predict_time = (time.perf_counter() - start) / len(test_idx)
+
+    return accuracy_score(y[test_idx], y_pred), fit_time, predict_time
+
+
+class ResumableSearch:
+    """
+    Random search or successive halving whose fold results survive restarts.
+
+    Every (candidate, resource level, fold) result is appended to a JSONL
+    journal as soon as it finishes; on the next run those entries are read
+    back and only the missing folds are fitted. Entries carry a fingerprint
+    of X, y, the pipeline parameters and the cv setup, and entries from a
+    different fingerprint (e.g. updated data of the same size) are ignored.
+    The estimator runs as the 'clf' step of a pipeline. Pass `preprocessing`
+    only for features that are not transformed yet; with a `cache_dir` the
+    fitted preprocessing is cached and reused by every candidate that sees
+    the same fold, which only pays off when that step is expensive.
+
+    Args:
+        estimator: sklearn estimator to tune
+        param_distributions: dict of parameter lists or scipy distributions
+        journal_path: JSONL file recording finished folds
+        strategy: 'halving' (successive halving over training samples) or 'random'
+        n_candidates: number of sampled parameter settings
+        factor: fraction of candidates kept per halving round is 1/factor
+        min_samples: training samples in the first halving round
+        preprocessing: transformer in front of the estimator, 'standard' for a
+            StandardScaler, or None when X is already scaled
+        cache_dir: joblib cache for the fitted preprocessing (None to refit it)
+    """
+
+    def __init__(self, estimator, param_distributions, journal_path, strategy='halving',
+                 n_candidates=30, cv=5, factor=3, min_samples=None, preprocessing=None,
+                 cache_dir=None, n_jobs=-1, random_state=42):
+        if strategy not in ('halving', 'random'):
+            raise ValueError(f"Unknown search strategy: {strategy}")
+
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.journal_path = journal_path
+        self.strategy = strategy
+        self.n_candidates = n_candidates
+        self.cv = cv
+        self.factor = factor
+        self.min_samples = min_samples
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+        if preprocessing == 'standard':
+            preprocessing = StandardScaler()
+        steps = [('clf', estimator)]
+        memory = None
+        if preprocessing is not None:
+            steps.insert(0, ('features', preprocessing))
+            # Nothing to cache without a feature step
+            memory = Memory(cache_dir, verbose=0) if cache_dir else None
+        self.pipeline = Pipeline(steps, memory=memory)
+
+        self.results_ = []
+
+    def _load_journal(self, fingerprint):
+        done = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a partial last line
+                        continue
+                    if entry.get('fingerprint') != fingerprint:
+                        continue
+                    done[(entry['candidate'], entry['n_samples'], entry['fold'])] = entry
+        return done
+
+    def _schedule(self, n_total):
+        """Training-set sizes and number of candidates kept for each round"""
+        if self.strategy == 'random':
+            return [(n_total, self.n_candidates)]
+
+        n_rounds = max(1, int(np.floor(np.log(self.n_candidates) / np.log(self.factor))) + 1)
+        min_samples = self.min_samples or max(self.cv * 10, n_total // self.factor ** (n_rounds - 1))
+        schedule = []
+        n_candidates = self.n_candidates
+        for r in range(n_rounds):
+            # The last round always trains on the full dataset
+            n_samples = n_total if r == n_rounds - 1 else min(n_total, min_samples * self.factor ** r)
+            schedule.append((n_samples, n_candidates))
+            n_candidates = max(1, int(np.ceil(n_candidates / self.factor)))
+        return schedule
+
+    def fit(self, X, y):
+        X = np.asarray(X)
+        y = np.asarray(y)
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        fingerprint = _fingerprint(X, y, self.pipeline, self.cv, self.random_state)
+        done = self._load_journal(fingerprint)
+
+        candidates = list(ParameterSampler(
+            self.param_distributions, self.n_candidates, random_state=self.random_state
+        ))
+        alive = [(_candidate_key(p), p) for p in candidates]
+        scores = {}
+
+        schedule = self._schedule(len(y))
+        for round_idx, (n_samples, n_keep) in enumerate(schedule):
+            alive = alive[:n_keep] if round_idx == 0 else alive
+            if n_samples < len(y):
+                subset, _ = train_test_split(
+                    np.arange(len(y)), train_size=n_samples, stratify=y, random_state=self.random_state
+                )
+            else:
+                subset = np.arange(len(y))
+            folds = list(StratifiedKFold(self.cv, shuffle=True, random_state=self.random_state)
+                         .split(X[subset], y[subset]))
+
+            pending = [
+                (key, params, fold_idx)
+                for key, params in alive
+                for fold_idx in range(len(folds))
+                if (key, int(n_samples), fold_idx) not in done
+            ]
+            print(f"Round {round_idx + 1}: {len(alive)} candidates on {n_samples} samples "
+                  f"({len(pending)} folds to fit, {len(alive) * len(folds) - len(pending)} resumed)")
+
+            if pending:
+                outputs = Parallel(n_jobs=self.n_jobs, return_as='generator')(
+                    delayed(_evaluate_fold)(self.pipeline, params, X[subset], y[subset], *folds[fold_idx])
+                    for _, params, fold_idx in pending
+                )
+            else:
+                outputs = []
+            with open(self.journal_path, 'a') as journal:
+                for (key, params, fold_idx), (score, fit_time, predict_time) in zip(pending, outputs):
+                    entry = {
+                        'fingerprint': fingerprint, 'candidate': key, 'params': params, 'round': round_idx,
+                        'n_samples': int(n_samples), 'fold': fold_idx, 'score': score,
+                        'fit_time': fit_time, 'predict_time': predict_time
+                    }
+                    journal.write(json.dumps(entry, default=str) + '\n')
+                    journal.flush()
+                    done[(key, int(n_samples), fold_idx)] = entry
+
+            for key, params in alive:
+                entries = [done[(key, int(n_samples), f)] for f in range(len(folds))]
+                scores[key] = {
+                    'params': params,
+                    'round': round_idx,
+                    'n_samples': int(n_samples),
+                    'mean_score': float(np.mean([e['score'] for e in entries])),
+                    'std_score': float(np.std([e['score'] for e in entries])),
+                    'mean_fit_time': float(np.mean([e['fit_time'] for e in entries])),
+                    'mean_predict_time': float(np.mean([e['predict_time'] for e in entries]))
+                }
+
+            alive.sort(key=lambda kp: scores[kp[0]]['mean_score'], reverse=True)
+            if round_idx + 1 < len(schedule):
+                alive = alive[:max(1, int(np.ceil(len(alive) / self.factor)))]
+
+        self.results_ = sorted(scores.values(), key=lambda r: (r['round'], r['mean_score']), reverse=True)
+        best = self.results_[0]
+        self.best_params_ = best['params']
+        self.best_score_ = best['mean_score']
+        self.best_estimator_ = clone(self.pipeline).set_params(
+            **{f'clf__{k}': v for k, v in self.best_params_.items()}
+        ).fit(X, y)
+        return self
+
+    def write_leaderboard(self, path):
+        """CSV of every candidate: accuracy against fit and per-sample predict time"""
+        fieldnames = ['rank', 'mean_score', 'std_score', 'mean_fit_time', 'mean_predict_time',
+                      'round', 'n_samples', 'params']
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for rank, result in enumerate(self.results_, 1):
+                row = dict(result, rank=rank, params=json.dumps(result['params'], default=str))
+                writer.writerow(row)
+        print(f"Leaderboard written to {path}")
@@ -0,0 +1,166 @@
+"""
+Keyword taxonomy for ResQ Connect
+Versioned disaster keyword tables loaded from JSON, compiled into a matcher
+and hot-swapped by a background watcher when the file changes
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from text_normalization import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+def validate_taxonomy(data):
+    """Raise ValueError unless `data` is {version, disaster_patterns, urgency_keywords}"""
+    if not isinstance(data, dict):
+        raise ValueError("taxonomy must be a JSON object")
+    if not isinstance(data.get('version'), str) or not data['version'].strip():
+        raise ValueError("taxonomy needs a non-empty 'version' string")
+
+    patterns = data.get('disaster_patterns')
+    if not isinstance(patterns, dict) or not patterns:
+        raise ValueError("'disaster_patterns' must be a non-empty object")
+    for category, entry in patterns.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"{category}: expected an object")
+        keywords = entry.get('keywords')
+        if not isinstance(keywords, list) or not keywords or not all(isinstance(k, str) and k.strip() for k in keywords):
+            raise ValueError(f"{category}: 'keywords' must be a non-empty list of strings")
+        urgent = entry.get('urgent_keywords', [])
+        if not isinstance(urgent, list) or not all(isinstance(k, str) and k.strip() for k in urgent):
+            raise ValueError(f"{category}: 'urgent_keywords' must be a list of strings")
+        score = entry.get('base_score')
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+            raise ValueError(f"{category}: 'base_score' must be a number between 0 and 100")
+
+    urgency = data.get('urgency_keywords', [])
+    if not isinstance(urgency, list) or not all(isinstance(k, str) and k.strip() for k in urgency):
+        raise ValueError("'urgency_keywords' must be a list of strings")
+
+
+class KeywordTaxonomy:
+    """
+    One immutable taxonomy version with its compiled matcher.
+
+    Services read the current instance once per request, so a swap never
+    mixes tables and matcher from different versions.
+    """
+
+    def __init__(self, version, disaster_patterns, urgency_keywords, source='builtin'):
+        start = time.perf_counter()
+        self.version = version
+        self.source = source
+        self.disaster_patterns = disaster_patterns
+        self.urgency_keywords = urgency_keywords
+        self.categories = list(disaster_patterns)
+
+        # One token-based matcher over every keyword list
+        groups = {'urgency': urgency_keywords}
+        for disaster_type, data in disaster_patterns.items():
+            groups[(disaster_type, 'keywords')] = data['keywords']
+            groups[(disaster_type, 'urgent_keywords')] = data.get('urgent_keywords', [])
+        self.matcher = KeywordMatcher(groups)
+        self.keyword_groups = self.matcher.group_matrix([(c, 'keywords') for c in self.categories])
+        self.urgent_groups = self.matcher.group_matrix([(c, 'urgent_keywords') for c in self.categories])
+        self.urgency_column = self.matcher.group_matrix(['urgency'])
+        self.base_scores = np.array([disaster_patterns[c]['base_score'] for c in self.categories])
+
+        self.built_at = datetime.now(timezone.utc)
+        self.build_ms = (time.perf_counter() - start) * 1000
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        validate_taxonomy(data)
+        return cls(data['version'], data['disaster_patterns'], data.get('urgency_keywords', []),
+                   source=os.path.abspath(path))
+
+    def explain(self, spans):
+        """Matcher spans as [{category, keyword, kind, start, end, match}]; urgency words have no category"""
+        explained = []
+        for key, keyword, start, end, matched in spans:
+            category, kind = key if isinstance(key, tuple) else (None, key)
+            explained.append({
+                'category': category,
+                'keyword': keyword,
+                'kind': {'keywords': 'keyword', 'urgent_keywords': 'urgent'}.get(kind, kind),
+                'start': start,
+                'end': end,
+                'match': matched
+            })
+        return explained
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'source': self.source,
+            'built_at': self.built_at.isoformat(),
+            'build_ms': round(self.build_ms, 3),
+            'categories': len(self.categories),
+            'keywords': len(self.matcher.columns)
+        }
+
+
+class TaxonomyWatcher:
+    """
+    Poll a taxonomy file and call `on_load(taxonomy)` with a freshly built
+    KeywordTaxonomy whenever its mtime or size changes. Invalid files are
+    logged and leave the current taxonomy in place.
+    """
+
+    def __init__(self, path, on_load, interval=5.0):
+        self.path = path
+        self.on_load = on_load
+        self.interval = interval
+        self.last_error = None
+        self.last_checked = None
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def check(self):
+        """Reload if the file changed since the last check; returns True when a new taxonomy was swapped in"""
+        self.last_checked = datetime.now(timezone.utc)
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            taxonomy = KeywordTaxonomy.from_file(self.path)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.error(f"Keyword taxonomy {self.path} not reloaded: {self.last_error}")
+            return False
+        self.last_error = None
+        self.on_load(taxonomy)
+        logger.info(f"Keyword taxonomy {taxonomy.version} loaded in {taxonomy.build_ms:.1f}ms")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='taxonomy-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
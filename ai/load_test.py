@@ -0,0 +1,310 @@
+"""
+Load test for the ResQ Connect /predict endpoint
+Replays a mix of text, image and audio reports at open-loop Poisson arrival
+rates and reports where each modality's throughput stops keeping up
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_UPLOADS = os.path.join(BASE_DIR, '..', 'backend', 'uploads')
+DEFAULT_CORPUS = os.path.join(BASE_DIR, 'Text_Disaster_Prediction', 'disasters')
+
+# Same per-request timeouts the Node backend uses
+TIMEOUTS = {'text': 10.0, 'image': 15.0, 'audio': 15.0}
+MEDIA_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg',
+               '.webm': 'audio/webm', '.wav': 'audio/wav', '.mp3': 'audio/mpeg', '.ogg': 'audio/ogg'}
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+AUDIO_EXTENSIONS = ('.webm', '.wav', '.mp3', '.ogg')
+
+
+def encode_multipart(fields, files):
+    """
+    multipart/form-data body with only the standard library.
+
+    Args:
+        fields: dict of form field name -> str
+        files: dict of field name -> (filename, bytes, content type)
+
+    Returns:
+        (body bytes, content type header)
+    """
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data, content_type) in files.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                   f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode())
+        body.write(data)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def load_corpus(corpus_dir):
+    """Report texts from the text model's training files"""
+    import csv
+
+    texts = []
+    for fname in sorted(os.listdir(corpus_dir)):
+        if fname.endswith('.txt') or fname.endswith('.csv'):
+            with open(os.path.join(corpus_dir, fname), 'r', encoding='utf-8', errors='ignore') as f:
+                texts.extend(row['text'] for row in csv.DictReader(f) if row.get('text'))
+    return texts
+
+
+def _image_variants(data, n_variants, rng):
+    """Re-encode an image with faint noise so each request is a distinct upload"""
+    from PIL import Image
+
+    img = np.asarray(Image.open(io.BytesIO(data)).convert('RGB'), dtype=np.int16)
+    variants = []
+    for _ in range(n_variants):
+        noisy = np.clip(img + rng.integers(-3, 4, img.shape), 0, 255).astype(np.uint8)
+        out = io.BytesIO()
+        Image.fromarray(noisy).save(out, format='PNG')
+        variants.append(out.getvalue())
+    return variants
+
+
+def load_samples(uploads_dir, corpus_dir, unique_images=16, seed=0):
+    """Text, image and audio samples as (modality, filename, payload) pools"""
+    rng = np.random.default_rng(seed)
+    samples = {'text': [('text', None, t) for t in load_corpus(corpus_dir)], 'image': [], 'audio': []}
+
+    for fname in sorted(os.listdir(uploads_dir)):
+        ext = os.path.splitext(fname)[1].lower()
+        with open(os.path.join(uploads_dir, fname), 'rb') as f:
+            data = f.read()
+        if ext in IMAGE_EXTENSIONS:
+            payloads = _image_variants(data, unique_images, rng) if unique_images else [data]
+            samples['image'].extend(('image', fname, p) for p in payloads)
+        elif ext in AUDIO_EXTENSIONS:
+            samples['audio'].append(('audio', fname, data))
+    return samples
+
+
+def build_request(url, sample):
+    """urllib Request shaped like the backend's call for this modality"""
+    modality, filename, payload = sample
+    if modality == 'text':
+        body = urllib.parse.urlencode({'type': 'text', 'text': payload}).encode()
+        content_type = 'application/x-www-form-urlencoded'
+    else:
+        ext = os.path.splitext(filename)[1].lower()
+        body, content_type = encode_multipart(
+            {'type': modality, 'report_id': uuid.uuid4().hex[:24]},
+            {'file': (filename, payload, MEDIA_TYPES.get(ext, 'application/octet-stream'))}
+        )
+    return urllib.request.Request(url, data=body, method='POST', headers={'Content-Type': content_type})
+
+
+def send(url, sample, scheduled):
+    """Send one request; latency is measured from its scheduled arrival time"""
+    modality = sample[0]
+    started = time.perf_counter()
+    error = None
+    try:
+        with urllib.request.urlopen(build_request(url, sample), timeout=TIMEOUTS[modality]) as response:
+            result = json.loads(response.read())
+            if 'error' in result:
+                error = f"service error: {result['error']}"
+    except urllib.error.HTTPError as e:
+        error = f'HTTP {e.code}'
+    except Exception as e:
+        error = type(e).__name__
+    finished = time.perf_counter()
+    return {
+        'modality': modality,
+        'latency': finished - scheduled,
+        'send_lag': started - scheduled,
+        'finished': finished,
+        'error': error
+    }
+
+
+def run_stage(url, samples, mix, rate, duration, max_workers, seed):
+    """
+    Offer `rate` requests/sec for `duration` seconds with Poisson arrivals.
+
+    Arrivals are scheduled up front and sent on time whether or not earlier
+    requests have finished (open loop), so a slow service builds up queueing
+    in the measured latency instead of silently lowering the offered load.
+    """
+    rng = random.Random(seed)
+    modalities = list(mix)
+    weights = [mix[m] for m in modalities]
+
+    arrivals, t = [], rng.expovariate(rate)
+    while t < duration:
+        arrivals.append((t, rng.choices(modalities, weights)[0]))
+        t += rng.expovariate(rate)
+
+    outcomes, futures = [], []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for offset, modality in arrivals:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sample = rng.choice(samples[modality])
+            futures.append(pool.submit(send, url, sample, start + offset))
+        outcomes = [f.result() for f in futures]
+
+    return summarize(outcomes, rate, mix, duration, start)
+
+
+def summarize(outcomes, rate, mix, duration, start):
+    stage = {'offered_rps': rate, 'duration': duration, 'modalities': {}}
+    total_weight = sum(mix.values())
+
+    for modality in list(mix) + ['all']:
+        rows = outcomes if modality == 'all' else [o for o in outcomes if o['modality'] == modality]
+        offered = rate if modality == 'all' else rate * mix[modality] / total_weight
+        ok = [o for o in rows if o['error'] is None]
+        # Completions inside the arrival window; work that drains afterwards is backlog
+        in_window = [o for o in ok if o['finished'] - start <= duration]
+        latencies = np.array([o['latency'] for o in ok]) * 1000
+
+        entry = {
+            'offered_rps': round(offered, 2),
+            'sent': len(rows),
+            'arrival_rps': round(len(rows) / duration, 2),
+            'errors': len(rows) - len(ok),
+            'error_rate': round((len(rows) - len(ok)) / len(rows), 4) if rows else 0.0,
+            'throughput_rps': round(len(in_window) / duration, 2),
+            'max_send_lag_ms': round(max((o['send_lag'] for o in rows), default=0) * 1000, 1)
+        }
+        if len(latencies):
+            entry.update({
+                'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+                'p95_ms': round(float(np.percentile(latencies, 95)), 1),
+                'p99_ms': round(float(np.percentile(latencies, 99)), 1)
+            })
+        errors = {}
+        for o in rows:
+            if o['error']:
+                errors[o['error']] = errors.get(o['error'], 0) + 1
+        if errors:
+            entry['error_kinds'] = errors
+        stage['modalities'][modality] = entry
+    return stage
+
+
+def find_knees(stages, slo_ms, max_error_rate=0.01, min_efficiency=0.9):
+    """
+    Per modality, the highest offered rate that was still served and the
+    first rate where it saturated.
+
+    A stage is saturated when achieved throughput falls below
+    `min_efficiency` of the actual Poisson arrival rate, p99 exceeds the
+    SLO, or the error rate exceeds `max_error_rate`.
+    """
+    knees = {}
+    for modality in stages[0]['modalities']:
+        sustained, knee, reason = None, None, None
+        for stage in stages:
+            entry = stage['modalities'][modality]
+            if not entry['sent']:
+                continue
+            if entry['error_rate'] > max_error_rate:
+                reason = f"error rate {entry['error_rate']:.1%}"
+            elif entry['throughput_rps'] < min_efficiency * entry['arrival_rps']:
+                reason = f"throughput {entry['throughput_rps']} of {entry['arrival_rps']} req/s"
+            elif entry.get('p99_ms', 0) > slo_ms:
+                reason = f"p99 {entry['p99_ms']:.0f}ms over {slo_ms:.0f}ms"
+            if reason:
+                knee = entry['offered_rps']
+                break
+            sustained = entry['offered_rps']
+        knees[modality] = {'max_sustained_rps': sustained, 'knee_rps': knee, 'reason': reason}
+    return knees
+
+
+def print_report(report):
+    for stage in report['stages']:
+        print(f"\nOffered {stage['offered_rps']} req/s")
+        for modality, e in stage['modalities'].items():
+            print(f"  {modality:6s} offered {e['offered_rps']:7.2f}  served {e['throughput_rps']:7.2f} req/s  "
+                  f"p50 {e.get('p50_ms', float('nan')):8.1f}ms  p99 {e.get('p99_ms', float('nan')):8.1f}ms  "
+                  f"errors {e['error_rate']:.1%}")
+
+    print("\nSaturation points:")
+    for modality, knee in report['knees'].items():
+        if knee['knee_rps'] is None:
+            print(f"  {modality:6s} no knee up to {knee['max_sustained_rps']} req/s")
+        else:
+            print(f"  {modality:6s} sustained {knee['max_sustained_rps']} req/s, "
+                  f"knee at {knee['knee_rps']} req/s ({knee['reason']})")
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        modality, weight = item.split('=')
+        if modality not in TIMEOUTS:
+            raise argparse.ArgumentTypeError(f'Unknown modality: {modality}')
+        mix[modality] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load test for the ML service /predict endpoint')
+    parser.add_argument('--url', default='http://localhost:7004/predict')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('text=0.6,image=0.3,audio=0.1'),
+                        help='modality weights, e.g. text=0.6,image=0.3,audio=0.1')
+    parser.add_argument('--rates', default='1,2,5,10,20,40', help='offered req/s per stage')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds per stage')
+    parser.add_argument('--slo-ms', type=float, default=2000.0, help='p99 latency objective')
+    parser.add_argument('--uploads', default=DEFAULT_UPLOADS)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--unique-images', type=int, default=16,
+                        help='noisy copies per image so uploads are not near-duplicates (0 to resend as is)')
+    parser.add_argument('--max-workers', type=int, default=256, help='max requests in flight')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    samples = load_samples(args.uploads, args.corpus, args.unique_images, args.seed)
+    mix = {m: w for m, w in args.mix.items() if w > 0}
+    for modality in mix:
+        if not samples[modality]:
+            parser.error(f'No {modality} samples found')
+    print(f"Samples: {', '.join(f'{m}={len(s)}' for m, s in samples.items())}")
+
+    stages = []
+    for i, rate in enumerate(float(r) for r in args.rates.split(',')):
+        print(f"Stage {i + 1}: {rate} req/s for {args.duration:.0f}s...")
+        stages.append(run_stage(args.url, samples, mix, rate, args.duration, args.max_workers, args.seed + i))
+
+    report = {
+        'meta': {'url': args.url, 'mix': mix, 'started': datetime.now().isoformat(),
+                 'duration_per_stage': args.duration, 'slo_ms': args.slo_ms},
+        'stages': stages,
+        'knees': find_knees(stages, args.slo_ms)
+    }
+    print_report(report)
+
+    output = args.output or os.path.join('benchmarks', f'load_test_{datetime.now():%Y%m%d_%H%M%S}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
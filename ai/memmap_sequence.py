@@ -0,0 +1,45 @@
+"""
+Keras Sequence base for training from memory-mapped arrays
+Only one batch of rows is read into memory at a time
+"""
+
+import numpy as np
+import tensorflow as tf
+
+
+class MemmapSequence(tf.keras.utils.Sequence):
+    """
+    Batches of rows picked from `order`, a permutation of sample indices.
+
+    Subclasses read their arrays with batch_indices() in __getitem__.
+    shuffle_order() reorders the samples at init and after every epoch when
+    `shuffle` is set; override it to use a seeded generator.
+    """
+
+    def __init__(self, order, batch_size=32, shuffle=False, **kwargs):
+        # Keras 3 configures workers/use_multiprocessing on the dataset itself
+        try:
+            super().__init__(**kwargs)
+        except TypeError:
+            super().__init__()
+
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._order = np.array(order)
+        if self.shuffle:
+            self.shuffle_order()
+
+    def __len__(self):
+        return int(np.ceil(len(self._order) / self.batch_size))
+
+    def batch_indices(self, idx):
+        """Sample indices of batch `idx`"""
+        # Sorted reads keep memmap access mostly sequential
+        return np.sort(self._order[idx * self.batch_size:(idx + 1) * self.batch_size])
+
+    def shuffle_order(self):
+        np.random.shuffle(self._order)
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.shuffle_order()
@@ -3,62 +3,147 @@ Unified ML Service for ResQ Connect
 Integrates Text, Image, and Audio disaster classification models
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import numpy as np
 import os
 import json
 import logging
+import uuid
+import time
+import tempfile
 from prediction_tracker import PredictionTracker
+from embedding_index import EmbeddingIndex
+from text_normalization import KeywordMatcher, TfidfFeatures, tokenize
+from text_cascade import TextCascade, keyword_tier, model_tier
+from audio_streaming import AudioStreamRegistry, AudioStreamSession, StreamLimitExceeded
+from service_metrics import (
+    REGISTRY, REQUEST_SECONDS, REQUESTS, IN_FLIGHT, MODEL_LOADED,
+    MODEL_LOAD_SECONDS, FALLBACKS, PREDICTION_PATH, stage, record_stage, record_cache
+)
+from request_tracing import Tracer, current_trace
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Request-ID', 'traceparent'])
+
+# Per-request stage spans; see request_tracing.Tracer.from_env for settings
+tracer = Tracer.from_env()
+tracer.init_app(app, paths=('/predict', '/stream/audio'))
+
+# Keyword evidence for text predictions, matched on tokens (see KeywordMatcher)
+TEXT_KEYWORDS = {
+    'flood': ['submerged', 'underwater', 'flooded', 'flood', 'water', 'river', 'rain', 'overflow'],
+    'earthquake': ['building', 'collapse', 'crack', 'shake', 'tremor', 'seismic', 'quake'],
+    'fire': ['smoke', 'burn', 'flame', 'fire', 'blaze', 'wildfire'],
+    'hurricane': ['wind', 'storm', 'hurricane', 'cyclone', 'typhoon'],
+    'landslide': ['slide', 'mud', 'rock', 'slope', 'debris', 'avalanche'],
+    'tsunami': ['wave', 'tsunami', 'sea', 'ocean', 'coastal'],
+    'accident': ['crash', 'collision', 'accident', 'vehicle', 'train']
+}
+
+FALLBACK_KEYWORDS = {
+    'fire': ['fire', 'burn', 'smoke', 'flame'],
+    'flood': ['flood', 'water', 'submerged', 'underwater'],
+    'earthquake': ['earthquake', 'shake', 'tremor', 'collapse'],
+    'accident': ['accident', 'crash', 'collision']
+}
+
+# resq_prediction_path_total path label for each text cascade tier
+TEXT_TIER_PATHS = {'keyword': 'keyword', 'fast': 'fast_model', 'ensemble': 'model'}
 
 class MLService:
     def __init__(self):
         self.text_model = None
         self.text_vectorizer = None
+        self.text_features = None
+        self.text_keywords = KeywordMatcher(TEXT_KEYWORDS)
+        self.fallback_keywords = KeywordMatcher(FALLBACK_KEYWORDS)
+        self.text_fast_model = None
+        self.text_cascade = None
         self.image_model = None
         self.image_class_names = None
+        self.image_backbone = None
+        self.image_head = None
+        self.image_index = EmbeddingIndex()
+        self.duplicate_threshold = float(os.environ.get('IMAGE_DUPLICATE_THRESHOLD', 0.95))
         self.audio_model = None
         self.audio_preprocessor = None
+        self.audio_scaler = None
+        self.audio_streamer = None
         self.models_loaded = False
         
     def load_models(self):
         """Load all trained models"""
         try:
             # Text Model
+            start = time.perf_counter()
             try:
                 import joblib
                 self.text_model = joblib.load('Text_Disaster_Prediction/disaster_model_FINAL.pkl')
                 self.text_vectorizer = joblib.load('Text_Disaster_Prediction/vectorizer_FINAL.pkl')
+                self.text_features = TfidfFeatures(self.text_vectorizer)
+                self._record_model_load('text', start, True)
                 logger.info("✓ Text model loaded successfully")
             except Exception as e:
+                self._record_model_load('text', start, False)
                 logger.warning(f"Text model not loaded: {e}")
             
+            # Distilled fast text model (optional, see distill_model.py)
+            start = time.perf_counter()
+            try:
+                import joblib
+                self.text_fast_model = joblib.load('Text_Disaster_Prediction/disaster_model_FAST.pkl')
+                self._record_model_load('text_fast', start, True)
+                logger.info("✓ Fast text model loaded successfully")
+            except Exception as e:
+                self._record_model_load('text_fast', start, False)
+                logger.info(f"Fast text model not loaded, using the ensemble only: {e}")
+            
+            if self.text_model is not None:
+                try:
+                    self.text_cascade = self._build_text_cascade()
+                    logger.info(f"✓ Text cascade: {' -> '.join(self.text_cascade.order)}")
+                except Exception as e:
+                    logger.warning(f"Text cascade not configured, using keyword fallback: {e}")
+            
             # Image Model
+            start = time.perf_counter()
             try:
                 from tensorflow import keras
                 self.image_model = keras.models.load_model('nischal major project/disaster_mobilenet.h5')
                 with open('nischal major project/class_names.json', 'r') as f:
                     self.image_class_names = json.load(f)
+                self._split_image_model()
+                self._record_model_load('image', start, True)
                 logger.info("✓ Image model loaded successfully")
             except Exception as e:
+                self._record_model_load('image', start, False)
                 logger.warning(f"Image model not loaded: {e}")
             
             # Audio Model
+            start = time.perf_counter()
             try:
                 import tensorflow as tf
                 self.audio_model = tf.keras.models.load_model('saved_models/cnn_model.h5')
                 from audio_preprocessor import AudioPreprocessor
                 self.audio_preprocessor = AudioPreprocessor()
                 self.audio_preprocessor.load_preprocessor('saved_models/label_encoder.pkl')
+                from audio_streaming import StreamingAudioClassifier
+                self.audio_streamer = StreamingAudioClassifier(
+                    self.audio_model,
+                    self.audio_preprocessor.label_encoder,
+                    sample_rate=self.audio_preprocessor.sample_rate,
+                    window_seconds=self.audio_preprocessor.duration,
+                    pooling=os.environ.get('AUDIO_WINDOW_POOLING', 'mean')
+                )
+                self._record_model_load('audio', start, True)
                 logger.info("✓ Audio model loaded successfully")
             except Exception as e:
+                self._record_model_load('audio', start, False)
                 logger.warning(f"Audio model not loaded: {e}")
             
             self.models_loaded = True
@@ -68,81 +153,174 @@ class MLService:
             logger.error(f"Error loading models: {e}")
             self.models_loaded = False
     
-    def predict_text(self, text):
-        """Predict disaster type from text"""
-        if not self.text_model or not self.text_vectorizer:
-            return self._fallback_text_prediction(text)
+    def _record_model_load(self, model, start, loaded):
+        MODEL_LOADED.set(1 if loaded else 0, model=model)
+        if loaded:
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model=model)
+    
+    def _build_text_cascade(self):
+        """Keyword -> fast model -> ensemble tiers; see text_cascade.load_cascade_config"""
+        def staged(name, run):
+            def timed(context):
+                with stage('text', name):
+                    return run(context)
+            return timed
+        
+        tiers = {
+            'keyword': staged('keyword_match', keyword_tier(self.text_keywords)),
+            'ensemble': staged('inference', model_tier(self.text_model))
+        }
+        if self.text_fast_model is not None:
+            tiers['fast'] = staged('fast_inference', model_tier(self.text_fast_model, margin=True))
+        return TextCascade(tiers)
+    
+    def text_context(self, text):
+        """Per-message cascade context: tokens plus a TF-IDF row computed at most once"""
+        with stage('text', 'tokenize'):
+            tokenized = tokenize(text)
+        features = []
+        
+        def get_features():
+            if not features:
+                with stage('text', 'vectorize'):
+                    features.append(self.text_features.transform([tokenized]))
+            return features[0]
+        
+        return {'tokenized': tokenized, 'features': get_features}
+    
+    def predict_text(self, text, explain=False):
+        """
+        Predict disaster type from text
+        
+        With explain=True the result also lists the keyword occurrences
+        ('explain') found by the keyword tier's scan of the message.
+        """
+        context = self.text_context(text)
+        if not context['tokenized'].tokens:
+            # Empty or punctuation-only message: nothing to classify
+            result = {'disaster_type': 'Unknown', 'danger_score': 0, 'confidence': 0.0, 'tags': ['text', 'empty']}
+            if explain:
+                result['explain'] = []
+            return result
+        
+        if not self.text_model or not self.text_vectorizer or self.text_cascade is None:
+            FALLBACKS.inc(modality='text', reason='model_unavailable')
+            return self._fallback_text_prediction(context['tokenized'], explain)
         
         try:
-            # Enhanced keyword detection
-            text_lower = text.lower().strip()
-            
-            keywords = {
-                'flood': ['submerged', 'underwater', 'flooded', 'flood', 'water', 'river', 'rain', 'overflow'],
-                'earthquake': ['building', 'collapse', 'crack', 'shake', 'tremor', 'seismic', 'quake'],
-                'fire': ['smoke', 'burn', 'flame', 'fire', 'blaze', 'wildfire'],
-                'hurricane': ['wind', 'storm', 'hurricane', 'cyclone', 'typhoon'],
-                'landslide': ['slide', 'mud', 'rock', 'slope', 'debris', 'avalanche'],
-                'tsunami': ['wave', 'tsunami', 'sea', 'ocean', 'coastal'],
-                'accident': ['crash', 'collision', 'accident', 'vehicle', 'train']
-            }
-            
-            # Check for strong keyword matches
-            best_match = None
-            max_matches = 0
-            
-            for disaster, words in keywords.items():
-                matches = sum(1 for word in words if word in text_lower)
-                if matches > max_matches:
-                    max_matches = matches
-                    best_match = disaster
+            tier, decision = self.text_cascade.predict(context)
+            PREDICTION_PATH.inc(modality='text', path=TEXT_TIER_PATHS.get(tier, 'unclassified'))
             
+            if tier is None:
+                # No tier had a label (e.g. keyword-only cascade, no keyword matched)
+                result = {'disaster_type': 'Unknown', 'danger_score': 70, 'confidence': 0.5, 'tags': ['text', 'unclassified']}
             # Use keyword match if strong
-            if max_matches >= 2:
+            elif tier == 'keyword':
+                best_match, max_matches = decision['label'], decision['matches']
                 danger_score = min(95, 70 + (max_matches * 5))
-                return {
+                result = {
                     'disaster_type': best_match.title(),
                     'danger_score': danger_score,
                     'confidence': 0.90,
                     'tags': [best_match, 'urgent'] if danger_score > 80 else [best_match]
                 }
+            else:
+                prediction, probability = decision['label'], decision['confidence']
+                
+                # Calculate danger score based on disaster type and confidence
+                danger_score = int(probability * 100)
+                if prediction.lower() in ['fire', 'earthquake', 'tsunami', 'flood']:
+                    danger_score = min(95, danger_score + 15)
+                
+                result = {
+                    'disaster_type': prediction.title(),
+                    'danger_score': danger_score,
+                    'confidence': float(probability),
+                    'tags': [prediction.lower(), 'ml_classified']
+                }
             
-            # Use ML model
-            text_vec = self.text_vectorizer.transform([text])
-            prediction = self.text_model.predict(text_vec)[0]
-            probability = self.text_model.predict_proba(text_vec)[0].max()
-            
-            # Calculate danger score based on disaster type and confidence
-            danger_score = int(probability * 100)
-            if prediction.lower() in ['fire', 'earthquake', 'tsunami', 'flood']:
-                danger_score = min(95, danger_score + 15)
-            
-            return {
-                'disaster_type': prediction.title(),
-                'danger_score': danger_score,
-                'confidence': float(probability),
-                'tags': [prediction.lower(), 'ml_classified']
-            }
+            if explain:
+                spans = context.get('keyword_spans')
+                if spans is None:
+                    # Keyword tier not configured: scan the already tokenized text
+                    spans = self.text_keywords.match_spans(context['tokenized'])[1]
+                result['explain'] = _explain_spans(spans)
+            return result
             
         except Exception as e:
             logger.error(f"Text prediction error: {e}")
-            return self._fallback_text_prediction(text)
+            FALLBACKS.inc(modality='text', reason='error')
+            return self._fallback_text_prediction(context['tokenized'], explain)
+    
+    def _split_image_model(self):
+        """Split the image model at its pooling layer into backbone and head"""
+        from tensorflow import keras
+        
+        try:
+            layer_names = [layer.__class__.__name__ for layer in self.image_model.layers]
+            pool_idx = layer_names.index('GlobalAveragePooling2D')
+            pool_layer = self.image_model.layers[pool_idx]
+            
+            self.image_backbone = keras.Model(self.image_model.inputs, pool_layer.output)
+            
+            # The layers after pooling form a plain chain (dropout/dense)
+            head_input = keras.Input(shape=pool_layer.output.shape[1:])
+            x = head_input
+            for layer in self.image_model.layers[pool_idx + 1:]:
+                x = layer(x)
+            self.image_head = keras.Model(head_input, x)
+            logger.info("✓ Image embedding model ready for duplicate detection")
+        except Exception as e:
+            self.image_backbone = None
+            self.image_head = None
+            logger.warning(f"Image embeddings unavailable: {e}")
     
-    def predict_image(self, image_path):
-        """Predict disaster type from image"""
+    def predict_image(self, image_path, report_id=None, include_embedding=False):
+        """
+        Predict disaster type from image
+        
+        When the model exposes pooled embeddings, the upload is first compared
+        with recent reports; a near-duplicate reuses that report's result and
+        skips the classification head.
+        """
         if not self.image_model:
+            FALLBACKS.inc(modality='image', reason='model_unavailable')
             return {'disaster_type': 'Unknown', 'danger_score': 70, 'confidence': 0.5, 'tags': ['image', 'unclassified']}
         
         try:
             from tensorflow.keras.preprocessing import image
             from PIL import Image
             
-            img = Image.open(image_path).convert('RGB')
-            img = img.resize((224, 224))
-            img_array = image.img_to_array(img) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
+            with stage('image', 'decode'):
+                img = Image.open(image_path).convert('RGB')
+                img = img.resize((224, 224))
+                img_array = image.img_to_array(img) / 255.0
+                img_array = np.expand_dims(img_array, axis=0)
+            
+            embedding = None
+            if self.image_backbone is not None:
+                with stage('image', 'embedding'):
+                    embedding = self.image_backbone.predict(img_array, verbose=0)[0]
+                with stage('image', 'dedup_lookup'):
+                    duplicate = self.image_index.find_duplicate(embedding, self.duplicate_threshold)
+                record_cache('image_dedup', duplicate is not None)
+                if duplicate is not None:
+                    PREDICTION_PATH.inc(modality='image', path='near_duplicate')
+                    original_id, similarity, original_result = duplicate
+                    result = dict(original_result)
+                    result['tags'] = list(original_result['tags']) + ['near_duplicate']
+                    result['duplicate_of'] = original_id
+                    result['similarity'] = round(similarity, 4)
+                    if include_embedding:
+                        result['embedding'] = embedding.tolist()
+                    return result
+                with stage('image', 'inference'):
+                    predictions = self.image_head.predict(embedding[np.newaxis], verbose=0)[0]
+            else:
+                with stage('image', 'inference'):
+                    predictions = self.image_model.predict(img_array, verbose=0)[0]
+            PREDICTION_PATH.inc(modality='image', path='model')
             
-            predictions = self.image_model.predict(img_array, verbose=0)[0]
             predicted_idx = np.argmax(predictions)
             predicted_class = self.image_class_names[predicted_idx]
             confidence = float(predictions[predicted_idx])
@@ -152,93 +330,190 @@ class MLService:
             if predicted_class.lower() in ['wildfire', 'earthquake', 'tsunami', 'flood']:
                 danger_score = min(95, danger_score + 10)
             
-            return {
+            result = {
                 'disaster_type': predicted_class.title(),
                 'danger_score': danger_score,
                 'confidence': confidence,
                 'tags': ['image', predicted_class.lower()]
             }
             
+            if embedding is not None:
+                with stage('image', 'index_add'):
+                    self.image_index.add(report_id or f'upload-{uuid.uuid4().hex[:12]}', embedding, dict(result))
+                if include_embedding:
+                    result['embedding'] = embedding.tolist()
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Image prediction error: {e}")
+            FALLBACKS.inc(modality='image', reason='error')
             return {'disaster_type': 'Unknown', 'danger_score': 70, 'confidence': 0.5, 'tags': ['image', 'error']}
     
     def predict_audio(self, audio_path):
         """Predict disaster type from audio"""
         if not self.audio_model or not self.audio_preprocessor:
+            FALLBACKS.inc(modality='audio', reason='model_unavailable')
             return {'disaster_type': 'Unknown', 'danger_score': 75, 'confidence': 0.5, 'tags': ['audio', 'unclassified']}
         
         try:
             import joblib
             
-            # Extract features
-            features = self.audio_preprocessor.extract_features(audio_path)
-            if features is None:
-                raise Exception("Feature extraction failed")
-            
-            # Prepare feature vector
-            feature_vector = []
-            feature_vector.extend(features['mfcc_mean'])
-            feature_vector.extend(features['mfcc_std'])
-            feature_vector.append(features['spectral_centroid_mean'])
-            feature_vector.append(features['spectral_centroid_std'])
-            feature_vector.append(features['spectral_rolloff_mean'])
-            feature_vector.append(features['spectral_rolloff_std'])
-            feature_vector.append(features['zcr_mean'])
-            feature_vector.append(features['zcr_std'])
-            feature_vector.extend(features['chroma_mean'])
-            feature_vector.extend(features['chroma_std'])
-            
-            # Load scaler and predict
-            scaler = joblib.load('saved_models/scaler.pkl')
-            traditional_features = scaler.transform([feature_vector])
-            
-            mel_spec = features['mel_spec']
-            mel_features = mel_spec.reshape(1, mel_spec.shape[0], mel_spec.shape[1], 1)
-            
-            prediction = self.audio_model.predict(mel_features, verbose=0)
-            predicted_class = np.argmax(prediction, axis=1)[0]
-            confidence = float(np.max(prediction))
-            
-            class_name = self.audio_preprocessor.label_encoder.inverse_transform([predicted_class])[0]
+            streamed = self._predict_audio_windows(audio_path)
+            if streamed is not None:
+                PREDICTION_PATH.inc(modality='audio', path='windowed')
+                class_name = streamed['class_name']
+                confidence = streamed['confidence']
+                tags = ['audio', class_name.lower(), 'windowed']
+            else:
+                # Extract features
+                with stage('audio', 'feature_extraction'):
+                    features = self.audio_preprocessor.extract_features(audio_path)
+                if features is None:
+                    raise Exception("Feature extraction failed")
+                logger.debug(f"Audio ingest timings: {features['timings']}")
+                record_stage('audio', 'decode', features['timings']['decode_ms'] / 1000)
+                record_stage('audio', 'resample', features['timings']['resample_ms'] / 1000)
+                
+                # Prepare feature vector
+                feature_vector = []
+                feature_vector.extend(features['mfcc_mean'])
+                feature_vector.extend(features['mfcc_std'])
+                feature_vector.append(features['spectral_centroid_mean'])
+                feature_vector.append(features['spectral_centroid_std'])
+                feature_vector.append(features['spectral_rolloff_mean'])
+                feature_vector.append(features['spectral_rolloff_std'])
+                feature_vector.append(features['zcr_mean'])
+                feature_vector.append(features['zcr_std'])
+                feature_vector.extend(features['chroma_mean'])
+                feature_vector.extend(features['chroma_std'])
+                
+                # Scale features; the scaler is loaded once and reused
+                record_cache('audio_scaler', self.audio_scaler is not None)
+                if self.audio_scaler is None:
+                    self.audio_scaler = joblib.load('saved_models/scaler.pkl')
+                traditional_features = self.audio_scaler.transform([feature_vector])
+                
+                mel_spec = features['mel_spec']
+                mel_features = mel_spec.reshape(1, mel_spec.shape[0], mel_spec.shape[1], 1)
+                
+                with stage('audio', 'inference'):
+                    prediction = self.audio_model.predict(mel_features, verbose=0)
+                PREDICTION_PATH.inc(modality='audio', path='model')
+                predicted_class = np.argmax(prediction, axis=1)[0]
+                confidence = float(np.max(prediction))
+                
+                class_name = self.audio_preprocessor.label_encoder.inverse_transform([predicted_class])[0]
+                tags = ['audio', class_name.lower()]
             
             danger_score = int(confidence * 100)
             if class_name.lower() in ['explosion', 'fire', 'earthquake']:
                 danger_score = min(95, danger_score + 15)
             
-            return {
+            result = {
                 'disaster_type': class_name.title(),
                 'danger_score': danger_score,
                 'confidence': confidence,
-                'tags': ['audio', class_name.lower()]
+                'tags': tags
             }
+            if streamed is not None:
+                result['windows'] = streamed['n_windows']
+            return result
             
         except Exception as e:
             logger.error(f"Audio prediction error: {e}")
+            FALLBACKS.inc(modality='audio', reason='error')
             return {'disaster_type': 'Unknown', 'danger_score': 75, 'confidence': 0.5, 'tags': ['audio', 'error']}
     
-    def _fallback_text_prediction(self, text):
+    def _predict_audio_windows(self, audio_path):
+        """
+        Classify recordings longer than one window over overlapping windows.
+        
+        Returns None for short clips and for formats soundfile cannot stream
+        (e.g. webm), which go through the single-window path instead.
+        """
+        if self.audio_streamer is None:
+            return None
+        
+        try:
+            import soundfile as sf
+            info = sf.info(audio_path)
+        except Exception:
+            return None
+        
+        if info.duration <= self.audio_preprocessor.duration:
+            return None
+        with stage('audio', 'windowed_inference'):
+            return self.audio_streamer.classify_file(audio_path)
+    
+    def _fallback_text_prediction(self, text, explain=False):
         """Fallback prediction when model is not loaded"""
-        text_lower = text.lower()
+        matched, spans = self.fallback_keywords.match_spans(text, spans=explain)
         
         # Simple keyword-based classification
-        if any(word in text_lower for word in ['fire', 'burn', 'smoke', 'flame']):
-            return {'disaster_type': 'Fire', 'danger_score': 85, 'confidence': 0.75, 'tags': ['fire', 'keyword']}
-        elif any(word in text_lower for word in ['flood', 'water', 'submerged', 'underwater']):
-            return {'disaster_type': 'Flood', 'danger_score': 90, 'confidence': 0.80, 'tags': ['flood', 'keyword']}
-        elif any(word in text_lower for word in ['earthquake', 'shake', 'tremor', 'collapse']):
-            return {'disaster_type': 'Earthquake', 'danger_score': 95, 'confidence': 0.85, 'tags': ['earthquake', 'keyword']}
-        elif any(word in text_lower for word in ['accident', 'crash', 'collision']):
-            return {'disaster_type': 'Accident', 'danger_score': 70, 'confidence': 0.70, 'tags': ['accident', 'keyword']}
+        if 'fire' in matched:
+            result = {'disaster_type': 'Fire', 'danger_score': 85, 'confidence': 0.75, 'tags': ['fire', 'keyword']}
+        elif 'flood' in matched:
+            result = {'disaster_type': 'Flood', 'danger_score': 90, 'confidence': 0.80, 'tags': ['flood', 'keyword']}
+        elif 'earthquake' in matched:
+            result = {'disaster_type': 'Earthquake', 'danger_score': 95, 'confidence': 0.85, 'tags': ['earthquake', 'keyword']}
+        elif 'accident' in matched:
+            result = {'disaster_type': 'Accident', 'danger_score': 70, 'confidence': 0.70, 'tags': ['accident', 'keyword']}
         else:
-            return {'disaster_type': 'Emergency', 'danger_score': 75, 'confidence': 0.60, 'tags': ['general', 'keyword']}
+            result = {'disaster_type': 'Emergency', 'danger_score': 75, 'confidence': 0.60, 'tags': ['general', 'keyword']}
+        if explain:
+            result['explain'] = _explain_spans(spans)
+        return result
+
+def _explain_spans(spans):
+    """Matcher spans as [{category, keyword, kind, start, end, match}] (offsets into the submitted text)"""
+    return [
+        {'category': category, 'keyword': keyword, 'kind': 'keyword', 'start': start, 'end': end, 'match': matched}
+        for category, keyword, start, end, matched in spans
+    ]
 
 # Initialize service
 ml_service = MLService()
 ml_service.load_models()
 
-# Initialize prediction tracker
-tracker = PredictionTracker()
+# Initialize prediction tracker (PREDICTIONS_DB_PATH lets tools keep it off the shared database)
+tracker = PredictionTracker(os.environ.get('PREDICTIONS_DB_PATH', 'predictions.db'))
+
+# Open live audio streams; per-chunk and per-stream caps on pushed PCM bytes
+audio_streams = AudioStreamRegistry()
+STREAM_MAX_CHUNK_BYTES = int(os.environ.get('AUDIO_STREAM_MAX_CHUNK_BYTES', 1024 * 1024))
+STREAM_MAX_SESSION_BYTES = int(os.environ.get('AUDIO_STREAM_MAX_SESSION_BYTES', 64 * 1024 * 1024))
+
+def _save_upload(file, default_suffix):
+    """Save an uploaded file to a unique temp path (concurrent requests must not share one)"""
+    suffix = os.path.splitext(file.filename or '')[1] or default_suffix
+    fd, temp_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    file.save(temp_path)
+    return temp_path
+
+@app.before_request
+def _start_request_metrics():
+    if request.path == '/predict':
+        g.metrics_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+@app.after_request
+def _record_request_metrics(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        modality = request.form.get('type', 'text')
+        REQUEST_SECONDS.observe(time.perf_counter() - start, modality=modality)
+        REQUESTS.inc(modality=modality, status=response.status_code)
+        g.metrics_done = True
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    if request.path == '/predict':
+        IN_FLIGHT.dec()
+        if exc is not None and not g.get('metrics_done'):
+            REQUESTS.inc(modality=request.form.get('type', 'text'), status=500)
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -256,17 +531,27 @@ def predict():
     """Unified prediction endpoint"""
     try:
         content_type = request.form.get('type', 'text')
+        trace = current_trace()
+        if trace is not None:
+            trace.attributes['modality'] = content_type
+            if request.form.get('report_id'):
+                trace.attributes['report_id'] = request.form['report_id']
         
         if content_type == 'text':
             text = request.form.get('text', '')
             if not text:
                 return jsonify({'error': 'No text provided'}), 400
             
-            result = ml_service.predict_text(text)
+            # Spans are always stored with the prediction; returned only on request
+            result = ml_service.predict_text(text, explain=True)
+            explain = result.pop('explain', None)
             
             # Log prediction
-            tracker.log_prediction('text', result, text)
+            with stage('text', 'tracker_write'):
+                tracker.log_prediction('text', result, text, explain=explain)
             
+            if request.form.get('explain', '').lower() in ('1', 'true', 'yes'):
+                result['explain'] = explain
             return jsonify(result)
         
         elif content_type == 'image':
@@ -274,16 +559,22 @@ def predict():
                 return jsonify({'error': 'No image file provided'}), 400
             
             file = request.files['file']
-            temp_path = 'temp_image.jpg'
-            file.save(temp_path)
+            with stage('image', 'upload_read'):
+                temp_path = _save_upload(file, '.jpg')
             
-            result = ml_service.predict_image(temp_path)
+            try:
+                result = ml_service.predict_image(
+                    temp_path,
+                    report_id=request.form.get('report_id'),
+                    include_embedding=request.form.get('include_embedding', '').lower() in ('1', 'true', 'yes')
+                )
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
             
             # Log prediction
-            tracker.log_prediction('image', result, f'Image: {file.filename}')
-            
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            with stage('image', 'tracker_write'):
+                tracker.log_prediction('image', result, f'Image: {file.filename}')
             
             return jsonify(result)
         
@@ -292,16 +583,18 @@ def predict():
                 return jsonify({'error': 'No audio file provided'}), 400
             
             file = request.files['file']
-            temp_path = 'temp_audio.wav'
-            file.save(temp_path)
+            with stage('audio', 'upload_read'):
+                temp_path = _save_upload(file, '.wav')
             
-            result = ml_service.predict_audio(temp_path)
+            try:
+                result = ml_service.predict_audio(temp_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
             
             # Log prediction
-            tracker.log_prediction('audio', result, f'Audio: {file.filename}')
-            
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            with stage('audio', 'tracker_write'):
+                tracker.log_prediction('audio', result, f'Audio: {file.filename}')
             
             return jsonify(result)
         
@@ -312,6 +605,91 @@ def predict():
         logger.error(f"Prediction error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/stream/audio', methods=['POST'])
+def open_audio_stream():
+    """
+    Open a live audio stream
+    
+    Parameters (form or JSON): sample_rate (default 22050) and encoding of the
+    mono little-endian PCM frames ('float32' or 'int16').
+    """
+    if ml_service.audio_streamer is None:
+        return jsonify({'error': 'Audio model not loaded'}), 503
+    
+    try:
+        params = request.get_json(silent=True) or request.form
+        session = AudioStreamSession(
+            ml_service.audio_streamer,
+            sample_rate=int(params.get('sample_rate', 22050)),
+            encoding=params.get('encoding', 'float32'),
+            max_bytes=STREAM_MAX_SESSION_BYTES
+        )
+        stream_id = audio_streams.open(session)
+        return jsonify({'stream_id': stream_id, 'window_seconds': ml_service.audio_streamer.window_seconds,
+                        'hop_seconds': ml_service.audio_streamer.hop_seconds})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 429
+
+@app.route('/stream/audio/<stream_id>', methods=['POST'])
+def push_audio_stream(stream_id):
+    """Append raw PCM bytes (request body); returns a classification per completed hop"""
+    session = audio_streams.get(stream_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    
+    if request.content_length is not None and request.content_length > STREAM_MAX_CHUNK_BYTES:
+        return jsonify({'error': f'Chunks are limited to {STREAM_MAX_CHUNK_BYTES} bytes'}), 413
+    
+    try:
+        # Bounded read: chunked uploads have no Content-Length to check up front
+        data = request.stream.read(STREAM_MAX_CHUNK_BYTES + 1)
+        if len(data) > STREAM_MAX_CHUNK_BYTES:
+            return jsonify({'error': f'Chunks are limited to {STREAM_MAX_CHUNK_BYTES} bytes'}), 413
+        updates = session.push(data)
+        return jsonify({'stream_id': stream_id, 'updates': updates})
+    except StreamLimitExceeded as e:
+        return jsonify({'error': str(e)}), 413
+    except Exception as e:
+        logger.error(f"Audio stream error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/stream/audio/<stream_id>/end', methods=['POST'])
+def close_audio_stream(stream_id):
+    """Flush and close a stream; returns the pooled prediction for the whole recording"""
+    session = audio_streams.close(stream_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    
+    try:
+        updates, summary = session.finish()
+        if summary is None:
+            return jsonify({'stream_id': stream_id, 'updates': updates, 'result': None})
+        
+        class_name = summary['class_name']
+        danger_score = int(summary['confidence'] * 100)
+        if class_name.lower() in ['explosion', 'fire', 'earthquake']:
+            danger_score = min(95, danger_score + 15)
+        
+        result = {
+            'disaster_type': class_name.title(),
+            'danger_score': danger_score,
+            'confidence': summary['confidence'],
+            'tags': ['audio', class_name.lower(), 'stream'],
+            'windows': summary['n_windows']
+        }
+        tracker.log_prediction('audio', result, f'Audio stream: {stream_id}')
+        return jsonify({'stream_id': stream_id, 'updates': updates, 'result': result})
+    except Exception as e:
+        logger.error(f"Audio stream error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: per-stage latency, model loads, cache hits and fallbacks"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/stats', methods=['GET'])
 def get_statistics():
     """Get prediction statistics"""
@@ -345,6 +723,13 @@ def get_hourly():
         logger.error(f"Hourly stats error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cascade/stats', methods=['GET'])
+def get_cascade_stats():
+    """Text cascade tier order, thresholds, exit rates and latency"""
+    if ml_service.text_cascade is None:
+        return jsonify({'error': 'Text cascade not loaded'}), 503
+    return jsonify(ml_service.text_cascade.stats())
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 7004))
     app.run(host='0.0.0.0', port=port, debug=False)
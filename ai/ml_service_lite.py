@@ -5,8 +5,12 @@ Works without heavy ML dependencies - uses intelligent keyword-based classificat
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import os
 import logging
 import re
+import numpy as np
+from text_normalization import tokenize
+from keyword_taxonomy import KeywordTaxonomy, TaxonomyWatcher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,92 +19,115 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# Built-in taxonomy, used when keyword_taxonomy.json is missing or invalid
+# Comprehensive disaster keywords with severity weights
+DEFAULT_DISASTER_PATTERNS = {
+    'flood': {
+        'keywords': ['flood', 'flooded', 'submerged', 'underwater', 'water', 'river overflow', 
+                    'inundated', 'waterlogged', 'drowning', 'dam burst', 'heavy rain'],
+        'base_score': 85,
+        'urgent_keywords': ['submerged', 'drowning', 'underwater', 'dam burst']
+    },
+    'fire': {
+        'keywords': ['fire', 'burn', 'burning', 'smoke', 'flame', 'blaze', 'wildfire', 
+                    'inferno', 'combustion', 'explosion'],
+        'base_score': 90,
+        'urgent_keywords': ['explosion', 'wildfire', 'trapped', 'burning']
+    },
+    'earthquake': {
+        'keywords': ['earthquake', 'quake', 'tremor', 'shake', 'shaking', 'building collapse', 
+                    'crack', 'seismic', 'aftershock', 'rubble'],
+        'base_score': 95,
+        'urgent_keywords': ['collapse', 'trapped', 'rubble', 'casualties']
+    },
+    'landslide': {
+        'keywords': ['landslide', 'mudslide', 'rockfall', 'avalanche', 'slope failure', 
+                    'debris', 'mud', 'rock slide'],
+        'base_score': 80,
+        'urgent_keywords': ['buried', 'trapped', 'avalanche']
+    },
+    'tsunami': {
+        'keywords': ['tsunami', 'tidal wave', 'sea wave', 'ocean surge', 'coastal flooding'],
+        'base_score': 95,
+        'urgent_keywords': ['tsunami', 'tidal wave']
+    },
+    'cyclone': {
+        'keywords': ['cyclone', 'hurricane', 'typhoon', 'storm', 'tornado', 'wind', 
+                    'tempest', 'gale'],
+        'base_score': 85,
+        'urgent_keywords': ['cyclone', 'hurricane', 'tornado']
+    },
+    'accident': {
+        'keywords': ['accident', 'crash', 'collision', 'vehicle', 'car', 'train', 
+                    'derailment', 'wreck', 'injured'],
+        'base_score': 70,
+        'urgent_keywords': ['casualties', 'injured', 'trapped', 'explosion']
+    },
+    'medical_emergency': {
+        'keywords': ['medical', 'ambulance', 'heart attack', 'unconscious', 'bleeding', 
+                    'injury', 'sick', 'emergency'],
+        'base_score': 75,
+        'urgent_keywords': ['unconscious', 'bleeding', 'heart attack']
+    },
+    'chemical': {
+        'keywords': ['gas leak', 'chemical', 'toxic', 'poison', 'fumes', 'radiation'],
+        'base_score': 88,
+        'urgent_keywords': ['gas leak', 'toxic', 'radiation']
+    }
+}
+
+# Urgency modifiers
+DEFAULT_URGENCY_KEYWORDS = ['urgent', 'emergency', 'help', 'sos', 'immediate', 'critical', 
+                            'dying', 'trapped', 'casualties', 'dead', 'severe']
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keyword_taxonomy.json')
+
 class LightweightMLService:
-    def __init__(self):
-        # Comprehensive disaster keywords with severity weights
-        self.disaster_patterns = {
-            'flood': {
-                'keywords': ['flood', 'flooded', 'submerged', 'underwater', 'water', 'river overflow', 
-                            'inundated', 'waterlogged', 'drowning', 'dam burst', 'heavy rain'],
-                'base_score': 85,
-                'urgent_keywords': ['submerged', 'drowning', 'underwater', 'dam burst']
-            },
-            'fire': {
-                'keywords': ['fire', 'burn', 'burning', 'smoke', 'flame', 'blaze', 'wildfire', 
-                            'inferno', 'combustion', 'explosion'],
-                'base_score': 90,
-                'urgent_keywords': ['explosion', 'wildfire', 'trapped', 'burning']
-            },
-            'earthquake': {
-                'keywords': ['earthquake', 'quake', 'tremor', 'shake', 'shaking', 'building collapse', 
-                            'crack', 'seismic', 'aftershock', 'rubble'],
-                'base_score': 95,
-                'urgent_keywords': ['collapse', 'trapped', 'rubble', 'casualties']
-            },
-            'landslide': {
-                'keywords': ['landslide', 'mudslide', 'rockfall', 'avalanche', 'slope failure', 
-                            'debris', 'mud', 'rock slide'],
-                'base_score': 80,
-                'urgent_keywords': ['buried', 'trapped', 'avalanche']
-            },
-            'tsunami': {
-                'keywords': ['tsunami', 'tidal wave', 'sea wave', 'ocean surge', 'coastal flooding'],
-                'base_score': 95,
-                'urgent_keywords': ['tsunami', 'tidal wave']
-            },
-            'cyclone': {
-                'keywords': ['cyclone', 'hurricane', 'typhoon', 'storm', 'tornado', 'wind', 
-                            'tempest', 'gale'],
-                'base_score': 85,
-                'urgent_keywords': ['cyclone', 'hurricane', 'tornado']
-            },
-            'accident': {
-                'keywords': ['accident', 'crash', 'collision', 'vehicle', 'car', 'train', 
-                            'derailment', 'wreck', 'injured'],
-                'base_score': 70,
-                'urgent_keywords': ['casualties', 'injured', 'trapped', 'explosion']
-            },
-            'medical_emergency': {
-                'keywords': ['medical', 'ambulance', 'heart attack', 'unconscious', 'bleeding', 
-                            'injury', 'sick', 'emergency'],
-                'base_score': 75,
-                'urgent_keywords': ['unconscious', 'bleeding', 'heart attack']
-            },
-            'chemical': {
-                'keywords': ['gas leak', 'chemical', 'toxic', 'poison', 'fumes', 'radiation'],
-                'base_score': 88,
-                'urgent_keywords': ['gas leak', 'toxic', 'radiation']
-            }
-        }
+    def __init__(self, taxonomy_path=None, poll_seconds=None):
+        self.taxonomy_path = taxonomy_path or os.environ.get('KEYWORD_TAXONOMY_PATH', DEFAULT_TAXONOMY_PATH)
+        if poll_seconds is None:
+            poll_seconds = float(os.environ.get('KEYWORD_TAXONOMY_POLL_SECONDS', 5))
         
-        # Urgency modifiers
-        self.urgency_keywords = ['urgent', 'emergency', 'help', 'sos', 'immediate', 'critical', 
-                                'dying', 'trapped', 'casualties', 'dead', 'severe']
+        # Watch from before the first load so no edit in between is missed
+        self.taxonomy_watcher = TaxonomyWatcher(self.taxonomy_path, self._swap_taxonomy, poll_seconds)
+        try:
+            self.taxonomy = KeywordTaxonomy.from_file(self.taxonomy_path)
+        except Exception as e:
+            logger.warning(f"Keyword taxonomy {self.taxonomy_path} not loaded, using built-in tables: {e}")
+            self.taxonomy = KeywordTaxonomy('builtin', DEFAULT_DISASTER_PATTERNS, DEFAULT_URGENCY_KEYWORDS)
         
-        logger.info("✓ Lightweight ML Service initialized")
+        logger.info(f"✓ Lightweight ML Service initialized (taxonomy {self.taxonomy.version})")
     
-    def predict_text(self, text):
-        """Predict disaster type from text using intelligent keyword matching"""
-        text_lower = text.lower().strip()
+    def _swap_taxonomy(self, taxonomy):
+        # A single attribute assignment: requests already running keep the
+        # taxonomy they started with
+        self.taxonomy = taxonomy
+    
+    @property
+    def disaster_patterns(self):
+        return self.taxonomy.disaster_patterns
+    
+    @property
+    def urgency_keywords(self):
+        return self.taxonomy.urgency_keywords
+    
+    def predict_text(self, text, explain=False):
+        """
+        Predict disaster type from text using intelligent keyword matching
+        
+        With explain=True the result also lists every keyword occurrence
+        ('explain'), collected during the same matcher scan.
+        """
+        taxonomy = self.taxonomy
+        matched, spans = taxonomy.matcher.match_spans(tokenize(text), spans=explain)
+        counts = {key: len(phrases) for key, phrases in matched.items()}
         
         # Find matching disasters
         matches = {}
-        for disaster_type, data in self.disaster_patterns.items():
-            score = 0
-            keyword_matches = 0
-            urgent_matches = 0
-            
-            # Count keyword matches
-            for keyword in data['keywords']:
-                if keyword in text_lower:
-                    keyword_matches += 1
-                    score += 10
-            
-            # Count urgent keyword matches
-            for urgent_kw in data.get('urgent_keywords', []):
-                if urgent_kw in text_lower:
-                    urgent_matches += 1
-                    score += 20
+        for disaster_type, data in taxonomy.disaster_patterns.items():
+            keyword_matches = counts.get((disaster_type, 'keywords'), 0)
+            urgent_matches = counts.get((disaster_type, 'urgent_keywords'), 0)
+            score = keyword_matches * 10 + urgent_matches * 20
             
             if keyword_matches > 0:
                 matches[disaster_type] = {
@@ -113,15 +140,18 @@ class LightweightMLService:
         # Determine best match
         if not matches:
             # No specific disaster detected - general emergency
-            urgency_count = sum(1 for kw in self.urgency_keywords if kw in text_lower)
+            urgency_count = counts.get('urgency', 0)
             danger_score = min(95, 60 + (urgency_count * 10))
             
-            return {
+            result = {
                 'disaster_type': 'Emergency',
                 'danger_score': danger_score,
                 'confidence': 0.65,
                 'tags': ['general', 'unclassified']
             }
+            if explain:
+                result['explain'] = taxonomy.explain(spans)
+            return result
         
         # Get disaster with highest score
         best_disaster = max(matches.items(), key=lambda x: x[1]['score'])
@@ -140,7 +170,7 @@ class LightweightMLService:
             danger_score = min(98, danger_score + (match_data['urgent_matches'] * 5))
         
         # Check for general urgency keywords
-        urgency_count = sum(1 for kw in self.urgency_keywords if kw in text_lower)
+        urgency_count = counts.get('urgency', 0)
         if urgency_count >= 2:
             danger_score = min(98, danger_score + 5)
         
@@ -151,12 +181,81 @@ class LightweightMLService:
         if match_data['urgent_matches'] > 0:
             tags.append('urgent')
         
-        return {
+        result = {
             'disaster_type': disaster_type.replace('_', ' ').title(),
             'danger_score': int(danger_score),
             'confidence': round(confidence, 2),
             'tags': tags
         }
+        if explain:
+            result['explain'] = taxonomy.explain(spans)
+        return result
+    
+    def predict_batch(self, texts, explain=False):
+        """
+        Score many messages at once, same schema as predict_text.
+        
+        The matcher builds one sparse hit matrix (messages x keywords); per
+        category keyword/urgent counts come from a matrix product and the
+        score, danger and confidence formulas run as array operations.
+        """
+        taxonomy = self.taxonomy
+        categories = taxonomy.categories
+        spans = [] if explain else None
+        hits = taxonomy.matcher.hit_matrix((tokenize(text) for text in texts), spans=spans)
+        
+        keyword_matches = (hits @ taxonomy.keyword_groups).toarray()
+        urgent_matches = (hits @ taxonomy.urgent_groups).toarray()
+        urgency_count = (hits @ taxonomy.urgency_column).toarray().ravel()
+        base_scores = taxonomy.base_scores
+        
+        # Highest keyword score among matched categories; ties go to the first category
+        score = keyword_matches * 10 + urgent_matches * 20
+        matched = keyword_matches > 0
+        best = np.where(matched, score, -1).argmax(axis=1)
+        rows = np.arange(len(best))
+        best_keywords = keyword_matches[rows, best]
+        best_urgent = urgent_matches[rows, best]
+        
+        # Calculate final danger score
+        danger_score = base_scores[best]
+        # Boost for multiple keyword matches
+        danger_score = np.where(best_keywords >= 3, np.minimum(95, danger_score + 5), danger_score)
+        # Boost for urgent keywords
+        danger_score = np.where(best_urgent > 0, np.minimum(98, danger_score + best_urgent * 5), danger_score)
+        # Check for general urgency keywords
+        danger_score = np.where(urgency_count >= 2, np.minimum(98, danger_score + 5), danger_score)
+        
+        # Calculate confidence based on match quality
+        confidence = np.minimum(0.95, 0.70 + best_keywords * 0.05 + best_urgent * 0.10)
+        
+        # No specific disaster detected - general emergency
+        general_score = np.minimum(95, 60 + urgency_count * 10)
+        
+        results = []
+        for i, any_match in enumerate(matched.any(axis=1)):
+            if not any_match:
+                result = {
+                    'disaster_type': 'Emergency',
+                    'danger_score': int(general_score[i]),
+                    'confidence': 0.65,
+                    'tags': ['general', 'unclassified']
+                }
+            else:
+                disaster_type = categories[best[i]]
+                tags = [disaster_type, 'keyword_match']
+                if best_urgent[i] > 0:
+                    tags.append('urgent')
+                result = {
+                    'disaster_type': disaster_type.replace('_', ' ').title(),
+                    'danger_score': int(danger_score[i]),
+                    'confidence': round(float(confidence[i]), 2),
+                    'tags': tags
+                }
+            if explain:
+                result['explain'] = taxonomy.explain(spans[i])
+            results.append(result)
+        return results
     
     def predict_image(self):
         """Fallback for image prediction"""
@@ -178,6 +277,9 @@ class LightweightMLService:
 
 # Initialize service
 ml_service = LightweightMLService()
+ml_service.taxonomy_watcher.start()
+
+MAX_BATCH_SIZE = int(os.environ.get('LITE_MAX_BATCH_SIZE', 10000))
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -200,9 +302,11 @@ def predict():
             data = request.get_json()
             content_type = data.get('type', 'text')
             text = data.get('text', '')
+            explain = str(data.get('explain', '')).lower() in ('1', 'true', 'yes')
         else:
             content_type = request.form.get('type', 'text')
             text = request.form.get('text', '')
+            explain = request.form.get('explain', '').lower() in ('1', 'true', 'yes')
         
         logger.info(f"Prediction request - Type: {content_type}")
         
@@ -210,7 +314,7 @@ def predict():
             if not text:
                 return jsonify({'error': 'No text provided'}), 400
             
-            result = ml_service.predict_text(text)
+            result = ml_service.predict_text(text, explain=explain)
             logger.info(f"Text prediction: {result['disaster_type']} (score: {result['danger_score']})")
             return jsonify(result)
         
@@ -237,6 +341,34 @@ def predict():
             'error': str(e)
         }), 200  # Return 200 with fallback data
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score a list of texts in one call (e.g. backfilling historical reports)"""
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'Expected JSON {"texts": [...]}'}), 400
+    if len(texts) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} texts per batch'}), 413
+    
+    explain = str(data.get('explain', '')).lower() in ('1', 'true', 'yes')
+    results = ml_service.predict_batch([str(t) if t is not None else '' for t in texts], explain=explain)
+    logger.info(f"Batch text prediction: {len(results)} texts")
+    return jsonify({'results': results})
+
+@app.route('/taxonomy', methods=['GET'])
+def taxonomy():
+    """Active keyword taxonomy version and build time"""
+    watcher = ml_service.taxonomy_watcher
+    info = ml_service.taxonomy.describe()
+    info.update({
+        'path': os.path.abspath(watcher.path),
+        'poll_seconds': watcher.interval,
+        'last_checked': watcher.last_checked.isoformat() if watcher.last_checked else None,
+        'last_error': watcher.last_error
+    })
+    return jsonify(info)
+
 @app.route('/test', methods=['GET'])
 def test():
     """Test endpoint"""
@@ -247,10 +379,10 @@ def test():
         "Car accident on highway"
     ]
     
-    results = []
-    for text in test_cases:
-        result = ml_service.predict_text(text)
-        results.append({'text': text, 'prediction': result})
+    results = [
+        {'text': text, 'prediction': result}
+        for text, result in zip(test_cases, ml_service.predict_batch(test_cases))
+    ]
     
     return jsonify({'test_results': results})
 
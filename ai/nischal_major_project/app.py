@@ -8,18 +8,25 @@ from PIL import Image
 import requests
 from bs4 import BeautifulSoup
 
+from reference_index import ReferenceIndex
+
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
 MODEL_PATH = r"b:\nischal major project\disaster_mobilenet.h5"
 CLASS_NAMES_PATH = r"b:\nischal major project\class_names.json"
 DISASTER_INFO_PATH = r"b:\nischal major project\disaster_info.json"
+# Same default location python reference_index.py writes the index to
+REFERENCE_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference_index.json')
 
 model = keras.models.load_model(MODEL_PATH)
 with open(CLASS_NAMES_PATH, 'r') as f:
     class_names = json.load(f)
-with open(DISASTER_INFO_PATH, 'r') as f:
-    disaster_info = json.load(f)
+
+# Related images and safety info come from the prebuilt local index
+# (python reference_index.py); live image search only runs in the optional
+# background refresher, never on the request path.
+reference_index = ReferenceIndex(REFERENCE_INDEX_PATH, DISASTER_INFO_PATH)
 
 IMG_SIZE = (224, 224)
 
@@ -62,6 +69,10 @@ def get_disaster_images(disaster_type):
     
     return images
 
+REFRESH_INTERVAL = int(os.environ.get('REFERENCE_REFRESH_INTERVAL', 0))
+if REFRESH_INTERVAL > 0:
+    reference_index.start_refresher(get_disaster_images, interval=REFRESH_INTERVAL)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -86,11 +97,9 @@ def predict():
         predicted_class = class_names[predicted_idx]
         confidence = float(predictions[predicted_idx])
         
-        # Get disaster information
-        disaster_data = disaster_info.get(predicted_class, {})
-        
-        # Get related images
-        related_images = get_disaster_images(predicted_class)
+        # Get disaster information and related images
+        disaster_data = reference_index.get(predicted_class)
+        related_images = reference_index.related_images(predicted_class)
         
         results = {
             'predicted_class': predicted_class,
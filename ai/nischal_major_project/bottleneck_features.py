@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from data_pipeline import make_dataset, build_augmentation
+
+EMBEDDING_DIM = 1280
+
+
+def build_head(num_classes, input_dim=EMBEDDING_DIM):
+    """Classifier head used on top of the pooled MobileNetV2 features"""
+    inputs = keras.Input(shape=(input_dim,))
+    x = layers.Dropout(0.3)(inputs)
+    x = layers.Dense(256, activation='relu', name='head_dense')(x)
+    x = layers.Dropout(0.2)(x)
+    outputs = layers.Dense(num_classes, activation='softmax', name='predictions')(x)
+    return keras.Model(inputs, outputs, name='bottleneck_head')
+
+
+def transfer_head_weights(head, model, layer_names=('head_dense', 'predictions')):
+    """Copy trained head weights into the matching layers of the full model"""
+    for name in layer_names:
+        model.get_layer(name).set_weights(head.get_layer(name).get_weights())
+
+
+def extract_embeddings(base_model, paths, labels, num_classes, out_prefix, img_size=(224, 224),
+                       batch_size=64, num_views=1, seed=42):
+    """
+    Run the frozen backbone once per image (and per augmented view) and store
+    the pooled embeddings in a memory-mapped .npy file.
+
+    View 0 is the plain image; views 1..num_views-1 are fixed augmented copies,
+    so the head sees augmentation without re-running the backbone every epoch.
+    Existing files are reused when they were built from the same inputs.
+    `num_classes` is the size of the full class list (a split may be empty
+    or miss some classes).
+
+    Returns:
+        embeddings (np.memmap of shape (num_views * N, 1280)), labels (np.ndarray)
+    """
+    emb_path = f'{out_prefix}_embeddings.npy'
+    labels_path = f'{out_prefix}_labels.npy'
+    meta_path = f'{out_prefix}_meta.json'
+    meta = {'num_images': len(paths), 'num_views': num_views,
+            'paths_md5': hashlib.md5('\n'.join(paths).encode('utf-8')).hexdigest(),
+            'img_size': list(img_size), 'seed': seed}
+
+    if os.path.exists(emb_path) and os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            if json.load(f) == meta:
+                print(f"Reusing cached embeddings from {emb_path}")
+                return np.load(emb_path, mmap_mode='r'), np.load(labels_path)
+
+    pooled = keras.Sequential([base_model, layers.GlobalAveragePooling2D()])
+    augmentation = build_augmentation(seed) if num_views > 1 else None
+
+    n = len(paths)
+    embeddings = np.lib.format.open_memmap(
+        emb_path, mode='w+', dtype=np.float32, shape=(num_views * n, EMBEDDING_DIM)
+    )
+    # make_dataset one-hot encodes the labels; only images are needed here
+    ds = make_dataset(paths, labels, num_classes, img_size, batch_size,
+                      training=False, cache_path=None)
+
+    for view in range(num_views):
+        print(f"Extracting embeddings: view {view + 1}/{num_views}")
+        offset = view * n
+        for images, _ in ds:
+            if view > 0:
+                images = augmentation(images, training=True)
+            batch_emb = pooled(images, training=False).numpy()
+            embeddings[offset:offset + len(batch_emb)] = batch_emb
+            offset += len(batch_emb)
+
+    embeddings.flush()
+    all_labels = np.tile(labels, num_views)
+    np.save(labels_path, all_labels)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    return np.load(emb_path, mmap_mode='r'), all_labels
+
+
+def train_head(head, train_emb, train_labels, val_emb, val_labels, num_classes,
+               learning_rate, epochs, class_weights=None, callbacks=None, batch_size=256):
+    """Train the classifier head on precomputed embeddings"""
+    head.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    return head.fit(
+        train_emb, tf.one_hot(train_labels, num_classes),
+        validation_data=(val_emb, tf.one_hot(val_labels, num_classes)),
+        epochs=epochs,
+        batch_size=batch_size,
+        shuffle=True,
+        class_weight=class_weights,
+        callbacks=callbacks
+    )
@@ -0,0 +1,129 @@
+import os
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+
+def split_image_files(data_dir, class_names, validation_split=0.15):
+    """
+    List image files per class and split them into training/validation.
+
+    Mirrors ImageDataGenerator(validation_split=...): inside every class folder
+    the files are sorted and the first `validation_split` fraction goes to
+    validation, so both pipelines see the same split.
+
+    Returns:
+        (train_paths, train_labels), (val_paths, val_labels)
+    """
+    train_paths, train_labels = [], []
+    val_paths, val_labels = [], []
+
+    for class_idx, class_name in enumerate(class_names):
+        class_dir = os.path.join(data_dir, class_name)
+        files = []
+        for root, _, filenames in sorted(os.walk(class_dir, followlinks=True)):
+            for fname in sorted(filenames):
+                if fname.lower().endswith(IMAGE_EXTENSIONS):
+                    files.append(os.path.join(root, fname))
+
+        split_at = int(validation_split * len(files))
+        val_paths.extend(files[:split_at])
+        val_labels.extend([class_idx] * split_at)
+        train_paths.extend(files[split_at:])
+        train_labels.extend([class_idx] * (len(files) - split_at))
+
+    return (train_paths, np.array(train_labels, dtype=np.int32)), \
+           (val_paths, np.array(val_labels, dtype=np.int32))
+
+
+def build_augmentation(seed=None):
+    """Vectorized augmentation applied to whole batches on [0, 1] images"""
+    return keras.Sequential([
+        layers.RandomFlip('horizontal', seed=seed),
+        layers.RandomRotation(20 / 360, fill_mode='nearest', seed=seed),
+        layers.RandomTranslation(0.08, 0.08, fill_mode='nearest', seed=seed),
+        layers.RandomZoom(0.15, fill_mode='nearest', seed=seed),
+        layers.RandomBrightness(0.2, value_range=(0.0, 1.0), seed=seed),
+    ], name='augmentation')
+
+
+def _decode_and_resize(img_size):
+    def _load(path, label):
+        raw = tf.io.read_file(path)
+        img = tf.io.decode_image(raw, channels=3, expand_animations=False)
+        img = tf.image.resize(img, img_size)
+        # Cache as uint8 to keep the in-memory cache 4x smaller than float32
+        img = tf.cast(tf.clip_by_value(tf.round(img), 0, 255), tf.uint8)
+        return img, label
+    return _load
+
+
+def make_dataset(paths, labels, num_classes, img_size=(224, 224), batch_size=32,
+                 training=False, cache_path='', augmentation=None, seed=42):
+    """
+    Build a tf.data pipeline over image files.
+
+    Decoding and resizing run in parallel and are done once: the decoded uint8
+    images are cached (in memory when `cache_path` is '' or on disk otherwise)
+    so later epochs only shuffle, batch, augment and prefetch.
+    """
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), labels))
+    if training:
+        # Shuffle file order up front so parallel decode interleaves classes
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=False)
+
+    ds = ds.map(_decode_and_resize(img_size), num_parallel_calls=AUTOTUNE,
+                deterministic=not training)
+    if cache_path is not None:
+        ds = ds.cache(cache_path)
+
+    if training:
+        ds = ds.shuffle(min(len(paths), 2048), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size, num_parallel_calls=AUTOTUNE)
+
+    def _finalize(images, batch_labels):
+        images = tf.cast(images, tf.float32) / 255.0
+        if training and augmentation is not None:
+            images = augmentation(images, training=True)
+        return images, tf.one_hot(batch_labels, num_classes)
+
+    ds = ds.map(_finalize, num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def build_datasets(data_dir, class_names, img_size=(224, 224), batch_size=32,
+                   validation_split=0.15, cache_dir=None, seed=42):
+    """
+    Training and validation datasets equivalent to the flow_from_directory setup.
+
+    Args:
+        cache_dir: directory for on-disk caches; None keeps the decoded images in memory
+
+    Returns:
+        train_ds, val_ds, train_labels (integer class ids, for class weights)
+    """
+    (train_paths, train_labels), (val_paths, val_labels) = split_image_files(
+        data_dir, class_names, validation_split
+    )
+    print(f"Found {len(train_paths)} training and {len(val_paths)} validation images")
+
+    train_cache = val_cache = ''
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        train_cache = os.path.join(cache_dir, 'train')
+        val_cache = os.path.join(cache_dir, 'val')
+
+    train_ds = make_dataset(
+        train_paths, train_labels, len(class_names), img_size, batch_size,
+        training=True, cache_path=train_cache, augmentation=build_augmentation(seed), seed=seed
+    )
+    val_ds = make_dataset(
+        val_paths, val_labels, len(class_names), img_size, batch_size,
+        training=False, cache_path=val_cache
+    )
+    return train_ds, val_ds, train_labels
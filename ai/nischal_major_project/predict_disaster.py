@@ -1,11 +1,121 @@
 import os
+import csv
 import json
+import argparse
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from PIL import Image
 import matplotlib.pyplot as plt
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Process-level cache: (absolute model path, mtime) -> loaded keras model
+_MODEL_CACHE = {}
+_PREDICTORS = {}
+
+
+def load_cached_model(model_path):
+    """Load a keras model once per process; reload only when the file changes."""
+    key = (os.path.abspath(model_path), os.path.getmtime(model_path))
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        # Drop stale entries for the same path before caching the new version
+        for cached_key in [k for k in _MODEL_CACHE if k[0] == key[0]]:
+            del _MODEL_CACHE[cached_key]
+        model = keras.models.load_model(model_path)
+        _MODEL_CACHE[key] = model
+    return model
+
+
+class DisasterPredictor:
+    """Reusable predictor that keeps the model and class names loaded."""
+
+    def __init__(self, model_path, class_names_path, img_size=(128, 128)):
+        self.model_path = model_path
+        self.img_size = img_size
+        with open(class_names_path, 'r') as f:
+            self.class_names = json.load(f)
+
+    @property
+    def model(self):
+        return load_cached_model(self.model_path)
+
+    def preprocess(self, image_path):
+        """Load an image as a normalized float32 array"""
+        img = Image.open(image_path).convert('RGB')
+        img = img.resize(self.img_size)
+        return np.asarray(img, dtype=np.float32) / 255.0
+
+    def predict(self, image_path):
+        """
+        Predict disaster type for a single image.
+
+        Returns:
+            Predicted class, confidence and the full probability vector
+        """
+        img_array = np.expand_dims(self.preprocess(image_path), axis=0)
+        predictions = self.model.predict(img_array, verbose=0)[0]
+        predicted_class_idx = np.argmax(predictions)
+        return self.class_names[predicted_class_idx], predictions[predicted_class_idx], predictions
+
+    def predict_directory(self, image_dir, output_csv=None, batch_size=32):
+        """
+        Score every image under a directory with batched inference.
+
+        Args:
+            image_dir: Folder to scan recursively for images
+            output_csv: Optional path of a CSV with one row per image
+            batch_size: Number of images per forward pass
+
+        Returns:
+            List of result dicts (path, predicted_class, confidence, per-class probabilities)
+        """
+        image_paths = []
+        for root, _, files in os.walk(image_dir):
+            for fname in sorted(files):
+                if fname.lower().endswith(IMAGE_EXTENSIONS):
+                    image_paths.append(os.path.join(root, fname))
+        image_paths.sort()
+
+        model = self.model
+        results = []
+        for start in range(0, len(image_paths), batch_size):
+            batch_paths = image_paths[start:start + batch_size]
+            batch, valid_paths = [], []
+            for path in batch_paths:
+                try:
+                    batch.append(self.preprocess(path))
+                    valid_paths.append(path)
+                except Exception as e:
+                    print(f"Skipping {path}: {e}")
+            if not batch:
+                continue
+
+            predictions = model.predict(np.stack(batch), batch_size=len(batch), verbose=0)
+            for path, probs in zip(valid_paths, predictions):
+                idx = int(np.argmax(probs))
+                result = {
+                    'path': path,
+                    'predicted_class': self.class_names[idx],
+                    'confidence': float(probs[idx])
+                }
+                result.update({name: float(p) for name, p in zip(self.class_names, probs)})
+                results.append(result)
+
+            print(f"Scored {min(start + batch_size, len(image_paths))}/{len(image_paths)} images")
+
+        if output_csv:
+            fieldnames = ['path', 'predicted_class', 'confidence'] + list(self.class_names)
+            with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(results)
+            print(f"Results written to {output_csv}")
+
+        return results
+
+
 def predict_disaster(image_path, model_path, class_names_path):
     """
     Predict disaster type for a given image.
@@ -18,24 +128,12 @@ def predict_disaster(image_path, model_path, class_names_path):
     Returns:
         Predicted class and confidence
     """
-    # Load model and class names
-    model = keras.models.load_model(model_path)
-    with open(class_names_path, 'r') as f:
-        class_names = json.load(f)
-    
-    # Load and preprocess image
-    img = Image.open(image_path).convert('RGB')
-    img = img.resize((128, 128))
-    img_array = np.array(img) / 255.0
-    img_array = np.expand_dims(img_array, axis=0)
-    
-    # Make prediction
-    predictions = model.predict(img_array, verbose=0)
-    predicted_class_idx = np.argmax(predictions[0])
-    confidence = predictions[0][predicted_class_idx]
-    predicted_class = class_names[predicted_class_idx]
-    
-    return predicted_class, confidence, predictions[0], class_names
+    key = (model_path, class_names_path)
+    predictor = _PREDICTORS.get(key)
+    if predictor is None:
+        predictor = _PREDICTORS[key] = DisasterPredictor(model_path, class_names_path)
+    predicted_class, confidence, predictions = predictor.predict(image_path)
+    return predicted_class, confidence, predictions, predictor.class_names
 
 
 def visualize_prediction(image_path, model_path, class_names_path):
@@ -74,13 +172,20 @@ def visualize_prediction(image_path, model_path, class_names_path):
 
 
 if __name__ == '__main__':
-    model_path = r'b:\nischal major project\disaster_cnn_model.h5'
-    class_names_path = r'b:\nischal major project\class_names.json'
-    
-    # Example: predict on a test image
-    test_image = r'b:\nischal major project\disasters\flood\0.jpg'
-    
-    if os.path.exists(test_image):
-        visualize_prediction(test_image, model_path, class_names_path)
+    parser = argparse.ArgumentParser(description='Predict disaster type for images')
+    parser.add_argument('--model', default=r'b:\nischal major project\disaster_cnn_model.h5')
+    parser.add_argument('--class-names', default=r'b:\nischal major project\class_names.json')
+    parser.add_argument('--image', default=r'b:\nischal major project\disasters\flood\0.jpg',
+                        help='Single image to visualize')
+    parser.add_argument('--dir', help='Score every image in this directory instead')
+    parser.add_argument('--output', default='predictions.csv', help='CSV written in --dir mode')
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    if args.dir:
+        predictor = DisasterPredictor(args.model, args.class_names)
+        predictor.predict_directory(args.dir, args.output, batch_size=args.batch_size)
+    elif os.path.exists(args.image):
+        visualize_prediction(args.image, args.model, args.class_names)
     else:
-        print(f"Test image not found: {test_image}")
+        print(f"Test image not found: {args.image}")
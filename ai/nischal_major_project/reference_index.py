@@ -0,0 +1,143 @@
+import os
+import json
+import threading
+import argparse
+from urllib.parse import quote
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+def build_index(disaster_info_path, assets_dir, out_path=None,
+                static_url='/static/reference_images', max_images=6):
+    """
+    Build the per-class reference index offline.
+
+    Each entry holds the safety information from disaster_info.json plus the
+    URLs of local reference images found in `assets_dir/<class name>/`.
+    With assets_dir=None no directories are scanned and entries have no
+    local images.
+    """
+    with open(disaster_info_path, 'r', encoding='utf-8') as f:
+        disaster_info = json.load(f)
+
+    index = {}
+    for disaster_type, info in disaster_info.items():
+        class_dir = os.path.join(assets_dir, disaster_type) if assets_dir else None
+        files = []
+        if class_dir and os.path.isdir(class_dir):
+            files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+        index[disaster_type] = {
+            'helpline': info.get('helpline', 'N/A'),
+            'prevention_measures': info.get('prevention_measures', []),
+            'image_keywords': info.get('image_keywords', []),
+            'related_images': [
+                f"{static_url}/{quote(disaster_type)}/{quote(fname)}" for fname in files[:max_images]
+            ],
+            'remote_images': []
+        }
+
+    if out_path:
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        print(f"Reference index written to {out_path} ({len(index)} classes)")
+
+    return index
+
+
+class ReferenceIndex:
+    """
+    In-memory reference images and safety info per disaster class.
+
+    Lookups never touch the network. An optional background refresher can
+    pull extra image URLs from an online source; it swaps in a new index and
+    persists it, so requests keep reading a consistent snapshot.
+    """
+
+    def __init__(self, index_path, disaster_info_path=None):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._refresher = None
+
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        elif disaster_info_path:
+            # No offline build yet: serve the safety info without images
+            self._index = build_index(disaster_info_path, assets_dir=None)
+        else:
+            self._index = {}
+
+    def get(self, disaster_type):
+        """Reference entry for a class (empty dict when unknown)"""
+        return self._index.get(disaster_type, {})
+
+    def related_images(self, disaster_type, limit=3):
+        """Local reference images first, then any URLs fetched by the refresher"""
+        entry = self.get(disaster_type)
+        images = entry.get('related_images', []) + entry.get('remote_images', [])
+        return images[:limit]
+
+    def refresh(self, fetch_images):
+        """
+        Fetch remote image URLs for every class and swap in the updated index.
+
+        Args:
+            fetch_images: callable(disaster_type) -> list of URLs, or a dict of
+                          provider name -> list of URLs
+        """
+        updated = {}
+        for disaster_type, entry in self._index.items():
+            try:
+                fetched = fetch_images(disaster_type)
+            except Exception as e:
+                print(f"Reference refresh failed for {disaster_type}: {e}")
+                fetched = None
+
+            if isinstance(fetched, dict):
+                fetched = [url for urls in fetched.values() for url in urls]
+
+            new_entry = dict(entry)
+            if fetched:
+                new_entry['remote_images'] = list(dict.fromkeys(fetched))
+            updated[disaster_type] = new_entry
+
+        with self._lock:
+            self._index = updated
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(updated, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+
+    def start_refresher(self, fetch_images, interval=6 * 3600):
+        """Refresh the index in a daemon thread every `interval` seconds"""
+        if self._refresher is not None:
+            return
+
+        stop_event = threading.Event()
+
+        def _run():
+            while not stop_event.is_set():
+                self.refresh(fetch_images)
+                stop_event.wait(interval)
+
+        self._refresher = threading.Thread(target=_run, name='reference-refresher', daemon=True)
+        self._refresher.stop_event = stop_event
+        self._refresher.start()
+
+    def stop_refresher(self):
+        if self._refresher is not None:
+            self._refresher.stop_event.set()
+            self._refresher = None
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Build the local reference image index')
+    parser.add_argument('--info', default=os.path.join(base_dir, 'disaster_info.json'))
+    parser.add_argument('--assets', default=os.path.join(base_dir, 'static', 'reference_images'))
+    parser.add_argument('--out', default=os.path.join(base_dir, 'reference_index.json'))
+    parser.add_argument('--max-images', type=int, default=6)
+    args = parser.parse_args()
+
+    build_index(args.info, args.assets, args.out, max_images=args.max_images)
@@ -1,14 +1,21 @@
 import os
+import sys
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications import MobileNetV2
 from sklearn.utils import class_weight
 import matplotlib.pyplot as plt
 import json
 
+from data_pipeline import build_datasets, split_image_files
+from bottleneck_features import build_head, extract_embeddings, train_head, transfer_head_weights
+
+# Shared training helpers live in the parent ai/ directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from training_instrumentation import TrainingInstrumentation
+
 DATA_DIR = r"b:\nischal major project\disasters"
 IMG_SIZE = (224, 224)
 BATCH_SIZE = 32
@@ -20,40 +27,29 @@ class_names = ['biological and chemical pandemic', 'cyclone', 'drought', 'earthq
 NUM_CLASSES = len(class_names)
 print("Detected classes:", class_names)
 
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    width_shift_range=0.08,
-    height_shift_range=0.08,
-    shear_range=0.08,
-    zoom_range=0.15,
-    horizontal_flip=True,
-    brightness_range=(0.8, 1.2),
-    validation_split=0.15,
-    fill_mode='nearest'
-)
-
-train_gen = train_datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    classes=class_names,
-    class_mode='categorical',
-    subset='training',
-    shuffle=True
-)
+# Decoded images are cached after the first epoch; set a directory to keep
+# the cache on disk between runs instead of in memory.
+CACHE_DIR = None
+
+# Train the head on precomputed backbone embeddings instead of running the
+# frozen MobileNetV2 over every image each epoch. BOTTLENECK_VIEWS counts the
+# plain image plus fixed augmented copies stored per training image.
+USE_BOTTLENECK = True
+BOTTLENECK_VIEWS = 4
+BOTTLENECK_DIR = r"b:\nischal major project\bottleneck"
+
+instrumentation = TrainingInstrumentation('mobilenet', out_dir=r"b:\nischal major project\training_runs")
+
+with instrumentation.stage('build_datasets'):
+    train_ds, val_ds, y_train_labels = build_datasets(
+        DATA_DIR,
+        class_names,
+        img_size=IMG_SIZE,
+        batch_size=BATCH_SIZE,
+        validation_split=0.15,
+        cache_dir=CACHE_DIR
+    )
 
-val_gen = train_datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    classes=class_names,
-    class_mode='categorical',
-    subset='validation',
-    shuffle=False
-)
-
-y_train_labels = train_gen.classes
 class_weights = class_weight.compute_class_weight(
     class_weight='balanced',
     classes=np.unique(y_train_labels),
@@ -70,9 +66,9 @@ x = inputs
 x = base_model(x, training=False)
 x = layers.GlobalAveragePooling2D()(x)
 x = layers.Dropout(0.3)(x)
-x = layers.Dense(256, activation='relu')(x)
+x = layers.Dense(256, activation='relu', name='head_dense')(x)
 x = layers.Dropout(0.2)(x)
-outputs = layers.Dense(NUM_CLASSES, activation='softmax')(x)
+outputs = layers.Dense(NUM_CLASSES, activation='softmax', name='predictions')(x)
 
 model = keras.Model(inputs, outputs)
 model.compile(
@@ -86,14 +82,45 @@ checkpoint = keras.callbacks.ModelCheckpoint(r"b:\nischal major project\best_mod
 reduce_lr = keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=3, min_lr=1e-7, verbose=1)
 early_stop = keras.callbacks.EarlyStopping(monitor='val_loss', patience=8, restore_best_weights=True, verbose=1)
 
-print("\n=== Initial Training ===")
-history = model.fit(
-    train_gen,
-    validation_data=val_gen,
-    epochs=EPOCHS,
-    class_weight=class_weights,
-    callbacks=[checkpoint, reduce_lr, early_stop]
-)
+if USE_BOTTLENECK:
+    print("\n=== Initial Training (bottleneck features) ===")
+    (train_paths, train_labels), (val_paths, val_labels) = split_image_files(DATA_DIR, class_names, 0.15)
+    os.makedirs(BOTTLENECK_DIR, exist_ok=True)
+    with instrumentation.stage('extract_embeddings'):
+        train_emb, train_emb_labels = extract_embeddings(
+            base_model, train_paths, train_labels, NUM_CLASSES, os.path.join(BOTTLENECK_DIR, 'train'),
+            img_size=IMG_SIZE, num_views=BOTTLENECK_VIEWS
+        )
+        val_emb, val_emb_labels = extract_embeddings(
+            base_model, val_paths, val_labels, NUM_CLASSES, os.path.join(BOTTLENECK_DIR, 'val'),
+            img_size=IMG_SIZE, num_views=1
+        )
+
+    head = build_head(NUM_CLASSES)
+    with instrumentation.stage('train_head'):
+        history = train_head(
+            head, train_emb, train_emb_labels, val_emb, val_emb_labels, NUM_CLASSES,
+            learning_rate=LEARNING_RATE,
+            epochs=EPOCHS,
+            class_weights=class_weights,
+            callbacks=[
+                keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=3, min_lr=1e-7, verbose=1),
+                keras.callbacks.EarlyStopping(monitor='val_loss', patience=8, restore_best_weights=True, verbose=1),
+                instrumentation.callback('head', 256, len(train_emb_labels))
+            ]
+        )
+    transfer_head_weights(head, model)
+else:
+    print("\n=== Initial Training ===")
+    with instrumentation.stage('train_initial'):
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=EPOCHS,
+            class_weight=class_weights,
+            callbacks=[checkpoint, reduce_lr, early_stop,
+                       instrumentation.callback('initial', BATCH_SIZE, len(y_train_labels))]
+        )
 
 print("\n=== Fine-tuning ===")
 base_model.trainable = True
@@ -107,19 +134,24 @@ model.compile(
 )
 
 fine_tune_epochs = 15
-history_ft = model.fit(
-    train_gen,
-    validation_data=val_gen,
-    epochs=fine_tune_epochs,
-    class_weight=class_weights,
-    callbacks=[checkpoint, reduce_lr, early_stop]
-)
+with instrumentation.stage('fine_tune'):
+    history_ft = model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=fine_tune_epochs,
+        class_weight=class_weights,
+        callbacks=[checkpoint, reduce_lr, early_stop,
+                   instrumentation.callback('fine_tune', BATCH_SIZE, len(y_train_labels))]
+    )
 
 model.save(MODEL_SAVE)
 print(f"Saved model to {MODEL_SAVE}")
 
-val_loss, val_acc = model.evaluate(val_gen, verbose=1)
+with instrumentation.stage('evaluate'):
+    val_loss, val_acc = model.evaluate(val_ds, verbose=1)
 print(f"\nValidation loss={val_loss:.4f}, acc={val_acc:.4f}")
+instrumentation.record(val_loss=float(val_loss), val_accuracy=float(val_acc))
+instrumentation.write_summary()
 
 with open(r"b:\nischal major project\class_names.json", 'w') as f:
     json.dump(class_names, f)
@@ -8,6 +8,10 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+# Compact row layout for stored keyword spans. 'match' keeps the matched
+# text itself, since input_preview only holds the first 100 characters
+EXPLAIN_FIELDS = ('category', 'keyword', 'kind', 'start', 'end', 'match')
+
 class PredictionTracker:
     def __init__(self, db_path='predictions.db'):
         self.db_path = db_path
@@ -28,14 +32,20 @@ class PredictionTracker:
                 confidence REAL NOT NULL,
                 tags TEXT,
                 input_preview TEXT,
+                explain TEXT,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Databases created before keyword spans were stored
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(predictions)')}
+        if 'explain' not in columns:
+            cursor.execute('ALTER TABLE predictions ADD COLUMN explain TEXT')
+        
         conn.commit()
         conn.close()
     
-    def log_prediction(self, input_type, result, input_preview=None):
+    def log_prediction(self, input_type, result, input_preview=None, explain=None):
         """
         Log a prediction to the database
         
@@ -43,14 +53,22 @@ class PredictionTracker:
             input_type: 'text', 'image', or 'audio'
             result: dict with disaster_type, danger_score, confidence, tags
             input_preview: optional preview of input (first 100 chars for text)
+            explain: optional keyword spans (defaults to result['explain']),
+                stored as compact [category, keyword, kind, start, end, match] rows
         """
+        if explain is None:
+            explain = result.get('explain')
+        if explain is not None:
+            explain = json.dumps([[span.get(f) for f in EXPLAIN_FIELDS] for span in explain],
+                                 separators=(',', ':'))
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT INTO predictions 
-            (timestamp, input_type, disaster_type, danger_score, confidence, tags, input_preview)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            (timestamp, input_type, disaster_type, danger_score, confidence, tags, input_preview, explain)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             datetime.now().isoformat(),
             input_type,
@@ -58,7 +76,8 @@ class PredictionTracker:
             result.get('danger_score', 0),
             result.get('confidence', 0.0),
             json.dumps(result.get('tags', [])),
-            input_preview[:100] if input_preview else None
+            input_preview[:100] if input_preview else None,
+            explain
         ))
         
         conn.commit()
@@ -132,7 +151,7 @@ class PredictionTracker:
         
         cursor.execute('''
             SELECT id, timestamp, input_type, disaster_type, danger_score, 
-                   confidence, tags, input_preview
+                   confidence, tags, input_preview, explain
             FROM predictions
             ORDER BY id DESC
             LIMIT ?
@@ -151,7 +170,8 @@ class PredictionTracker:
                 'danger_score': row[4],
                 'confidence': row[5],
                 'tags': json.loads(row[6]) if row[6] else [],
-                'input_preview': row[7]
+                'input_preview': row[7],
+                'explain': [dict(zip(EXPLAIN_FIELDS, span)) for span in json.loads(row[8])] if row[8] else None
             })
         
         return predictions
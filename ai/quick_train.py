@@ -5,6 +5,7 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+from training_instrumentation import TrainingInstrumentation
 
 def quick_train():
     print("Starting quick training...")
@@ -13,11 +14,14 @@ def quick_train():
     preprocessor = AudioPreprocessor()
     model_builder = DisasterClassificationModels()
     scaler = StandardScaler()
+    instrumentation = TrainingInstrumentation('quick_train')
     
     # Prepare data
     print("Extracting features...")
-    features_list, labels = preprocessor.prepare_dataset('audio_dataset')
-    data_splits = preprocessor.split_data(features_list)
+    with instrumentation.stage('feature_extraction'):
+        features_list, labels = preprocessor.prepare_dataset('audio_dataset')
+    with instrumentation.stage('split_data'):
+        data_splits = preprocessor.split_data(features_list)
     
     # Scale traditional features
     data_splits['X_train_traditional'] = scaler.fit_transform(data_splits['X_train_traditional'])
@@ -36,11 +40,15 @@ def quick_train():
     # Train CNN model
     print("\nTraining CNN model...")
     cnn_model = model_builder.create_cnn_model(input_shape=(mel_shape[0], mel_shape[1], 1))
-    cnn_model.fit(
-        data_splits['X_train_mel'], data_splits['y_train'],
-        epochs=10, batch_size=32, verbose=1,
-        validation_split=0.2
-    )
+    # validation_split holds out the last 20% of the training rows
+    n_fit = int(len(data_splits['y_train']) * 0.8)
+    with instrumentation.stage('train_cnn'):
+        cnn_model.fit(
+            data_splits['X_train_mel'], data_splits['y_train'],
+            epochs=10, batch_size=32, verbose=1,
+            validation_split=0.2,
+            callbacks=[instrumentation.callback('cnn', 32, n_fit)]
+        )
     
     # Evaluate CNN
     cnn_pred = cnn_model.predict(data_splits['X_test_mel'])
@@ -55,7 +63,8 @@ def quick_train():
     
     for name, model in traditional_models.items():
         print(f"Training {name}...")
-        model.fit(data_splits['X_train_traditional'], data_splits['y_train'])
+        with instrumentation.stage(f'train_{name}'):
+            model.fit(data_splits['X_train_traditional'], data_splits['y_train'])
         pred = model.predict(data_splits['X_test_traditional'])
         accuracy = accuracy_score(data_splits['y_test'], pred)
         results[name] = accuracy
@@ -76,6 +85,8 @@ def quick_train():
         print(f"{model_name}: {accuracy:.4f}")
     
     print("\nModels saved successfully!")
+    instrumentation.record(accuracy=results)
+    instrumentation.write_summary()
     return results
 
 if __name__ == "__main__":
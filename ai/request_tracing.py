@@ -0,0 +1,251 @@
+"""
+Request tracing for ResQ Connect
+Accepts X-Request-ID / W3C traceparent headers, records per-stage spans for
+each request and exports finished traces to a JSONL file or an HTTP collector
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import random
+import logging
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import service_metrics
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_trace = contextvars.ContextVar('resq_trace', default=None)
+
+
+def _new_id(n_bytes):
+    return uuid.uuid4().hex[:n_bytes * 2]
+
+
+class Trace:
+    """One request: its ids, start time and the spans recorded under it"""
+
+    def __init__(self, trace_id, request_id, parent_id=None, name='request'):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.request_id = request_id
+        self.name = name
+        self.started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.spans = []
+        self.attributes = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, duration, **attributes):
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'span_id': _new_id(8),
+                'start_ms': round((start - self._start) * 1000, 3),
+                'duration_ms': round(duration * 1000, 3),
+                **attributes
+            })
+
+    @property
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self, duration_ms, status):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'request_id': self.request_id,
+            'name': self.name,
+            'started': self.started.isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'status': status,
+            'attributes': self.attributes,
+            'spans': sorted(self.spans, key=lambda s: s['start_ms'])
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record a span on the current trace (no-op outside a traced request)"""
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add_span(name, start, time.perf_counter() - start, **attributes)
+
+
+def _stage_listener(modality, name, start, duration):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, start, duration, modality=modality)
+
+
+# Every service_metrics.stage() block also becomes a span on the active trace
+service_metrics.add_stage_listener(_stage_listener)
+
+
+class JsonlExporter:
+    """Append finished traces to a local JSONL file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, record):
+        line = json.dumps(record)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class HttpExporter:
+    """
+    POST batches of traces as JSON to a collector from a background thread.
+
+    Requests never wait on the collector: traces are queued and dropped
+    (and counted) when the queue is full.
+    """
+
+    def __init__(self, url, batch_size=50, flush_interval=2.0, max_queue=10000, timeout=5.0):
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                body = json.dumps({'traces': batch}).encode()
+                req = urllib.request.Request(self.url, data=body, method='POST',
+                                             headers={'Content-Type': 'application/json'})
+                urllib.request.urlopen(req, timeout=self.timeout).close()
+            except Exception as e:
+                logger.warning(f"Trace export to {self.url} failed ({len(batch)} traces dropped): {e}")
+
+
+class Tracer:
+    """
+    Per-request tracing for a Flask app.
+
+    Incoming X-Request-ID and traceparent headers are honoured (new ids are
+    generated otherwise) and echoed on the response. Finished traces are
+    exported when sampled (`sample_rate`) and always when slower than
+    `slow_ms`; slow requests are also logged with their stage breakdown for
+    a `slow_log_sample` fraction of them.
+    """
+
+    def __init__(self, exporter=None, sample_rate=1.0, slow_ms=1000.0, slow_log_sample=1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.slow_log_sample = slow_log_sample
+
+    @classmethod
+    def from_env(cls):
+        """
+        TRACE_EXPORT: path of a JSONL file or http(s):// collector URL (unset: no export)
+        TRACE_SAMPLE_RATE, TRACE_SLOW_MS, TRACE_SLOW_LOG_SAMPLE
+        """
+        target = os.environ.get('TRACE_EXPORT', '')
+        exporter = None
+        if target.startswith(('http://', 'https://')):
+            exporter = HttpExporter(target)
+        elif target:
+            exporter = JsonlExporter(target)
+        return cls(
+            exporter=exporter,
+            sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 1.0)),
+            slow_ms=float(os.environ.get('TRACE_SLOW_MS', 1000)),
+            slow_log_sample=float(os.environ.get('TRACE_SLOW_LOG_SAMPLE', 1.0))
+        )
+
+    def start(self, headers, name='request'):
+        request_id = headers.get('X-Request-ID') or uuid.uuid4().hex
+        match = TRACEPARENT_RE.match(headers.get('traceparent', '').strip().lower())
+        if match and match.group(2) != '0' * 32:
+            trace = Trace(match.group(2), request_id, parent_id=match.group(3), name=name)
+        else:
+            trace = Trace(_new_id(16), request_id, name=name)
+        return trace, _current_trace.set(trace)
+
+    def finish(self, trace, token, status):
+        _current_trace.reset(token)
+        duration_ms = trace.elapsed_ms()
+        slow = duration_ms >= self.slow_ms
+
+        if slow and random.random() < self.slow_log_sample:
+            breakdown = ', '.join(f"{s['name']}={s['duration_ms']:.1f}ms" for s in trace.to_dict(0, status)['spans'])
+            logger.warning(f"Slow request {trace.request_id} ({trace.name}, {duration_ms:.0f}ms, "
+                           f"status {status}): {breakdown or 'no stages recorded'}")
+
+        if self.exporter is not None and (slow or random.random() < self.sample_rate):
+            try:
+                self.exporter.export(trace.to_dict(duration_ms, status))
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    def init_app(self, app, paths=None):
+        """Trace requests whose path starts with one of `paths` (all when None) and echo trace headers"""
+        from flask import g, request
+
+        @app.before_request
+        def _start_trace():
+            if paths is None or request.path.startswith(tuple(paths)):
+                g.trace, g.trace_token = self.start(request.headers, name=f'{request.method} {request.path}')
+
+        @app.after_request
+        def _echo_trace(response):
+            trace = g.get('trace')
+            if trace is not None:
+                response.headers['X-Request-ID'] = trace.request_id
+                response.headers['traceparent'] = trace.traceparent
+                g.trace_status = response.status_code
+            return response
+
+        @app.teardown_request
+        def _finish_trace(exc):
+            trace = g.pop('trace', None)
+            if trace is not None:
+                status = 500 if exc is not None else g.get('trace_status', 200)
+                self.finish(trace, g.pop('trace_token'), status)
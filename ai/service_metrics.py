@@ -0,0 +1,183 @@
+"""
+Service metrics for ResQ Connect
+Minimal Prometheus-compatible counters, gauges and histograms with a
+context manager for timing prediction stages
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labelnames, k)} {v}' for k, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][i] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, dict(v, counts=list(v['counts']))) for k, v in self._values.items())
+        lines = self.header()
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {entry['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {entry['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'resq_stage_seconds', 'Time spent in each prediction stage', ('modality', 'stage'))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'resq_request_seconds', 'End-to-end /predict latency', ('modality',))
+REQUESTS = REGISTRY.counter(
+    'resq_requests_total', 'Prediction requests by modality and HTTP status', ('modality', 'status'))
+IN_FLIGHT = REGISTRY.gauge(
+    'resq_requests_in_flight', 'Prediction requests currently being handled')
+MODEL_LOADED = REGISTRY.gauge(
+    'resq_model_loaded', '1 if the model loaded at startup, 0 if the service falls back', ('model',))
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    'resq_model_load_seconds', 'Time taken to load each model at startup', ('model',))
+CACHE_REQUESTS = REGISTRY.counter(
+    'resq_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ('cache', 'result'))
+FALLBACKS = REGISTRY.counter(
+    'resq_fallback_total', 'Predictions served by a fallback instead of the model', ('modality', 'reason'))
+PREDICTION_PATH = REGISTRY.counter(
+    'resq_prediction_path_total', 'Which path produced each prediction', ('modality', 'path'))
+
+
+_stage_listeners = []
+
+
+def add_stage_listener(listener):
+    """Call listener(modality, name, start, duration) for every timed stage (e.g. tracing)"""
+    _stage_listeners.append(listener)
+
+
+def record_stage(modality, name, duration, start=None):
+    """Record a stage timed elsewhere (e.g. timings reported by the audio ingest)"""
+    STAGE_SECONDS.observe(duration, modality=modality, stage=name)
+    if start is None:
+        start = time.perf_counter() - duration
+    for listener in _stage_listeners:
+        listener(modality, name, start, duration)
+
+
+@contextmanager
+def stage(modality, name):
+    """Time a block into resq_stage_seconds{modality, stage}"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(modality, name, time.perf_counter() - start, start)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
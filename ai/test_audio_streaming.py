@@ -0,0 +1,65 @@
+"""
+Tests for incremental mel framing of audio streams
+Run from ai/: python -m pytest test_audio_streaming.py
+"""
+
+import numpy as np
+import librosa
+
+from audio_streaming import IncrementalMelFramer
+
+SAMPLE_RATE = 22050
+
+
+def _signal(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.4 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(t.shape)).astype(np.float32)
+
+
+def _stream(framer, signal, chunk_sizes):
+    windows, pos, i = [], 0, 0
+    while pos < len(signal):
+        size = chunk_sizes[i % len(chunk_sizes)]
+        windows.extend(framer.push(signal[pos:pos + size]))
+        pos += size
+        i += 1
+    windows.extend(framer.finish())
+    return windows
+
+
+def test_windows_match_librosa_melspectrogram():
+    signal = _signal(7.0)
+    framer = IncrementalMelFramer(SAMPLE_RATE, window_seconds=3.0, hop_seconds=1.5)
+    # Odd chunk sizes so frames straddle push boundaries
+    windows = _stream(framer, signal, [1000, 7777, 333, 22050])
+
+    reference = librosa.feature.melspectrogram(
+        y=signal, sr=SAMPLE_RATE, n_fft=2048, hop_length=512, n_mels=128, pad_mode='constant'
+    )
+    assert len(windows) >= 3
+    for window in windows:
+        start = int(round(window['start'] * SAMPLE_RATE / 512))
+        expected = reference[:, start:start + framer.frames_per_window]
+        assert window['mel_spec'].shape == (128, framer.frames_per_window)
+        np.testing.assert_allclose(window['mel_spec'], expected, rtol=1e-3, atol=1e-3 * reference.max())
+
+
+def test_chunking_does_not_change_windows():
+    signal = _signal(5.0, seed=1)
+    whole = _stream(IncrementalMelFramer(SAMPLE_RATE), signal, [len(signal)])
+    chunked = _stream(IncrementalMelFramer(SAMPLE_RATE), signal, [512, 4096, 100])
+
+    assert [w['start'] for w in whole] == [w['start'] for w in chunked]
+    for a, b in zip(whole, chunked):
+        np.testing.assert_allclose(a['mel_spec'], b['mel_spec'], rtol=1e-4, atol=1e-6)
+
+
+def test_short_stream_yields_one_padded_window():
+    framer = IncrementalMelFramer(SAMPLE_RATE, window_seconds=3.0)
+    windows = _stream(framer, _signal(1.0), [4000])
+
+    assert len(windows) == 1
+    assert windows[0]['start'] == 0
+    assert windows[0]['mel_spec'].shape == (128, framer.frames_per_window)
+    assert windows[0]['mfcc'].shape == (13, framer.frames_per_window)
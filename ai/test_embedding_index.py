@@ -0,0 +1,65 @@
+"""
+Tests for the near-duplicate image embedding index
+Run from ai/: python -m pytest test_embedding_index.py
+"""
+
+import numpy as np
+
+from embedding_index import EmbeddingIndex
+
+
+def _random_vectors(n, dim=64, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_find_duplicate_matches_perturbed_copy():
+    vectors = _random_vectors(50)
+    index = EmbeddingIndex(dim=64, capacity=100, sketch_dim=32)
+    for i, vec in enumerate(vectors):
+        index.add(f'report-{i}', vec, payload={'disaster_type': f'type-{i}'})
+
+    noise = np.random.default_rng(1).standard_normal(64).astype(np.float32) * 0.05
+    duplicate = index.find_duplicate(vectors[17] * 3.0 + noise, threshold=0.95)
+
+    assert duplicate is not None
+    report_id, similarity, payload = duplicate
+    assert report_id == 'report-17'
+    assert similarity >= 0.95
+    assert payload == {'disaster_type': 'type-17'}
+
+
+def test_find_duplicate_rejects_unrelated_vector():
+    vectors = _random_vectors(51)
+    index = EmbeddingIndex(dim=64, capacity=100, sketch_dim=32)
+    for i, vec in enumerate(vectors[:50]):
+        index.add(f'report-{i}', vec)
+
+    assert index.find_duplicate(vectors[50], threshold=0.95) is None
+    assert EmbeddingIndex(dim=64).find_duplicate(vectors[0]) is None
+
+
+def test_oldest_entries_are_evicted_at_capacity():
+    vectors = _random_vectors(12)
+    index = EmbeddingIndex(dim=64, capacity=8, sketch_dim=32)
+    for i, vec in enumerate(vectors):
+        index.add(f'report-{i}', vec)
+
+    assert len(index) == 8
+    # report-0..3 were overwritten by report-8..11
+    for i in range(4):
+        match = index.find_duplicate(vectors[i], threshold=0.99)
+        assert match is None or match[0] != f'report-{i}'
+    for i in range(4, 12):
+        assert index.find_duplicate(vectors[i], threshold=0.99)[0] == f'report-{i}'
+
+
+def test_search_orders_by_similarity():
+    vectors = _random_vectors(20)
+    index = EmbeddingIndex(dim=64, capacity=32, sketch_dim=32, rerank=32)
+    for i, vec in enumerate(vectors):
+        index.add(i, vec)
+
+    results = index.search(vectors[3], k=5)
+    similarities = [similarity for _, similarity, _ in results]
+    assert results[0][0] == 3
+    assert similarities == sorted(similarities, reverse=True)
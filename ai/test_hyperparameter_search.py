@@ -0,0 +1,115 @@
+"""
+Tests for the resumable hyperparameter search
+Run from ai/: python -m pytest test_hyperparameter_search.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+import hyperparameter_search
+from hyperparameter_search import ResumableSearch
+
+
+def _data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, 6))
+    y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int)
+    return X, y
+
+
+def _search(journal_path, **kwargs):
+    params = dict(strategy='halving', n_candidates=9, cv=3, factor=3, cache_dir=None, n_jobs=1)
+    params.update(kwargs)
+    return ResumableSearch(LogisticRegression(max_iter=200), {'C': [0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100]},
+                           str(journal_path), **params)
+
+
+def _count_fits(monkeypatch):
+    calls = []
+    evaluate = hyperparameter_search._evaluate_fold
+
+    def counting(*args):
+        calls.append(args)
+        return evaluate(*args)
+    monkeypatch.setattr(hyperparameter_search, '_evaluate_fold', counting)
+    return calls
+
+
+def test_schedule_ends_on_full_dataset(tmp_path):
+    schedule = _search(tmp_path / 'j.jsonl')._schedule(600)
+    assert schedule[-1][0] == 600
+    assert [n for n, _ in schedule] == sorted(n for n, _ in schedule)
+
+
+def test_resume_reuses_every_journaled_fold(tmp_path, monkeypatch):
+    X, y = _data()
+    journal = tmp_path / 'j.jsonl'
+    first = _search(journal).fit(X, y)
+
+    calls = _count_fits(monkeypatch)
+    second = _search(journal).fit(X, y)
+
+    assert calls == []
+    assert second.best_params_ == first.best_params_
+    assert second.best_score_ == first.best_score_
+
+
+def test_interrupted_run_only_fits_missing_folds(tmp_path, monkeypatch):
+    X, y = _data()
+    journal = tmp_path / 'j.jsonl'
+    _search(journal).fit(X, y)
+
+    lines = journal.read_text().splitlines()
+    kept = lines[:10]
+    # A killed run can leave a partial last line behind
+    journal.write_text('\n'.join(kept) + '\n' + lines[10][:15])
+
+    calls = _count_fits(monkeypatch)
+    _search(journal).fit(X, y)
+    assert len(calls) == len(lines) - len(kept)
+
+
+@pytest.mark.parametrize('change', ['data', 'estimator', 'cv'])
+def test_changed_setup_ignores_stale_journal(tmp_path, monkeypatch, change):
+    X, y = _data()
+    journal = tmp_path / 'j.jsonl'
+    _search(journal).fit(X, y)
+    n_entries = len(journal.read_text().splitlines())
+
+    kwargs = {}
+    if change == 'data':
+        X = X.copy()
+        X[0, 0] += 1.0
+    elif change == 'cv':
+        kwargs['cv'] = 4
+    search = _search(journal, **kwargs)
+    if change == 'estimator':
+        search.pipeline.set_params(clf__fit_intercept=False)
+
+    calls = _count_fits(monkeypatch)
+    search.fit(X, y)
+    assert len(calls) > 0
+    if change == 'data':
+        assert len(calls) == n_entries
+
+    fingerprints = {json.loads(line)['fingerprint'] for line in journal.read_text().splitlines()}
+    assert len(fingerprints) == 2
+
+
+def test_preprocessing_and_cache_are_opt_in(tmp_path):
+    search = ResumableSearch(LogisticRegression(), {'C': [1]}, str(tmp_path / 'j.jsonl'))
+    assert [name for name, _ in search.pipeline.steps] == ['clf']
+    assert search.pipeline.memory is None
+
+    # A cache directory alone does not cache a pipeline with nothing to transform
+    search = ResumableSearch(LogisticRegression(), {'C': [1]}, str(tmp_path / 'j.jsonl'),
+                             cache_dir=str(tmp_path / 'cache'))
+    assert search.pipeline.memory is None
+
+    search = ResumableSearch(LogisticRegression(), {'C': [1]}, str(tmp_path / 'j.jsonl'),
+                             preprocessing='standard', cache_dir=str(tmp_path / 'cache'))
+    assert [name for name, _ in search.pipeline.steps] == ['features', 'clf']
+    assert search.pipeline.memory is not None
@@ -0,0 +1,108 @@
+"""
+Tests for the versioned keyword taxonomy and its hot reload
+Run from ai/: python -m pytest test_keyword_taxonomy.py
+"""
+
+import json
+import os
+
+import pytest
+
+from keyword_taxonomy import KeywordTaxonomy, TaxonomyWatcher, validate_taxonomy
+from ml_service_lite import LightweightMLService
+
+TAXONOMY = {
+    'version': '1.0',
+    'disaster_patterns': {
+        'flood': {'keywords': ['flood', 'water'], 'urgent_keywords': ['trapped'], 'base_score': 85},
+        'fire': {'keywords': ['fire', 'smoke'], 'base_score': 90},
+    },
+    'urgency_keywords': ['urgent', 'help'],
+}
+
+
+def _write(path, data, mtime=None):
+    path.write_text(json.dumps(data) if not isinstance(data, str) else data)
+    if mtime is not None:
+        # Distinct mtimes even on filesystems with coarse timestamps
+        os.utime(path, (mtime, mtime))
+
+
+def _with(**changes):
+    data = json.loads(json.dumps(TAXONOMY))
+    data.update(changes)
+    return data
+
+
+def test_validate_accepts_taxonomy():
+    validate_taxonomy(TAXONOMY)
+
+
+@pytest.mark.parametrize('data', [
+    [],
+    _with(version=''),
+    _with(disaster_patterns={}),
+    _with(disaster_patterns={'fire': {'keywords': [], 'base_score': 50}}),
+    _with(disaster_patterns={'fire': {'keywords': ['fire'], 'base_score': 150}}),
+    _with(disaster_patterns={'fire': {'keywords': ['fire'], 'base_score': True}}),
+    _with(disaster_patterns={'fire': {'keywords': ['fire'], 'urgent_keywords': 'smoke', 'base_score': 50}}),
+    _with(urgency_keywords=['help', 3]),
+])
+def test_validate_rejects_malformed_taxonomy(data):
+    with pytest.raises(ValueError):
+        validate_taxonomy(data)
+
+
+def test_watcher_reloads_changed_file(tmp_path):
+    path = tmp_path / 'taxonomy.json'
+    _write(path, TAXONOMY, mtime=1000)
+    loaded = []
+    watcher = TaxonomyWatcher(str(path), loaded.append, interval=0)
+
+    assert watcher.check() is False
+    _write(path, _with(version='2.0'), mtime=2000)
+    assert watcher.check() is True
+    assert [t.version for t in loaded] == ['2.0']
+    assert watcher.check() is False
+
+
+def test_watcher_keeps_current_taxonomy_on_invalid_file(tmp_path):
+    path = tmp_path / 'taxonomy.json'
+    _write(path, TAXONOMY, mtime=1000)
+    service = LightweightMLService(taxonomy_path=str(path), poll_seconds=0)
+    before = service.predict_text('Fire and smoke, urgent help')
+    assert service.taxonomy.version == '1.0'
+
+    _write(path, '{"version": "2.0", "disaster_patterns": ', mtime=2000)
+    assert service.taxonomy_watcher.check() is False
+    assert 'JSONDecodeError' in service.taxonomy_watcher.last_error
+    _write(path, _with(version='2.1', urgency_keywords=[7]), mtime=3000)
+    assert service.taxonomy_watcher.check() is False
+    assert 'ValueError' in service.taxonomy_watcher.last_error
+
+    assert service.taxonomy.version == '1.0'
+    assert service.predict_text('Fire and smoke, urgent help') == before
+
+    # A valid file clears the error and is swapped in
+    patterns = _with(version='3.0')['disaster_patterns']
+    patterns['fire']['keywords'].append('blaze')
+    _write(path, _with(version='3.0', disaster_patterns=patterns), mtime=4000)
+    assert service.taxonomy_watcher.check() is True
+    assert service.taxonomy_watcher.last_error is None
+    assert service.taxonomy.version == '3.0'
+    assert service.predict_text('A blaze downtown')['disaster_type'] == 'Fire'
+
+
+def test_missing_file_falls_back_to_builtin_tables(tmp_path):
+    service = LightweightMLService(taxonomy_path=str(tmp_path / 'missing.json'), poll_seconds=0)
+    assert service.taxonomy.version == 'builtin'
+    assert service.predict_text('Flood in city, people trapped')['disaster_type'] == 'Flood'
+
+
+def test_taxonomy_groups_line_up_with_categories():
+    taxonomy = KeywordTaxonomy(TAXONOMY['version'], TAXONOMY['disaster_patterns'], TAXONOMY['urgency_keywords'])
+    hits = taxonomy.matcher.hit_matrix(['flood water, fire'])
+
+    assert taxonomy.categories == ['flood', 'fire']
+    assert (hits @ taxonomy.keyword_groups).toarray().tolist() == [[2, 1]]
+    assert taxonomy.describe()['keywords'] == len(taxonomy.matcher.columns)
@@ -0,0 +1,62 @@
+"""
+Tests that memory-mapped splits and MelSequence batches match the in-memory arrays
+Run from ai/: python -m pytest test_mel_sequence.py
+"""
+
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+
+pytest.importorskip('tensorflow')
+
+from audio_preprocessor import AudioPreprocessor
+from train_model import MelSequence
+
+CLASSES = ['earthquake', 'fire', 'flood']
+
+
+def _features(n_per_class=10, mel_shape=(16, 12), seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {'features': rng.standard_normal(8), 'mel_spec': rng.random(mel_shape, dtype=np.float32), 'label': label}
+        for label in CLASSES for _ in range(n_per_class)
+    ]
+
+
+def _in_memory_split(features_list, test_size=0.2, val_size=0.1):
+    """The split as train_test_split on the full arrays, before memory mapping"""
+    X_mel = np.array([item['mel_spec'] for item in features_list])
+    y = AudioPreprocessor().label_encoder.fit_transform([item['label'] for item in features_list])
+    X_train, X_temp, y_train, y_temp = train_test_split(
+        X_mel, y, test_size=test_size + val_size, random_state=42, stratify=y
+    )
+    val_ratio = val_size / (test_size + val_size)
+    X_val, X_test, y_val, y_test = train_test_split(
+        X_temp, y_temp, test_size=1 - val_ratio, random_state=42, stratify=y_temp
+    )
+    return {'train': (X_train, y_train), 'val': (X_val, y_val), 'test': (X_test, y_test)}
+
+
+def _collect(sequence):
+    batches = [sequence[i] for i in range(len(sequence))]
+    return np.concatenate([b[0] for b in batches]), np.concatenate([b[1] for b in batches])
+
+
+@pytest.mark.parametrize('mode', ['cnn', 'rnn'])
+def test_mel_sequence_matches_in_memory_arrays(tmp_path, mode):
+    features_list = _features()
+    expected = _in_memory_split(features_list)
+
+    splits = AudioPreprocessor().split_data(features_list, mel_path=str(tmp_path / 'mel.npy'))
+    assert isinstance(splits['X_train_mel'], np.memmap)
+
+    for name, (X_mel, y) in expected.items():
+        mel = splits[f'X_{name}_mel']
+        # Shapes train_model fed to the CNN and RNN models before streaming
+        X = X_mel.reshape(-1, X_mel.shape[1], X_mel.shape[2], 1)
+        if mode == 'rnn':
+            X = X.reshape(-1, X_mel.shape[2], X_mel.shape[1])
+
+        X_batches, y_batches = _collect(MelSequence(mel, splits[f'y_{name}'], batch_size=4, mode=mode))
+        np.testing.assert_array_equal(X_batches, X)
+        np.testing.assert_array_equal(y_batches, y)
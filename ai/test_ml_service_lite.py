@@ -0,0 +1,83 @@
+"""
+Tests for the lightweight keyword ML service
+Run from ai/: python -m pytest test_ml_service_lite.py
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import ml_service_lite
+from ml_service_lite import LightweightMLService
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'Text_Disaster_Prediction', 'disasters', 'All the Texts.txt')
+
+TEXTS = [
+    "Flood in city, people trapped",
+    "Building collapsed after earthquake",
+    "Fire emergency - smoke everywhere",
+    "Car accident on highway",
+    "URGENT: river overflow, houses submerged and people trapped",
+    "  HELP!!! gas leak near the plant, toxic fumes",
+    "Ｆｉｒｅ at the ﬁrst floor, people are dying",
+    "Heavy rain all night, the train is delayed",
+    "Nice weather today",
+    "",
+    "!!!",
+    "Cyclone warning: strong wind and storm surge, sos",
+]
+
+
+@pytest.fixture(scope='module')
+def service():
+    return LightweightMLService(poll_seconds=0)
+
+
+def _corpus(limit=2000):
+    if not os.path.exists(CORPUS_PATH):
+        return []
+    texts = pd.read_csv(CORPUS_PATH, nrows=limit)['text'].dropna()
+    return [str(t) for t in texts]
+
+
+def test_batch_matches_single_predictions(service):
+    texts = TEXTS + _corpus()
+    assert service.predict_batch(texts) == [service.predict_text(t) for t in texts]
+
+
+def test_batch_route(service, monkeypatch):
+    monkeypatch.setattr(ml_service_lite, 'ml_service', service)
+    client = ml_service_lite.app.test_client()
+
+    response = client.post('/predict/batch', json={'texts': TEXTS[:4]})
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [service.predict_text(t) for t in TEXTS[:4]]
+
+    assert client.post('/predict/batch', json={'texts': []}).status_code == 400
+    monkeypatch.setattr(ml_service_lite, 'MAX_BATCH_SIZE', 3)
+    assert client.post('/predict/batch', json={'texts': TEXTS[:4]}).status_code == 413
+
+
+def test_explained_batch_matches_single_predictions(service):
+    texts = TEXTS + _corpus(500)
+    explained = service.predict_batch(texts, explain=True)
+    assert explained == [service.predict_text(t, explain=True) for t in texts]
+
+    for text, result in zip(texts, explained):
+        for span in result['explain']:
+            assert text[span['start']:span['end']] == span['match']
+            assert span['kind'] in ('keyword', 'urgent', 'urgency')
+            assert (span['category'] is None) == (span['kind'] == 'urgency')
+    assert [{k: v for k, v in r.items() if k != 'explain'} for r in explained] == service.predict_batch(texts)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Building collapsed after earthquake", ('Earthquake', 98, 0.95)),
+    ("wildfire near the village", ('Fire', 95, 0.9)),
+    ("Heavy rainfall and floodwaters rising", ('Flood', 90, 0.85)),
+])
+def test_compound_keywords_keep_scores(service, text, expected):
+    result = service.predict_text(text)
+    assert (result['disaster_type'], result['danger_score'], result['confidence']) == expected
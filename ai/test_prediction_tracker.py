@@ -0,0 +1,55 @@
+"""
+Tests for the SQLite prediction log
+Run from ai/: python -m pytest test_prediction_tracker.py
+"""
+
+import json
+import sqlite3
+
+from prediction_tracker import PredictionTracker
+
+RESULT = {'disaster_type': 'Fire', 'danger_score': 85, 'confidence': 0.9, 'tags': ['fire', 'urgent']}
+EXPLAIN = [
+    {'category': 'fire', 'keyword': 'fire', 'kind': 'keyword', 'start': 2, 'end': 6, 'match': 'Fire'},
+    {'category': None, 'keyword': 'urgent', 'kind': 'urgency', 'start': 300, 'end': 306, 'match': 'URGENT'},
+]
+
+
+def test_explain_round_trips_compactly(tmp_path):
+    tracker = PredictionTracker(str(tmp_path / 'predictions.db'))
+    tracker.log_prediction('text', RESULT, '  Fire ' + 'x' * 300, explain=EXPLAIN)
+    tracker.log_prediction('text', dict(RESULT, explain=[]), 'nothing matched')
+    tracker.log_prediction('image', RESULT, 'Image: a.jpg')
+
+    image, empty, text = tracker.get_recent_predictions(3)
+    assert text['explain'] == EXPLAIN
+    assert empty['explain'] == []
+    assert image['explain'] is None
+
+    with sqlite3.connect(tmp_path / 'predictions.db') as conn:
+        stored = conn.execute('SELECT explain FROM predictions ORDER BY id LIMIT 1').fetchone()[0]
+    assert json.loads(stored) == [['fire', 'fire', 'keyword', 2, 6, 'Fire'], [None, 'urgent', 'urgency', 300, 306, 'URGENT']]
+    assert ' ' not in stored
+
+
+def test_old_database_gains_explain_column(tmp_path):
+    path = str(tmp_path / 'old.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, input_type TEXT NOT NULL,
+                disaster_type TEXT NOT NULL, danger_score INTEGER NOT NULL, confidence REAL NOT NULL,
+                tags TEXT, input_preview TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO predictions (timestamp, input_type, disaster_type, danger_score, confidence, tags) "
+                     "VALUES ('2026-01-01T00:00:00', 'text', 'Flood', 80, 0.8, '[\"flood\"]')")
+
+    tracker = PredictionTracker(path)
+    tracker.log_prediction('text', RESULT, 'Fire', explain=EXPLAIN[:1])
+    # Re-opening an already migrated database is a no-op
+    PredictionTracker(path)
+
+    new, old = tracker.get_recent_predictions(2)
+    assert old['disaster_type'] == 'Flood' and old['explain'] is None
+    assert new['explain'] == EXPLAIN[:1]
@@ -0,0 +1,146 @@
+"""
+Tests for the early-exit text cascade
+Run from ai/: python -m pytest test_text_cascade.py
+"""
+
+import json
+
+import pytest
+
+from text_cascade import TextCascade, keyword_tier, load_cascade_config
+from text_normalization import KeywordMatcher, tokenize
+
+
+def _tier(decisions, calls, name):
+    """Tier answering from a {text: (label, score)} table, recording each call"""
+    def run(context):
+        calls.append(name)
+        label, score = decisions.get(context['tokenized'].text, (None, 0))
+        return {'label': label, 'score': score}
+    return run
+
+
+def _cascade(thresholds, tiers=('keyword', 'fast', 'ensemble'), **decisions):
+    calls = []
+    available = {name: _tier(decisions.get(name, {}), calls, name) for name in tiers}
+    config = {'tiers': list(tiers), 'thresholds': thresholds}
+    return TextCascade(available, config), calls
+
+
+def _context(text):
+    return {'tokenized': tokenize(text)}
+
+
+def test_first_tier_reaching_its_threshold_answers():
+    cascade, calls = _cascade(
+        {'keyword': 2, 'fast': 0.3},
+        keyword={'fire': ('fire', 3), 'smoke': ('fire', 1)},
+        fast={'smoke': ('fire', 0.5), 'rain': ('flood', 0.1)},
+        ensemble={'rain': ('flood', 0.6)},
+    )
+
+    assert cascade.predict(_context('fire')) == ('keyword', {'label': 'fire', 'score': 3})
+    assert calls == ['keyword']
+
+    calls.clear()
+    assert cascade.predict(_context('smoke'))[0] == 'fast'
+    assert calls == ['keyword', 'fast']
+
+    calls.clear()
+    assert cascade.predict(_context('rain')) == ('ensemble', {'label': 'flood', 'score': 0.6})
+    assert calls == ['keyword', 'fast', 'ensemble']
+
+
+def test_score_equal_to_threshold_exits():
+    cascade, _ = _cascade({'keyword': 2}, tiers=('keyword', 'ensemble'),
+                          keyword={'fire': ('fire', 2)}, ensemble={'fire': ('flood', 0.9)})
+    assert cascade.predict(_context('fire'))[0] == 'keyword'
+
+
+def test_tier_without_label_never_exits():
+    cascade, _ = _cascade({'keyword': 0}, tiers=('keyword', 'ensemble'),
+                          keyword={'calm': (None, 5)}, ensemble={'calm': ('none', 0.4)})
+    assert cascade.predict(_context('calm'))[0] == 'ensemble'
+
+
+def test_unlabeled_last_tier_is_unanswered():
+    cascade, _ = _cascade({}, tiers=('keyword',), keyword={})
+    assert cascade.predict(_context('nothing here')) == (None, None)
+    assert cascade.stats()['unanswered'] == 1
+    assert cascade.stats()['requests'] == 0
+
+
+def test_empty_text_is_rejected():
+    cascade, calls = _cascade({'keyword': 2})
+    with pytest.raises(ValueError):
+        cascade.predict(_context('  ?! '))
+    assert calls == []
+
+
+def test_unavailable_tiers_are_skipped():
+    cascade, calls = _cascade({'keyword': 2, 'fast': 0.3}, tiers=('keyword', 'ensemble'),
+                              ensemble={'fire': ('fire', 0.7)})
+    assert cascade.order == ['keyword', 'ensemble']
+    assert cascade.predict(_context('fire'))[0] == 'ensemble'
+
+
+def test_stats_report_exit_rates():
+    cascade, _ = _cascade({'keyword': 1}, tiers=('keyword', 'ensemble'),
+                          keyword={'fire': ('fire', 1)}, ensemble={'rain': ('flood', 0.5)})
+    for text in ['fire', 'fire', 'fire', 'rain']:
+        cascade.predict(_context(text))
+
+    stats = cascade.stats()
+    assert stats['requests'] == 4
+    assert stats['tiers']['keyword'] == pytest.approx(
+        {'evaluated': 4, 'exits': 3, 'exit_rate': 0.75, 'share_of_requests': 0.75,
+         'mean_ms': stats['tiers']['keyword']['mean_ms']})
+    assert stats['tiers']['ensemble']['exits'] == 1
+
+
+def test_calibrate_picks_lowest_precise_threshold():
+    keyword = {f'k{i}': ('fire', score) for i, score in enumerate([1, 1, 1, 1, 2, 2, 2, 3, 3, 3])}
+    ensemble = {text: ('fire', 0.9) for text in keyword}
+    cascade, _ = _cascade({}, tiers=('keyword', 'ensemble'), keyword=keyword, ensemble=ensemble)
+
+    # Score-1 matches are wrong; everything scoring 2 or more is right
+    labels = ['flood'] * 4 + ['fire'] * 6
+    result = cascade.calibrate([_context(t) for t in keyword], labels, target_precision=0.95, min_support=3)
+
+    assert result['thresholds'] == {'keyword': 2.0}
+    assert result['report']['keyword']['exits'] == 6
+    assert result['report']['keyword']['precision'] == 1.0
+
+
+def test_keyword_tier_counts_distinct_matches_and_keeps_spans():
+    matcher = KeywordMatcher({'flood': ['flood', 'water', 'river'], 'fire': ['fire']})
+    context = _context('Flood water, more water near the river; no fire')
+    decision = keyword_tier(matcher)(context)
+
+    assert decision['label'] == 'flood'
+    assert decision['score'] == decision['matches'] == 3
+    assert context['keyword_spans'] == decision['spans']
+
+
+def test_keyword_tier_counts_compound_matches():
+    # 'wildfire' matches both the whole keyword and 'fire' as its tail
+    matcher = KeywordMatcher({'fire': ['smoke', 'burn', 'flame', 'fire', 'blaze', 'wildfire']})
+    decision = keyword_tier(matcher)(_context('wildfire spreading'))
+    assert decision['label'] == 'fire'
+    assert decision['score'] == 2
+
+
+def test_load_cascade_config_file_and_env(tmp_path, monkeypatch):
+    path = tmp_path / 'cascade.json'
+    path.write_text(json.dumps({'tiers': ['keyword', 'ensemble'], 'thresholds': {'keyword': 4}}))
+    for var in ('TEXT_CASCADE_CONFIG', 'TEXT_CASCADE_TIERS', 'TEXT_KEYWORD_MIN_MATCHES'):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv('TEXT_FAST_MARGIN', '0.5')
+
+    config = load_cascade_config(str(path))
+    assert config['tiers'] == ['keyword', 'ensemble']
+    assert config['thresholds'] == {'keyword': 4, 'fast': 0.5}
+
+    monkeypatch.setenv('TEXT_CASCADE_TIERS', 'keyword,turbo')
+    with pytest.raises(ValueError):
+        load_cascade_config(str(path))
@@ -0,0 +1,115 @@
+"""
+Tests for the shared text normalization, keyword matching and TF-IDF features
+Run from ai/: python -m pytest test_text_normalization.py
+"""
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from text_normalization import KeywordMatcher, TfidfFeatures, normalize, tokenize
+
+CORPUS = [
+    "Massive FLOOD in the city, people trapped on rooftops!",
+    "Building collapsed after the earthquake; several people under rubble",
+    "Fire emergency - smoke everywhere and flames spreading",
+    "Ｆｕｌｌｗｉｄｔｈ text and the ﬁre ligature should normalize",
+    "Straße closed, water rising near the river overflow point",
+    "a b c single letters are dropped by the token pattern",
+    "",
+]
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'ngram_range': (1, 2), 'stop_words': 'english'},
+    {'sublinear_tf': True, 'norm': 'l1'},
+    {'binary': True, 'use_idf': False},
+])
+def test_tfidf_features_match_vectorizer(options):
+    vectorizer = TfidfVectorizer(**options).fit([normalize(t) for t in CORPUS])
+    features = TfidfFeatures(vectorizer)
+    assert features.exact
+
+    expected = vectorizer.transform([normalize(t) for t in CORPUS]).toarray()
+    actual = features.transform([tokenize(t) for t in CORPUS]).toarray()
+    np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-12)
+
+
+def test_tfidf_features_fall_back_for_custom_analyzers():
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 3)).fit(CORPUS)
+    features = TfidfFeatures(vectorizer)
+    assert not features.exact
+
+    expected = vectorizer.transform([normalize(t) for t in CORPUS]).toarray()
+    np.testing.assert_allclose(features.transform(CORPUS).toarray(), expected)
+
+
+@pytest.mark.parametrize('options', [{'strip_accents': 'unicode'}, {'lowercase': False}])
+def test_tfidf_features_fall_back_for_accent_and_case_options(options):
+    corpus = CORPUS + ["ÉVACUATE NOW", "café naïve"]
+    vectorizer = TfidfVectorizer(**options).fit([normalize(t) for t in corpus])
+    features = TfidfFeatures(vectorizer)
+    assert not features.exact
+
+    expected = vectorizer.transform([normalize(t) for t in corpus]).toarray()
+    np.testing.assert_allclose(features.transform(corpus).toarray(), expected)
+
+
+def test_normalize_folds_width_case_and_ligatures():
+    assert normalize("  ＦＩＲＥ ﬁre Straße ") == "fire fire strasse"
+    assert tokenize("Flood, flood!").tokens == ['flood', 'flood']
+
+
+def test_keyword_matcher_matches_whole_tokens_and_prefixes():
+    matcher = KeywordMatcher({'flood': ['rain', 'river overflow'], 'fire': ['burn'], 'tsunami': ['sea']})
+
+    assert matcher.match("The train left, brain drain") == {}
+    assert matcher.match("Heavy RAIN, the river overflowed; houses burning") == {
+        'flood': ['rain', 'river overflow'],
+        'fire': ['burn'],
+    }
+    assert matcher.counts("rain rain rain") == {'flood': 1}
+
+
+def test_keyword_matcher_matches_compound_tails():
+    matcher = KeywordMatcher({'fire': ['fire'], 'earthquake': ['quake'], 'flood': ['water', 'rain']})
+
+    assert matcher.match("Wildfire near the village") == {'fire': ['fire']}
+    assert matcher.match("Building collapsed after earthquake") == {'earthquake': ['quake']}
+    assert matcher.match("Heavy rainfall and floodwaters rising") == {'flood': ['water', 'rain']}
+    # A head shorter than min_compound_head is not a compound
+    assert matcher.match("The train is late") == {}
+    _, spans = matcher.match_spans("WILDFIRE spreading")
+    assert spans == [('fire', 'fire', 0, 8, 'WILDFIRE')]
+
+
+@pytest.mark.parametrize('text', [
+    "  Fire!!! smoke everywhere",
+    "ＦＩＲＥ near the Straße, ﬁre spreading",
+    "Café on fire, SMOKE",
+    " \tRiver OVERFLOWED after the fire",
+])
+def test_spans_index_the_original_text(text):
+    matcher = KeywordMatcher({'fire': ['fire', 'smoke'], 'street': ['strasse'], 'flood': ['river overflow']})
+    _, spans = matcher.match_spans(text)
+
+    assert spans
+    for key, phrase, start, end, matched in spans:
+        assert matched == text[start:end]
+        assert normalize(matched).startswith(phrase)
+
+
+def test_spans_report_overlapping_phrases_once():
+    matcher = KeywordMatcher({'flood': ['flood', 'flooded', 'water'], 'urgent': ['flood']})
+    matched, spans = matcher.match_spans("Flooded streets")
+
+    assert matched == {'flood': ['flood', 'flooded'], 'urgent': ['flood']}
+    assert spans == [('flood', 'flooded', 0, 7, 'Flooded'), ('urgent', 'flood', 0, 7, 'Flooded')]
+
+
+def test_hit_matrix_spans_match_single_scans():
+    matcher = KeywordMatcher({'fire': ['fire', 'smoke'], 'flood': ['flood', 'river overflow']})
+    spans = []
+    matcher.hit_matrix(CORPUS, spans=spans)
+    assert spans == [matcher.match_spans(text)[1] for text in CORPUS]
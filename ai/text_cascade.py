@@ -0,0 +1,260 @@
+"""
+Text cascade for ResQ Connect
+Runs the text tiers in order (keyword, fast model, full ensemble) and stops
+at the first tier whose score clears its exit threshold
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+TIER_ORDER = ('keyword', 'fast', 'ensemble')
+
+# keyword: distinct keyword matches of the best category
+# fast: gap between the fast model's top two class probabilities
+DEFAULT_THRESHOLDS = {'keyword': 2, 'fast': 0.3}
+
+THRESHOLD_ENV = {'keyword': 'TEXT_KEYWORD_MIN_MATCHES', 'fast': 'TEXT_FAST_MARGIN'}
+
+
+def load_cascade_config(path=None):
+    """
+    Tier order and exit thresholds: defaults, then the JSON file at `path`
+    or TEXT_CASCADE_CONFIG ({"tiers": [...], "thresholds": {...}}, e.g. the
+    output of calibrate), then TEXT_CASCADE_TIERS / per-tier env overrides.
+    """
+    config = {'tiers': list(TIER_ORDER), 'thresholds': dict(DEFAULT_THRESHOLDS)}
+
+    path = path or os.environ.get('TEXT_CASCADE_CONFIG')
+    if path:
+        with open(path, 'r') as f:
+            loaded = json.load(f)
+        config['tiers'] = loaded.get('tiers', config['tiers'])
+        config['thresholds'].update(loaded.get('thresholds', {}))
+
+    if os.environ.get('TEXT_CASCADE_TIERS'):
+        config['tiers'] = [t.strip() for t in os.environ['TEXT_CASCADE_TIERS'].split(',') if t.strip()]
+    for tier, var in THRESHOLD_ENV.items():
+        if os.environ.get(var):
+            config['thresholds'][tier] = float(os.environ[var])
+
+    unknown = set(config['tiers']) - set(TIER_ORDER)
+    if unknown:
+        raise ValueError(f"Unknown text cascade tiers: {sorted(unknown)}")
+    return config
+
+
+def keyword_tier(matcher):
+    """
+    Best category by distinct keyword matches; ties go to the first
+    configured category. 'spans' lists every (category, keyword, start, end, matched)
+    occurrence found by the same scan; it is also left in
+    context['keyword_spans'] for callers whose answer came from a later tier.
+    """
+    def run(context):
+        matched, spans = matcher.match_spans(context['tokenized'])
+        context['keyword_spans'] = spans
+        best, best_count = None, 0
+        for category, phrases in matched.items():
+            if len(phrases) > best_count:
+                best, best_count = category, len(phrases)
+        return {'label': best, 'score': best_count, 'matches': best_count, 'spans': spans}
+    return run
+
+
+def model_tier(model, margin=False):
+    """
+    Classifier over the shared TF-IDF row (context['features']()). Scores
+    by top-2 probability margin when `margin`, else by top probability.
+    """
+    def run(context):
+        proba = model.predict_proba(context['features']())[0]
+        top = proba.argmax()
+        top2 = np.sort(proba)[-2:]
+        return {
+            'label': model.classes_[top],
+            'confidence': float(proba[top]),
+            'score': float(top2[1] - top2[0]) if margin else float(proba[top])
+        }
+    return run
+
+
+class TextCascade:
+    """
+    Ordered early-exit tiers with per-tier hit rates and latency.
+
+    `tiers` maps tier name to a function(context) -> decision dict with at
+    least 'label' and 'score'. A tier exits when its label is set and its
+    score reaches its threshold; the last configured tier answers whenever
+    it has a label. If no tier has one (e.g. a keyword-only cascade and no
+    keyword matched), predict returns (None, None). Tiers named in the
+    config but not available (e.g. no fast model) are skipped.
+    """
+
+    def __init__(self, tiers, config=None):
+        config = config or load_cascade_config()
+        self.order = [name for name in config['tiers'] if name in tiers]
+        if not self.order:
+            raise ValueError("Text cascade has no available tiers")
+        self.tiers = tiers
+        self.thresholds = dict(config['thresholds'])
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._requests = 0
+            self._unanswered = 0
+            self._stats = {name: {'evaluated': 0, 'exits': 0, 'seconds': 0.0} for name in self.order}
+
+    def predict(self, context):
+        """
+        Run tiers until one exits; returns (tier name, decision), or
+        (None, None) when no tier produced a label. Raises ValueError for
+        a message without any word tokens.
+        """
+        tokenized = context.get('tokenized')
+        if tokenized is not None and not tokenized.tokens:
+            raise ValueError("Text cascade needs a message with at least one word")
+        
+        last = self.order[-1]
+        for name in self.order:
+            start = time.perf_counter()
+            decision = self.tiers[name](context)
+            elapsed = time.perf_counter() - start
+            exits = decision.get('label') is not None and (
+                name == last or decision['score'] >= self.thresholds.get(name, float('inf'))
+            )
+            with self._lock:
+                entry = self._stats[name]
+                entry['evaluated'] += 1
+                entry['seconds'] += elapsed
+                if exits:
+                    entry['exits'] += 1
+                    self._requests += 1
+            if exits:
+                return name, decision
+        
+        with self._lock:
+            self._unanswered += 1
+        return None, None
+
+    def stats(self):
+        """Per-tier exit rate (of requests reaching the tier), share of all requests and mean latency"""
+        with self._lock:
+            requests = self._requests
+            unanswered = self._unanswered
+            stats = {name: dict(entry) for name, entry in self._stats.items()}
+        return {
+            'order': self.order,
+            'thresholds': {name: self.thresholds.get(name) for name in self.order[:-1]},
+            'requests': requests,
+            'unanswered': unanswered,
+            'tiers': {
+                name: {
+                    'evaluated': e['evaluated'],
+                    'exits': e['exits'],
+                    'exit_rate': round(e['exits'] / e['evaluated'], 4) if e['evaluated'] else None,
+                    'share_of_requests': round(e['exits'] / requests, 4) if requests else None,
+                    'mean_ms': round(e['seconds'] / e['evaluated'] * 1000, 4) if e['evaluated'] else None
+                }
+                for name, e in stats.items()
+            }
+        }
+
+    def calibrate(self, contexts, labels, target_precision=0.95, min_support=5):
+        """
+        Pick each non-final tier's lowest threshold whose exits on labeled
+        data are at least `target_precision` correct. Every tier is run on
+        every sample. Tiers that cannot reach the target get an infinite
+        threshold (never exit).
+
+        Returns a config dict (tiers, thresholds) plus a 'report' of the
+        resulting coverage, precision and overall accuracy.
+        """
+        labels = [str(label).casefold() for label in labels]
+        runs = {name: [self.tiers[name](context) for context in contexts] for name in self.order}
+
+        thresholds, report = {}, {}
+        remaining = np.ones(len(labels), dtype=bool)
+        final = np.empty(len(labels), dtype=object)
+        for name in self.order:
+            decisions = runs[name]
+            predicted = np.array([str(d.get('label')).casefold() if d.get('label') is not None else None
+                                  for d in decisions], dtype=object)
+            scores = np.array([d['score'] if d.get('label') is not None else -np.inf for d in decisions])
+            correct = predicted == np.array(labels, dtype=object)
+
+            if name == self.order[-1]:
+                exits = remaining.copy()
+            else:
+                threshold = float('inf')
+                for candidate in sorted(set(scores[remaining & np.isfinite(scores)])):
+                    chosen = remaining & (scores >= candidate)
+                    if chosen.sum() >= min_support and correct[chosen].mean() >= target_precision:
+                        threshold = float(candidate)
+                        break
+                thresholds[name] = threshold
+                exits = remaining & (scores >= threshold)
+
+            final[exits] = predicted[exits]
+            report[name] = {
+                'threshold': thresholds.get(name),
+                'exits': int(exits.sum()),
+                'coverage': round(float(exits.mean()), 4),
+                'precision': round(float(correct[exits].mean()), 4) if exits.any() else None
+            }
+            remaining &= ~exits
+
+        report['accuracy'] = round(float(np.mean(final == np.array(labels, dtype=object))), 4)
+        return {'tiers': list(self.order), 'thresholds': thresholds, 'report': report}
+
+
+def main():
+    """Calibrate the deployed ML service cascade on the held-out text corpus"""
+    parser = argparse.ArgumentParser(description='Calibrate text cascade exit thresholds')
+    parser.add_argument('--target-precision', type=float, default=0.95)
+    parser.add_argument('--min-support', type=int, default=5)
+    parser.add_argument('--output', default='saved_models/text_cascade.json')
+    args = parser.parse_args()
+
+    # Services load their models with paths relative to this directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+    sys.path.insert(0, 'Text_Disaster_Prediction')
+    from sklearn.model_selection import train_test_split
+    from train_model import load_and_combine_data, preprocess_data
+    import ml_service
+
+    cwd = os.getcwd()
+    os.chdir('Text_Disaster_Prediction')
+    df = preprocess_data(load_and_combine_data())
+    os.chdir(cwd)
+    # Same split as train_model.py: calibrate on texts the models did not see
+    _, X_test, _, y_test = train_test_split(
+        df['text'], df['label'], test_size=0.2, random_state=42, stratify=df['label']
+    )
+
+    service = ml_service.ml_service
+    if service.text_cascade is None:
+        print("Text model not loaded; train it with Text_Disaster_Prediction/train_model.py first")
+        return 1
+    contexts = [service.text_context(text) for text in X_test]
+    result = service.text_cascade.calibrate(contexts, list(y_test), args.target_precision, args.min_support)
+
+    for name, entry in result['report'].items():
+        print(f"{name}: {entry}")
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'tiers': result['tiers'], 'thresholds': result['thresholds'],
+                   'calibration': result['report']}, f, indent=2)
+    print(f"Cascade config written to {args.output} (set TEXT_CASCADE_CONFIG to use it)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
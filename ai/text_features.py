@@ -0,0 +1,98 @@
+"""
+Text features for ResQ Connect
+TF-IDF over hashed n-grams: no vocabulary dict to look up at transform time
+or to pickle, and document frequencies can be accumulated batch by batch
+"""
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class HashedTfidfVectorizer(TransformerMixin, BaseEstimator):
+    """
+    Drop-in replacement for TfidfVectorizer built on HashingVectorizer.
+
+    Tokens are hashed into `n_features` columns (alternate_sign=False so
+    counts stay non-negative for MultinomialNB) and weighted by a smoothed
+    IDF kept as a float32 NumPy array, matching TfidfVectorizer's
+    `smooth_idf=True` formula. `partial_fit` adds document frequencies from
+    another batch, so the IDF can be built over a corpus streamed in chunks.
+    """
+
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 2), stop_words='english',
+                 lowercase=True, sublinear_tf=False, norm='l2'):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.lowercase = lowercase
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+
+    def _hasher(self):
+        return HashingVectorizer(
+            n_features=self.n_features, ngram_range=self.ngram_range,
+            stop_words=self.stop_words, lowercase=self.lowercase,
+            alternate_sign=False, norm=None
+        )
+
+    def __getstate__(self):
+        # The hasher is stateless and idf_ follows from the document
+        # frequencies, so only the non-zero frequencies are pickled
+        state = self.__dict__.copy()
+        state.pop('_hashing', None)
+        state.pop('idf_', None)
+        df = state.pop('document_frequency_', None)
+        if df is not None:
+            nonzero = np.flatnonzero(df)
+            state['_df_nonzero'] = (nonzero.astype(np.int32), df[nonzero])
+        return state
+
+    def __setstate__(self, state):
+        nonzero = state.pop('_df_nonzero', None)
+        self.__dict__.update(state)
+        if nonzero is not None:
+            self.document_frequency_ = np.zeros(self.n_features, dtype=np.int64)
+            self.document_frequency_[nonzero[0]] = nonzero[1]
+            self._update_idf()
+
+    def _update_idf(self):
+        n = self.n_documents_
+        self.idf_ = (np.log((1 + n) / (1 + self.document_frequency_)) + 1).astype(np.float32)
+
+    @property
+    def hashing_(self):
+        if getattr(self, '_hashing', None) is None:
+            self._hashing = self._hasher()
+        return self._hashing
+
+    def partial_fit(self, raw_documents, y=None):
+        """Accumulate document frequencies from one batch and refresh idf_"""
+        counts = self.hashing_.transform(raw_documents)
+        if not hasattr(self, 'document_frequency_'):
+            self.document_frequency_ = np.zeros(self.n_features, dtype=np.int64)
+            self.n_documents_ = 0
+        self.document_frequency_ += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents_ += counts.shape[0]
+        self._update_idf()
+        return self
+
+    def fit(self, raw_documents, y=None):
+        for attr in ('document_frequency_', 'n_documents_', 'idf_'):
+            self.__dict__.pop(attr, None)
+        return self.partial_fit(raw_documents)
+
+    def transform(self, raw_documents):
+        X = self.hashing_.transform(raw_documents).astype(np.float64)
+        if self.sublinear_tf:
+            np.log(X.data, out=X.data)
+            X.data += 1
+        # CSR column indices select each stored count's IDF weight
+        X.data *= self.idf_[X.indices]
+        if self.norm:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def fit_transform(self, raw_documents, y=None):
+        return self.fit(raw_documents).transform(raw_documents)
@@ -0,0 +1,311 @@
+"""
+Text normalization for ResQ Connect
+One Unicode normalization and tokenization pass per message, shared by the
+keyword matchers and the TF-IDF features of every text path
+"""
+
+import re
+import unicodedata
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize as normalize_rows
+
+# Same word definition as scikit-learn's default token_pattern, so tokens
+# line up with the vocabularies of the trained vectorizers
+TOKEN_RE = re.compile(r'\w+')
+SKLEARN_TOKEN_PATTERN = r'(?u)\b\w\w+\b'
+
+
+def normalize(text):
+    """NFKC-normalize, casefold and strip (fullwidth forms, ligatures, accents composed)"""
+    return unicodedata.normalize('NFKC', str(text)).casefold().strip()
+
+
+class TokenizedText:
+    """
+    A normalized message with its word tokens and their (start, end) offsets
+    in `text`. `raw` is the message as received; source_span() maps offsets
+    in `text` back to it.
+    """
+
+    __slots__ = ('text', 'tokens', 'offsets', 'raw', '_index')
+
+    def __init__(self, text, tokens, offsets, raw=None):
+        self.text = text
+        self.tokens = tokens
+        self.offsets = offsets
+        self.raw = text if raw is None else raw
+        self._index = None
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def _source_index(self):
+        """
+        (starts, ends): for every character of `text`, the [start, end) range
+        of `raw` it came from. Built on first use, so only explained requests
+        pay for it.
+        """
+        raw = self.raw
+        if raw.isascii():
+            # Casefolding ASCII keeps lengths; only the stripped prefix shifts
+            lead = len(raw) - len(raw.lstrip())
+            starts = range(lead, lead + len(self.text))
+            return starts, range(lead + 1, lead + 1 + len(self.text))
+
+        # Normalize each base character with its combining marks, recording
+        # which raw range every output character came from ('ß' -> 'ss' and
+        # fullwidth forms map back to their single source character)
+        starts, ends = [], []
+        i = 0
+        while i < len(raw):
+            j = i + 1
+            while j < len(raw) and unicodedata.combining(raw[j]):
+                j += 1
+            piece = unicodedata.normalize('NFKC', raw[i:j]).casefold()
+            starts.extend([i] * len(piece))
+            ends.extend([j] * len(piece))
+            i = j
+        full = len(starts)
+        # Normalization can also produce leading/trailing whitespace to strip
+        folded = unicodedata.normalize('NFKC', raw).casefold()
+        lead = len(folded) - len(folded.lstrip())
+        if full != len(folded):
+            # Composition across characters (rare, e.g. conjoining jamo):
+            # clamp so spans stay inside the raw text
+            last = max(full - 1, 0)
+            size = len(self.text)
+            starts = [starts[min(lead + k, last)] if full else 0 for k in range(size)]
+            ends = [ends[min(lead + k, last)] if full else 0 for k in range(size)]
+            return starts, ends
+        return starts[lead:lead + len(self.text)], ends[lead:lead + len(self.text)]
+
+    def source_span(self, start, end):
+        """Map [start, end) in `text` to the matching [start, end) in `raw`"""
+        if self._index is None:
+            self._index = self._source_index()
+        starts, ends = self._index
+        return starts[start], ends[end - 1]
+
+
+def tokenize(text):
+    """Normalize and tokenize once; pass the result to matchers and TfidfFeatures"""
+    if isinstance(text, TokenizedText):
+        return text
+    raw = str(text)
+    normalized = normalize(raw)
+    tokens, offsets = [], []
+    for m in TOKEN_RE.finditer(normalized):
+        tokens.append(m.group())
+        offsets.append(m.span())
+    return TokenizedText(normalized, tokens, offsets, raw)
+
+
+class KeywordMatcher:
+    """
+    Match keyword phrases against tokens instead of substrings.
+
+    Every token of a phrase must match a whole message token in order,
+    except the last one, which only has to be a prefix so that inflections
+    still count ('burn' matches 'burning', 'river overflow' matches 'river
+    overflowed'). Single-word keywords also match as the tail of a compound
+    after a head of at least `min_compound_head` characters ('fire' in
+    'wildfire', 'quake' in 'earthquake', 'water' in 'floodwaters'). Unlike
+    substring search, 'rain' no longer matches 'train' or 'brain'; prefix
+    and compound matches still let 'sea' match 'season' and 'overseas'.
+
+    `groups` maps any key (a category name, or e.g. (category, 'urgent'))
+    to its list of phrases.
+    """
+
+    cache_size = 100000
+    min_compound_head = 3
+
+    def __init__(self, groups):
+        self.groups = {key: list(dict.fromkeys(phrases)) for key, phrases in groups.items()}
+        # One column per (key, phrase) for hit_matrix
+        self.columns = [(key, phrase) for key, phrases in self.groups.items() for phrase in phrases]
+        self._single = {}
+        self._multi = {}
+        for column, (key, phrase) in enumerate(self.columns):
+            words = tokenize(phrase).tokens
+            if not words:
+                continue
+            if len(words) == 1:
+                self._single.setdefault(words[0], []).append((key, phrase, column))
+            else:
+                self._multi.setdefault(words[0], []).append((tuple(words), key, phrase, column))
+        self._lengths = sorted({len(word) for word in self._single})
+        self._token_cache = {}
+
+    def _single_hits(self, token):
+        """
+        Single-word phrases that are a prefix of `token` or of a compound
+        tail of it, memoized per distinct token
+        """
+        hits = self._token_cache.get(token)
+        if hits is None:
+            hits, seen = [], set()
+            starts = [0] + list(range(self.min_compound_head, len(token)))
+            for start in starts:
+                tail = token[start:]
+                for n in self._lengths:
+                    if n > len(tail):
+                        break
+                    for hit in self._single.get(tail[:n], ()):
+                        if hit[2] not in seen:
+                            seen.add(hit[2])
+                            hits.append(hit)
+            if len(self._token_cache) >= self.cache_size:
+                self._token_cache.clear()
+            self._token_cache[token] = hits
+        return hits
+
+    def _iter_matches(self, tokenized):
+        """Yield (key, phrase, column, token_start, token_end) for every occurrence"""
+        tokens = tokenized.tokens
+        for i, token in enumerate(tokens):
+            for key, phrase, column in self._single_hits(token):
+                yield key, phrase, column, i, i + 1
+            for words, key, phrase, column in self._multi.get(token, ()):
+                end = i + len(words)
+                if end <= len(tokens) and tuple(tokens[i + 1:end - 1]) == words[1:-1] \
+                        and tokens[end - 1].startswith(words[-1]):
+                    yield key, phrase, column, i, end
+
+    def hit_matrix(self, texts, spans=None):
+        """
+        Sparse 0/1 matrix (texts x columns): whether each (key, phrase)
+        column occurs in each text. Multiply by group_matrix() for counts.
+        Pass a list as `spans` to also collect each text's match spans.
+        """
+        indptr, indices = [0], []
+        for text in texts:
+            tokenized = tokenize(text)
+            hits = set()
+            occurrences = [] if spans is not None else None
+            for key, phrase, column, start, end in self._iter_matches(tokenized):
+                hits.add(column)
+                if occurrences is not None:
+                    occurrences.append((key, phrase, start, end))
+            indices.extend(sorted(hits))
+            indptr.append(len(indices))
+            if spans is not None:
+                spans.append(self._spans(tokenized, occurrences))
+        return sp.csr_matrix((np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int32), indptr),
+                             shape=(len(indptr) - 1, len(self.columns)))
+
+    @staticmethod
+    def _spans(tokenized, occurrences):
+        """
+        (key, phrase, start, end, matched) per occurrence, with character
+        offsets into the raw message and the raw text they cover. Phrases of
+        one key matching the same tokens ('flood' and 'flooded' on 'Flooded')
+        are reported once, as the longest phrase.
+        """
+        longest = {}
+        for key, phrase, start, end in occurrences:
+            current = longest.get((key, start, end))
+            if current is None or len(phrase) > len(current):
+                longest[(key, start, end)] = phrase
+        spans = []
+        for (key, start, end), phrase in longest.items():
+            raw_start, raw_end = tokenized.source_span(tokenized.offsets[start][0], tokenized.offsets[end - 1][1])
+            spans.append((key, phrase, raw_start, raw_end, tokenized.raw[raw_start:raw_end]))
+        return spans
+
+    def group_matrix(self, keys):
+        """Sparse (columns x len(keys)) indicator mapping each column to its key's position in `keys`"""
+        position = {key: i for i, key in enumerate(keys)}
+        rows = [c for c, (key, _) in enumerate(self.columns) if key in position]
+        cols = [position[self.columns[c][0]] for c in rows]
+        return sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(self.columns), len(keys)))
+
+    def match(self, text):
+        """Distinct matched phrases per key, in configured order ({key: [phrase, ...]})"""
+        return self.match_spans(text, spans=False)[0]
+
+    def match_spans(self, text, spans=True):
+        """
+        match() plus every occurrence as (key, phrase, start, end, matched),
+        with character offsets into the original message, from the same scan
+        """
+        tokenized = tokenize(text)
+        found, occurrences = {}, [] if spans else None
+        for key, phrase, _, start, end in self._iter_matches(tokenized):
+            found.setdefault(key, set()).add(phrase)
+            if spans:
+                occurrences.append((key, phrase, start, end))
+        matched = {key: [p for p in self.groups[key] if p in found[key]] for key in self.groups if key in found}
+        return matched, self._spans(tokenized, occurrences) if spans else None
+
+    def counts(self, text):
+        """Number of distinct matched phrases per key"""
+        return {key: len(phrases) for key, phrases in self.match(text).items()}
+
+
+class TfidfFeatures:
+    """
+    Build TF-IDF rows from already tokenized text using a fitted
+    TfidfVectorizer's vocabulary_ and idf_, skipping its own preprocessing
+    and tokenization. Vectorizers it cannot reproduce exactly (custom
+    analyzers, accent stripping, no lowercasing, hashed features) are called
+    on the normalized text instead.
+    """
+
+    def __init__(self, vectorizer):
+        self.vectorizer = vectorizer
+        self.exact = (
+            hasattr(vectorizer, 'vocabulary_')
+            and getattr(vectorizer, 'analyzer', None) == 'word'
+            and getattr(vectorizer, 'tokenizer', None) is None
+            and getattr(vectorizer, 'preprocessor', None) is None
+            and getattr(vectorizer, 'strip_accents', None) is None
+            and getattr(vectorizer, 'lowercase', True)
+            and getattr(vectorizer, 'token_pattern', None) == SKLEARN_TOKEN_PATTERN
+        )
+        if self.exact:
+            self.vocabulary = vectorizer.vocabulary_
+            self.stop_words = vectorizer.get_stop_words() or frozenset()
+            self.min_n, self.max_n = vectorizer.ngram_range
+            self.idf = vectorizer.idf_ if getattr(vectorizer, 'use_idf', True) else None
+            self.n_features = len(self.vocabulary)
+
+    def _row(self, tokens):
+        # sklearn's token_pattern keeps only words of two or more characters
+        words = [t for t in tokens if len(t) > 1 and t not in self.stop_words]
+        counts = {}
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(words) - n + 1):
+                index = self.vocabulary.get(words[i] if n == 1 else ' '.join(words[i:i + n]))
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def transform(self, texts):
+        """TF-IDF matrix for a list of strings or TokenizedText"""
+        tokenized = [tokenize(t) for t in texts]
+        if not self.exact:
+            return self.vectorizer.transform([t.text for t in tokenized])
+
+        indptr, indices, data = [0], [], []
+        for t in tokenized:
+            counts = self._row(t.tokens)
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        X = sp.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), indptr),
+                          shape=(len(tokenized), self.n_features))
+        X.sort_indices()
+
+        v = self.vectorizer
+        if v.binary:
+            X.data[:] = 1
+        if v.sublinear_tf:
+            np.log(X.data, out=X.data)
+            X.data += 1
+        if self.idf is not None:
+            X.data *= self.idf[X.indices]
+        if v.norm:
+            X = normalize_rows(X, norm=v.norm, copy=False)
+        return X
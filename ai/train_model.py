@@ -10,32 +10,70 @@ import joblib
 import os
 
 from audio_preprocessor import AudioPreprocessor
+from memmap_sequence import MemmapSequence
 from models import DisasterClassificationModels
+from training_instrumentation import TrainingInstrumentation
+
+class MelSequence(MemmapSequence):
+    """
+    Batches streamed from a (memory-mapped) mel tensor.
+
+    mode='rnn' applies the same (timesteps, features) reshape as
+    train_rnn_model; with `traditional` set, inputs are (mel, traditional)
+    for the hybrid model. Without labels, batches are 1-tuples of inputs
+    (for predict).
+    """
+    
+    def __init__(self, mel, labels=None, traditional=None, batch_size=32, shuffle=False, mode='cnn', **kwargs):
+        super().__init__(np.arange(len(mel)), batch_size=batch_size, shuffle=shuffle, **kwargs)
+        self.mel = mel
+        self.labels = labels
+        self.traditional = traditional
+        self.mode = mode
+    
+    def __getitem__(self, idx):
+        batch_idx = self.batch_indices(idx)
+        X = np.asarray(self.mel[batch_idx], dtype=np.float32)
+        if X.ndim == 3:
+            X = X[..., np.newaxis]
+        if self.mode == 'rnn':
+            X = X.reshape(len(batch_idx), X.shape[2], X.shape[1])
+        if self.traditional is not None:
+            # A tuple, so Keras does not read [mel, traditional] as (x, y)
+            X = (X, np.asarray(self.traditional[batch_idx], dtype=np.float32))
+        
+        if self.labels is None:
+            return (X,)
+        return X, self.labels[batch_idx]
 
 class DisasterClassificationTrainer:
-    def __init__(self, data_dir='audio_dataset'):
+    def __init__(self, data_dir='audio_dataset', mel_path='saved_models/mel_features.npy'):
         self.data_dir = data_dir
+        self.mel_path = mel_path
         self.preprocessor = AudioPreprocessor()
         self.model_builder = DisasterClassificationModels()
         self.scaler = StandardScaler()
+        self.instrumentation = TrainingInstrumentation('audio_models')
         
     def prepare_data(self):
         """Prepare and split the dataset"""
         print("Extracting features from audio files...")
-        features_list, labels = self.preprocessor.prepare_dataset(self.data_dir)
+        with self.instrumentation.stage('feature_extraction'):
+            features_list, labels = self.preprocessor.prepare_dataset(self.data_dir)
         
         print(f"Total samples: {len(features_list)}")
         print(f"Classes: {set(labels)}")
         
         # Split data
-        data_splits = self.preprocessor.split_data(features_list)
+        with self.instrumentation.stage('split_data'):
+            data_splits = self.preprocessor.split_data(features_list, mel_path=self.mel_path)
         
         # Scale traditional features
         data_splits['X_train_traditional'] = self.scaler.fit_transform(data_splits['X_train_traditional'])
         data_splits['X_val_traditional'] = self.scaler.transform(data_splits['X_val_traditional'])
         data_splits['X_test_traditional'] = self.scaler.transform(data_splits['X_test_traditional'])
         
-        # Reshape mel spectrograms for CNN
+        # Reshape mel spectrograms for CNN (views of the memmap, no copy)
         mel_shape = data_splits['X_train_mel'][0].shape
         data_splits['X_train_mel'] = data_splits['X_train_mel'].reshape(-1, mel_shape[0], mel_shape[1], 1)
         data_splits['X_val_mel'] = data_splits['X_val_mel'].reshape(-1, mel_shape[0], mel_shape[1], 1)
@@ -51,44 +89,42 @@ class DisasterClassificationTrainer:
         callbacks = [
             EarlyStopping(patience=10, restore_best_weights=True),
             ReduceLROnPlateau(factor=0.5, patience=5),
-            ModelCheckpoint('best_cnn_model.h5', save_best_only=True)
+            ModelCheckpoint('best_cnn_model.h5', save_best_only=True),
+            self.instrumentation.callback('cnn', 32, len(data_splits['y_train']))
         ]
         
-        history = model.fit(
-            data_splits['X_train_mel'], data_splits['y_train'],
-            validation_data=(data_splits['X_val_mel'], data_splits['y_val']),
-            epochs=50,
-            batch_size=32,
-            callbacks=callbacks,
-            verbose=1
-        )
+        with self.instrumentation.stage('train_cnn'):
+            history = model.fit(
+                MelSequence(data_splits['X_train_mel'], data_splits['y_train'], shuffle=True),
+                validation_data=MelSequence(data_splits['X_val_mel'], data_splits['y_val']),
+                epochs=50,
+                callbacks=callbacks,
+                verbose=1
+            )
         
         return model, history
     
     def train_rnn_model(self, data_splits):
         """Train RNN model"""
         print("Training RNN model...")
-        # Reshape for RNN (samples, timesteps, features)
-        mel_shape = data_splits['X_train_mel'].shape
-        X_train_rnn = data_splits['X_train_mel'].reshape(-1, mel_shape[2], mel_shape[1])
-        X_val_rnn = data_splits['X_val_mel'].reshape(-1, mel_shape[2], mel_shape[1])
-        
+        # Batches are reshaped for RNN (samples, timesteps, features) as they are read
         model = self.model_builder.create_rnn_model()
         
         callbacks = [
             EarlyStopping(patience=10, restore_best_weights=True),
             ReduceLROnPlateau(factor=0.5, patience=5),
-            ModelCheckpoint('best_rnn_model.h5', save_best_only=True)
+            ModelCheckpoint('best_rnn_model.h5', save_best_only=True),
+            self.instrumentation.callback('rnn', 32, len(data_splits['y_train']))
         ]
         
-        history = model.fit(
-            X_train_rnn, data_splits['y_train'],
-            validation_data=(X_val_rnn, data_splits['y_val']),
-            epochs=50,
-            batch_size=32,
-            callbacks=callbacks,
-            verbose=1
-        )
+        with self.instrumentation.stage('train_rnn'):
+            history = model.fit(
+                MelSequence(data_splits['X_train_mel'], data_splits['y_train'], shuffle=True, mode='rnn'),
+                validation_data=MelSequence(data_splits['X_val_mel'], data_splits['y_val'], mode='rnn'),
+                epochs=50,
+                callbacks=callbacks,
+                verbose=1
+            )
         
         return model, history
     
@@ -100,19 +136,20 @@ class DisasterClassificationTrainer:
         callbacks = [
             EarlyStopping(patience=10, restore_best_weights=True),
             ReduceLROnPlateau(factor=0.5, patience=5),
-            ModelCheckpoint('best_hybrid_model.h5', save_best_only=True)
+            ModelCheckpoint('best_hybrid_model.h5', save_best_only=True),
+            self.instrumentation.callback('hybrid', 32, len(data_splits['y_train']))
         ]
         
-        history = model.fit(
-            [data_splits['X_train_mel'], data_splits['X_train_traditional']], 
-            data_splits['y_train'],
-            validation_data=([data_splits['X_val_mel'], data_splits['X_val_traditional']], 
-                           data_splits['y_val']),
-            epochs=50,
-            batch_size=32,
-            callbacks=callbacks,
-            verbose=1
-        )
+        with self.instrumentation.stage('train_hybrid'):
+            history = model.fit(
+                MelSequence(data_splits['X_train_mel'], data_splits['y_train'],
+                            traditional=data_splits['X_train_traditional'], shuffle=True),
+                validation_data=MelSequence(data_splits['X_val_mel'], data_splits['y_val'],
+                                            traditional=data_splits['X_val_traditional']),
+                epochs=50,
+                callbacks=callbacks,
+                verbose=1
+            )
         
         return model, history
     
@@ -124,7 +161,8 @@ class DisasterClassificationTrainer:
         
         for name, model in models.items():
             print(f"Training {name}...")
-            model.fit(data_splits['X_train_traditional'], data_splits['y_train'])
+            with self.instrumentation.stage(f'train_{name}'):
+                model.fit(data_splits['X_train_traditional'], data_splits['y_train'])
             trained_models[name] = model
             
         return trained_models
@@ -132,15 +170,14 @@ class DisasterClassificationTrainer:
     def evaluate_model(self, model, data_splits, model_type='deep'):
         """Evaluate model performance"""
         if model_type == 'cnn':
-            y_pred = model.predict(data_splits['X_test_mel'])
+            y_pred = model.predict(MelSequence(data_splits['X_test_mel']))
             y_pred_classes = np.argmax(y_pred, axis=1)
         elif model_type == 'rnn':
-            mel_shape = data_splits['X_test_mel'].shape
-            X_test_rnn = data_splits['X_test_mel'].reshape(-1, mel_shape[2], mel_shape[1])
-            y_pred = model.predict(X_test_rnn)
+            y_pred = model.predict(MelSequence(data_splits['X_test_mel'], mode='rnn'))
             y_pred_classes = np.argmax(y_pred, axis=1)
         elif model_type == 'hybrid':
-            y_pred = model.predict([data_splits['X_test_mel'], data_splits['X_test_traditional']])
+            y_pred = model.predict(MelSequence(data_splits['X_test_mel'],
+                                               traditional=data_splits['X_test_traditional']))
             y_pred_classes = np.argmax(y_pred, axis=1)
         else:  # traditional ML
             y_pred_classes = model.predict(data_splits['X_test_traditional'])
@@ -254,6 +291,9 @@ def main():
     # Save best models
     models_to_save = {name: result['model'] for name, result in results.items()}
     trainer.save_models(models_to_save)
+    
+    trainer.instrumentation.record(accuracy={name: float(result['accuracy']) for name, result in results.items()})
+    trainer.instrumentation.write_summary()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
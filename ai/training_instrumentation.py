@@ -0,0 +1,206 @@
+"""
+Training instrumentation for ResQ Connect models
+Per-stage timers, Keras throughput callbacks and a JSON summary per run
+"""
+
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import tensorflow as tf
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB. Without `resource`
+    (Windows) it comes from psutil's peak working set, falling back to the
+    current RSS; None when psutil is not installed either.
+    """
+    if resource is None:
+        if psutil is None:
+            return None
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+class StageTimer:
+    """Accumulated wall time and call count per named stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+
+    def summary(self):
+        return {name: {'seconds': round(e['seconds'], 3), 'calls': e['calls']} for name, e in self.stages.items()}
+
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """
+    Record per-epoch samples/sec, step time percentiles, input stall and peak RSS.
+
+    Step time is measured from on_train_batch_begin to on_train_batch_end.
+    Input stall is the time between the end of one step and the start of the
+    next, which is where Keras waits on a Sequence/generator; for tf.data
+    pipelines prefetching inside the compiled step, waits show up as a
+    heavier step time tail instead.
+
+    Args:
+        batch_size: samples per step, used for samples/sec
+        num_samples: exact samples per epoch when the last batch is partial
+        profile_steps: optional (first, last) global step range to trace
+                       with the TF profiler into `profile_dir`
+    """
+
+    def __init__(self, batch_size, num_samples=None, profile_steps=None, profile_dir='training_runs/profile'):
+        super().__init__()
+        self.batch_size = batch_size
+        self.num_samples = num_samples
+        self.profile_steps = profile_steps
+        self.profile_dir = profile_dir
+        self.epochs = []
+        self._global_step = 0
+        self._profiling = False
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._step_times = []
+        self._stall = 0.0
+        self._last_end = None
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        now = time.perf_counter()
+        if self._last_end is not None:
+            self._stall += now - self._last_end
+        self._step_start = now
+
+        if self.profile_steps and self._global_step == self.profile_steps[0] and not self._profiling:
+            tf.profiler.experimental.start(self.profile_dir)
+            self._profiling = True
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_end = time.perf_counter()
+        self._step_times.append(self._last_end - self._step_start)
+
+        if self._profiling and self._global_step >= self.profile_steps[1]:
+            tf.profiler.experimental.stop()
+            self._profiling = False
+        self._global_step += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        epoch_seconds = time.perf_counter() - self._epoch_start
+        steps = len(self._step_times)
+        samples = self.num_samples if self.num_samples else steps * self.batch_size
+        train_seconds = sum(self._step_times) + self._stall
+        step_ms = np.array(self._step_times) * 1000 if steps else np.zeros(1)
+
+        self.epochs.append({
+            'epoch': epoch + 1,
+            'steps': steps,
+            'epoch_seconds': round(epoch_seconds, 3),
+            # Excludes the validation pass that runs at the end of the epoch
+            'samples_per_sec': round(samples / train_seconds, 1) if train_seconds else None,
+            'input_stall_seconds': round(self._stall, 3),
+            'input_stall_fraction': round(self._stall / train_seconds, 4) if train_seconds else None,
+            'step_ms_p50': round(float(np.percentile(step_ms, 50)), 3),
+            'step_ms_p90': round(float(np.percentile(step_ms, 90)), 3),
+            'step_ms_p99': round(float(np.percentile(step_ms, 99)), 3),
+            'peak_rss_mb': peak_rss_mb(),
+            'metrics': {k: float(v) for k, v in (logs or {}).items() if np.isscalar(v)}
+        })
+
+    def on_train_end(self, logs=None):
+        if self._profiling:
+            tf.profiler.experimental.stop()
+            self._profiling = False
+
+    def summary(self):
+        if not self.epochs:
+            return {'epochs': []}
+        # The first epoch includes graph tracing, so steady state starts at epoch 2
+        steady = self.epochs[1:] or self.epochs
+        return {
+            'epochs': self.epochs,
+            'mean_samples_per_sec': round(float(np.mean([e['samples_per_sec'] or 0 for e in steady])), 1),
+            'mean_input_stall_fraction': round(float(np.mean([e['input_stall_fraction'] or 0 for e in steady])), 4),
+            'step_ms_p50': round(float(np.median([e['step_ms_p50'] for e in steady])), 3),
+            'step_ms_p99': round(float(max(e['step_ms_p99'] for e in steady)), 3)
+        }
+
+
+class TrainingInstrumentation:
+    """
+    Collect stage timings and per-model callbacks for one training run and
+    write them to `<out_dir>/<run_name>_<timestamp>.json`.
+
+    Set TRAINING_PROFILE_STEPS=first,last to capture a TF profiler trace of
+    that step range for every instrumented model.
+    """
+
+    def __init__(self, run_name, out_dir='training_runs'):
+        self.run_name = run_name
+        self.out_dir = out_dir
+        self.started = datetime.now()
+        self.timer = StageTimer()
+        self.callbacks = {}
+        self.extra = {}
+
+        profile = os.getenv('TRAINING_PROFILE_STEPS', '')
+        self.profile_steps = tuple(int(s) for s in profile.split(',')) if profile else None
+
+    def stage(self, name):
+        return self.timer.stage(name)
+
+    def callback(self, model_name, batch_size, num_samples=None):
+        """Keras callback for one model's fit(); add it to the callbacks list"""
+        cb = ThroughputCallback(
+            batch_size, num_samples, self.profile_steps,
+            profile_dir=os.path.join(self.out_dir, 'profile', f'{self.run_name}_{model_name}')
+        )
+        self.callbacks[model_name] = cb
+        return cb
+
+    def record(self, **values):
+        """Attach extra values (e.g. accuracies) to the summary"""
+        self.extra.update(values)
+
+    def write_summary(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        summary = {
+            'run': self.run_name,
+            'started': self.started.isoformat(),
+            'finished': datetime.now().isoformat(),
+            'stages': self.timer.summary(),
+            'models': {name: cb.summary() for name, cb in self.callbacks.items()},
+            'peak_rss_mb': peak_rss_mb(),
+            **self.extra
+        }
+        path = os.path.join(self.out_dir, f"{self.run_name}_{self.started.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Training summary written to {path}")
+        return path
@@ -0,0 +1,302 @@
+"""
+Concurrent training orchestrator for DisasterClassificationTrainer
+Runs each model as its own process with a CPU thread budget, sharing one
+prepared data_splits through shared memory
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+from datetime import datetime
+from multiprocessing import shared_memory
+import numpy as np
+
+DEEP_JOBS = ('cnn', 'rnn', 'hybrid')
+TRADITIONAL_JOBS = {'rf': 'random_forest', 'svm': 'svm'}
+ALL_JOBS = DEEP_JOBS + tuple(TRADITIONAL_JOBS)
+
+# Relative share of the CPU budget; SVC training is single-threaded
+JOB_WEIGHTS = {'cnn': 2, 'rnn': 2, 'hybrid': 2, 'rf': 1, 'svm': 0}
+
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+
+def share_data_splits(data_splits):
+    """
+    Make data_splits available to job processes without copying it per job.
+
+    Mel splits backed by a memory-mapped file are passed as (path, slice)
+    and reopened by each job; every other array is copied once into its own
+    shared memory block; plain values (paths, slice bounds) are passed as is.
+
+    Returns:
+        (blocks, spec) where blocks must stay referenced (and be unlinked) by
+        the parent, and spec is the picklable map jobs pass to
+        attach_data_splits
+    """
+    blocks, spec = [], {}
+    mel_path = data_splits.get('mel_path')
+    mel_slices = data_splits.get('mel_slices') or {}
+
+    for key, value in data_splits.items():
+        split = key[2:-4] if key.startswith('X_') and key.endswith('_mel') else None
+        if mel_path and split in mel_slices:
+            start, stop = mel_slices[split]
+            spec[key] = ('memmap', mel_path, start, stop, value.shape)
+        elif isinstance(value, np.ndarray):
+            array = np.ascontiguousarray(value)
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            blocks.append(block)
+            spec[key] = ('shm', block.name, array.shape, array.dtype.str)
+        else:
+            spec[key] = ('value', value)
+    return blocks, spec
+
+
+def attach_data_splits(spec):
+    """Zero-copy views of shared data_splits; returns (data_splits, blocks)"""
+    data_splits, blocks = {}, []
+    for key, (kind, *args) in spec.items():
+        if kind == 'memmap':
+            path, start, stop, shape = args
+            data_splits[key] = np.load(path, mmap_mode='r')[start:stop].reshape(shape)
+        elif kind == 'shm':
+            name, shape, dtype = args
+            block = shared_memory.SharedMemory(name=name)
+            data_splits[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            blocks.append(block)
+        else:
+            data_splits[key] = args[0]
+    return data_splits, blocks
+
+
+def allocate_threads(jobs, cpu_budget, overrides=None):
+    """Split the CPU budget across jobs by JOB_WEIGHTS (at least one thread each)"""
+    overrides = overrides or {}
+    fixed = {job: overrides[job] for job in jobs if job in overrides}
+    weighted = [job for job in jobs if job not in fixed and JOB_WEIGHTS[job] > 0]
+    threads = dict(fixed)
+    threads.update({job: 1 for job in jobs if job not in fixed and JOB_WEIGHTS[job] == 0})
+
+    remaining = max(len(weighted), cpu_budget - sum(threads.values()))
+    total_weight = sum(JOB_WEIGHTS[job] for job in weighted)
+    for job in weighted:
+        threads[job] = max(1, int(remaining * JOB_WEIGHTS[job] / total_weight))
+    return threads
+
+
+def _limit_threads(threads):
+    """Must run before TensorFlow or BLAS are imported in the job process"""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+
+def run_job(job, spec, threads, label_classes, output_dir, result_queue):
+    """Train and evaluate one model in a fresh process and report the result"""
+    _limit_threads(threads)
+    result = {'job': job, 'threads': threads, 'pid': os.getpid(), 'status': 'failed'}
+    start = time.perf_counter()
+    blocks = []
+
+    try:
+        from threadpoolctl import threadpool_limits
+        import joblib
+        from train_model import DisasterClassificationTrainer
+
+        data_splits, blocks = attach_data_splits(spec)
+        trainer = DisasterClassificationTrainer()
+        trainer.instrumentation.run_name = f'audio_{job}'
+        trainer.preprocessor.label_encoder.classes_ = np.asarray(label_classes)
+
+        with threadpool_limits(limits=threads):
+            if job in DEEP_JOBS:
+                import tensorflow as tf
+                tf.config.threading.set_intra_op_parallelism_threads(threads)
+                tf.config.threading.set_inter_op_parallelism_threads(max(1, threads // 2))
+
+                model, history = getattr(trainer, f'train_{job}_model')(data_splits)
+                result['epochs'] = len(history.history.get('loss', []))
+                model_path = os.path.join(output_dir, f'{job}_model.h5')
+                train_seconds = time.perf_counter() - start
+                model.save(model_path)
+            else:
+                name = TRADITIONAL_JOBS[job]
+                model = trainer.model_builder.create_traditional_ml_models()[name]
+                if 'n_jobs' in model.get_params():
+                    model.set_params(n_jobs=threads)
+                model.fit(data_splits['X_train_traditional'], data_splits['y_train'])
+                model_path = os.path.join(output_dir, f'{name}_model.pkl')
+                train_seconds = time.perf_counter() - start
+                joblib.dump(model, model_path)
+
+            eval_start = time.perf_counter()
+            accuracy, _ = trainer.evaluate_model(model, data_splits, job if job in DEEP_JOBS else 'traditional')
+
+        trainer.instrumentation.record(accuracy=float(accuracy))
+        result.update({
+            'status': 'completed',
+            'accuracy': float(accuracy),
+            'instrumentation': trainer.instrumentation.write_summary(),
+            'train_seconds': round(train_seconds, 3),
+            'eval_seconds': round(time.perf_counter() - eval_start, 3),
+            'model_path': model_path
+        })
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        result['wall_seconds'] = round(time.perf_counter() - start, 3)
+        for block in blocks:
+            block.close()
+        result_queue.put(result)
+
+
+class TrainingOrchestrator:
+    """
+    Schedule model trainings as independent processes.
+
+    Jobs start as soon as their thread allocation fits in the CPU budget, so
+    the sklearn models train alongside the Keras models instead of after
+    them. Processes are spawned (not forked) so each job initializes its own
+    TensorFlow runtime with its own thread limits.
+    """
+
+    def __init__(self, jobs=ALL_JOBS, cpu_budget=None, thread_overrides=None,
+                 output_dir='saved_models', manifest_dir='training_runs'):
+        unknown = set(jobs) - set(ALL_JOBS)
+        if unknown:
+            raise ValueError(f"Unknown training jobs: {sorted(unknown)}")
+
+        self.jobs = list(jobs)
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.threads = allocate_threads(self.jobs, self.cpu_budget, thread_overrides)
+        self.output_dir = output_dir
+        self.manifest_dir = manifest_dir
+
+    def run(self, trainer, data_splits):
+        """Train every job on the shared data_splits and write the run manifest"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+        # Label encoder and scaler are shared by all models, save them once
+        trainer.save_models({})
+
+        started = datetime.now()
+        run_start = time.perf_counter()
+        blocks, spec = share_data_splits(data_splits)
+        ctx = mp.get_context('spawn')
+        result_queue = ctx.Queue()
+        label_classes = list(trainer.preprocessor.label_encoder.classes_)
+
+        pending = list(self.jobs)
+        running = {}
+        results = {}
+
+        try:
+            while pending or running:
+                # Start queued jobs while they fit in the remaining budget
+                for job in list(pending):
+                    in_use = sum(self.threads[j] for j in running)
+                    if running and in_use + self.threads[job] > self.cpu_budget:
+                        continue
+                    process = ctx.Process(
+                        target=run_job, name=f'train-{job}',
+                        args=(job, spec, self.threads[job], label_classes, self.output_dir, result_queue)
+                    )
+                    process.start()
+                    running[job] = (process, time.perf_counter() - run_start)
+                    pending.remove(job)
+                    print(f"Started {job} with {self.threads[job]} threads (pid {process.pid})")
+
+                try:
+                    result = result_queue.get(timeout=5)
+                except Exception:
+                    # Catch jobs that died without reporting (e.g. killed by the OOM killer)
+                    for job, (process, _) in list(running.items()):
+                        if not process.is_alive() and job not in results:
+                            results[job] = {'job': job, 'status': 'failed', 'threads': self.threads[job],
+                                            'error': f'process exited with code {process.exitcode}'}
+                            del running[job]
+                    continue
+
+                job = result['job']
+                process, started_at = running.pop(job)
+                process.join()
+                result['started_at'] = round(started_at, 3)
+                results[job] = result
+                status = f"accuracy {result['accuracy']:.4f}" if result['status'] == 'completed' else result['error']
+                print(f"Finished {job} in {result['wall_seconds']:.1f}s: {status}")
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        wall_seconds = time.perf_counter() - run_start
+        manifest = {
+            'run_id': started.strftime('%Y%m%d_%H%M%S'),
+            'started': started.isoformat(),
+            'finished': datetime.now().isoformat(),
+            'cpu_budget': self.cpu_budget,
+            'wall_seconds': round(wall_seconds, 3),
+            'sequential_seconds': round(sum(r.get('wall_seconds', 0) for r in results.values()), 3),
+            'n_train': int(len(data_splits['y_train'])),
+            'n_test': int(len(data_splits['y_test'])),
+            'jobs': [results[job] for job in self.jobs if job in results]
+        }
+        manifest_path = os.path.join(self.manifest_dir, f"run_{manifest['run_id']}.json")
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        print(f"Run manifest written to {manifest_path}")
+
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train all audio models concurrently')
+    parser.add_argument('--data-dir', default='audio_dataset')
+    parser.add_argument('--jobs', default=','.join(ALL_JOBS),
+                        help=f'comma-separated subset of {",".join(ALL_JOBS)}')
+    parser.add_argument('--cpus', type=int, default=None, help='total CPU thread budget')
+    parser.add_argument('--threads', default='',
+                        help='per-job thread overrides, e.g. cnn=4,rf=2')
+    parser.add_argument('--output-dir', default='saved_models')
+    parser.add_argument('--manifest-dir', default='training_runs')
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in filter(None, args.threads.split(',')):
+        job, n = item.split('=')
+        overrides[job.strip()] = int(n)
+
+    from train_model import DisasterClassificationTrainer
+    trainer = DisasterClassificationTrainer(args.data_dir)
+    data_splits = trainer.prepare_data()
+
+    orchestrator = TrainingOrchestrator(
+        jobs=[j.strip() for j in args.jobs.split(',') if j.strip()],
+        cpu_budget=args.cpus,
+        thread_overrides=overrides,
+        output_dir=args.output_dir,
+        manifest_dir=args.manifest_dir
+    )
+    manifest = orchestrator.run(trainer, data_splits)
+
+    print("\n" + "="*50)
+    print("MODEL COMPARISON")
+    print("="*50)
+    for result in manifest['jobs']:
+        if result['status'] == 'completed':
+            print(f"{result['job']}: {result['accuracy']:.4f} ({result['wall_seconds']:.1f}s)")
+        else:
+            print(f"{result['job']}: failed ({result['error']})")
+    print(f"Wall time {manifest['wall_seconds']:.1f}s vs {manifest['sequential_seconds']:.1f}s sequential")
+    return 0 if all(r['status'] == 'completed' for r in manifest['jobs']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
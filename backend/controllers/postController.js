@@ -4,6 +4,7 @@ const User = require('../models/User');
 const { sendAlertEmail, createAlertEmailHTML } = require('../services/emailService');
 const axios = require('axios');
 const FormData = require('form-data');
+const crypto = require('crypto');
 
 // @desc    Create new SOS post
 // @route   POST /api/posts
@@ -45,22 +46,29 @@ const createPost = async (req, res) => {
             const fs = require('fs'); // fs is only needed here for local files
 
             const mlServiceUrl = config.ML_SERVICE_URL + '/predict';
-            console.log('🤖 Calling ML Service:', mlServiceUrl);
+            // Same id shows up in the ML service's traces and slow-request log
+            const requestId = req.headers['x-request-id'] || crypto.randomUUID();
+            console.log('🤖 Calling ML Service:', mlServiceUrl, 'request id:', requestId);
             console.log('📝 Content Type:', type);
 
             if (type === 'text') {
                 console.log('📄 Text Content:', textContent);
                 // Send text to ML service
+                const mlStart = Date.now();
                 const response = await axios.post(mlServiceUrl,
                     new URLSearchParams({
                         type: 'text',
                         text: textContent
                     }),
                     {
-                        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+                        headers: {
+                            'Content-Type': 'application/x-www-form-urlencoded',
+                            'X-Request-ID': requestId
+                        },
                         timeout: 10000
                     }
                 );
+                console.log(`⏱️ [${requestId}] ML call: ${Date.now() - mlStart}ms`);
 
                 console.log('✅ ML Response:', response.data);
                 dangerScore = response.data.danger_score || 70;
@@ -71,6 +79,8 @@ const createPost = async (req, res) => {
                 // For media files, send the file to ML service
                 const formData = new FormData();
                 formData.append('type', type);
+                // Lets the ML service report re-shares as near-duplicates of this post
+                formData.append('report_id', post._id.toString());
 
                 // Check if file is local or S3
                 if (req.file && req.file.path) {
@@ -80,17 +90,21 @@ const createPost = async (req, res) => {
                 } else if (req.file && req.file.location) {
                     // S3 file - download and send
                     console.log('☁️ S3 file:', req.file.location);
+                    const downloadStart = Date.now();
                     const fileResponse = await axios.get(req.file.location, { responseType: 'arraybuffer' });
+                    console.log(`⏱️ [${requestId}] S3 download: ${Date.now() - downloadStart}ms`);
                     formData.append('file', Buffer.from(fileResponse.data), {
                         filename: req.file.originalname || 'file',
                         contentType: req.file.mimetype
                     });
                 }
 
+                const mlStart = Date.now();
                 const response = await axios.post(mlServiceUrl, formData, {
-                    headers: formData.getHeaders(),
+                    headers: { ...formData.getHeaders(), 'X-Request-ID': requestId },
                     timeout: 15000
                 });
+                console.log(`⏱️ [${requestId}] ML call: ${Date.now() - mlStart}ms`);
 
                 console.log('✅ ML Response:', response.data);
                 dangerScore = response.data.danger_score || 70;
@@ -118,7 +132,14 @@ const createPost = async (req, res) => {
         await post.save();
 
         // 4. Check Threshold & Alert
-        if (dangerScore > 50) {
+        // Near-duplicates (re-shared images) reuse the original's danger score;
+        // the original post already raised the alert for this incident
+        const duplicateOf = mlResponse.duplicate_of;
+        if (duplicateOf) {
+            console.log(`🔁 Post ${post._id} is a near-duplicate of ${duplicateOf} (similarity ${mlResponse.similarity}); no new alert`);
+        }
+
+        if (dangerScore > 50 && !duplicateOf) {
             // Create Alert
             const alert = await Alert.create({
                 postId: post._id,